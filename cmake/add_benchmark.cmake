@@ -1,6 +1,9 @@
 # Copyright (c) 2016, Daniel Liew
 # This file is covered by the license in LICENSE-SVCB.txt
 
+# For `cmake_parse_arguments()` (built in from CMake 3.5)
+include(CMakeParseArguments)
+
 # List of additional files that generation of target
 # include files should depend on. This ensures that if these
 # files change the files containing the benchmark targets
@@ -33,29 +36,222 @@ macro(add_cmake_dependency_handler pythonFile)
   unset(_HANDLER_FILE)
 endmacro()
 
-macro(add_benchmark BENCHMARK_DIR)
-  set(INPUT_FILE ${CMAKE_CURRENT_SOURCE_DIR}/${BENCHMARK_DIR}/spec.yml)
-  set(OUTPUT_FILE ${CMAKE_CURRENT_BINARY_DIR}/${BENCHMARK_DIR}_targets.cmake)
-  # Only re-generate the file if necessary so that re-configure is as fast as possible
-  set(_should_force_regen FALSE)
-  if (NOT ${_should_force_regen})
-    if (SVCB_PROFILE_BUILD_CHANGED)
-      # If the profiling build mode change it means we have to re-generate
-      # the targets.
-      set(_should_force_regen TRUE)
-    endif()
+# Set `OUTPUT_VAR` to TRUE if the target include file `OUTPUT_FILE` generated
+# from the benchmark specification file(s) given after `OUTPUT_FILE` needs to
+# be re-generated and FALSE otherwise.
+#
+# Timestamps are compared against the manifest `svcb-emit-cmake-decls.py`
+# writes next to `OUTPUT_FILE` rather than `OUTPUT_FILE` itself. The tool
+# updates the manifest every time it runs but only rewrites `OUTPUT_FILE`
+# if its contents change. So (for example) modifying an svcb source file
+# causes the tool to be invoked once but doesn't touch the target files
+# unless the declarations actually change.
+function(svcb_targets_file_is_stale OUTPUT_VAR OUTPUT_FILE)
+  # Files generated by `svcb_batch_generate_benchmark_targets()` during this
+  # configure are up to date.
+  get_property(_generated_by_batch GLOBAL PROPERTY "SVCB_BATCH_GENERATED_${OUTPUT_FILE}")
+  if (_generated_by_batch)
+    set(${OUTPUT_VAR} FALSE PARENT_SCOPE)
+    return()
+  endif()
+  set(_manifest_file "${OUTPUT_FILE}.manifest")
+  set(_is_stale FALSE)
+  if (NOT EXISTS "${OUTPUT_FILE}")
+    set(_is_stale TRUE)
   endif()
-  if (NOT ${_should_force_regen})
+  if (SVCB_PROFILE_BUILD_CHANGED)
+    # If the profiling build mode change it means we have to re-generate
+    # the targets.
+    set(_is_stale TRUE)
+  endif()
+  if (NOT ${_is_stale})
     foreach (dep ${SVCOMP_ADDITIONAL_GEN_CMAKE_INC_DEPS})
       if (NOT EXISTS "${dep}")
         message(FATAL_ERROR "Dependency \"${dep}\" does not exist")
       endif()
-      if ("${dep}" IS_NEWER_THAN "${OUTPUT_FILE}")
-        set(_should_force_regen TRUE)
+      if ("${dep}" IS_NEWER_THAN "${_manifest_file}")
+        set(_is_stale TRUE)
+        break()
       endif()
     endforeach()
   endif()
-  if (("${INPUT_FILE}" IS_NEWER_THAN "${OUTPUT_FILE}") OR ${_should_force_regen})
+  foreach (input_file ${ARGN})
+    if ("${input_file}" IS_NEWER_THAN "${_manifest_file}")
+      set(_is_stale TRUE)
+      break()
+    endif()
+  endforeach()
+  set(${OUTPUT_VAR} ${_is_stale} PARENT_SCOPE)
+endfunction()
+
+# Generate the target include files for every stale benchmark specification
+# file found under `SEARCH_DIR` using a single invocation of
+# `svcb-emit-cmake-decls.py`. This avoids starting a Python interpreter for
+# every `add_benchmark()` call which dominates configure time on large trees.
+#
+# The include files are written to where `add_benchmark()` expects them so
+# that it just includes them. Benchmark specification files that the batch
+# could not handle (e.g. they need a dependency handler registered with
+# `add_cmake_dependency_handler()` or are invalid) are left for
+# `add_benchmark()` to generate individually.
+function(svcb_batch_generate_benchmark_targets SEARCH_DIR)
+  file(GLOB_RECURSE _spec_files "${SEARCH_DIR}/spec.yml")
+  set(_manifest_file "${CMAKE_BINARY_DIR}/svcb_batch_targets_manifest.txt")
+  set(_results_file "${CMAKE_BINARY_DIR}/svcb_batch_targets_results.txt")
+  set(_manifest_contents "")
+  set(_stale_count 0)
+  foreach (spec_file ${_spec_files})
+    # This mirrors the `OUTPUT_FILE` computed by `add_benchmark()`.
+    get_filename_component(_benchmark_dir "${spec_file}" DIRECTORY)
+    file(RELATIVE_PATH _rel_benchmark_dir "${CMAKE_SOURCE_DIR}" "${_benchmark_dir}")
+    set(_output_file "${CMAKE_BINARY_DIR}/${_rel_benchmark_dir}_targets.cmake")
+    svcb_targets_file_is_stale(_is_stale "${_output_file}" "${spec_file}")
+    if (${_is_stale})
+      set(_manifest_contents "${_manifest_contents}${spec_file}\t${_output_file}\n")
+      math(EXPR _stale_count "${_stale_count} + 1")
+    endif()
+  endforeach()
+  if ("${_stale_count}" EQUAL 0)
+    return()
+  endif()
+
+  message(STATUS "Generating target files for ${_stale_count} benchmark(s)")
+  file(WRITE "${_manifest_file}" "${_manifest_contents}")
+  set(_coverage_arg "")
+  if (BUILD_WITH_PROFILING)
+    set(_coverage_arg "--coverage")
+  endif()
+  execute_process(COMMAND ${PYTHON_EXECUTABLE} "${SVCB_DIR}/tools/svcb-emit-cmake-decls.py"
+                          --architecture ${SVCOMP_ARCHITECTURE}
+                          --batch-manifest "${_manifest_file}"
+                          --batch-results "${_results_file}"
+                          --cache-dir "${SVCB_CACHE_DIR}"
+                          --log-level warning
+                          ${_coverage_arg}
+                  RESULT_VARIABLE RESULT_CODE
+                 )
+  if (NOT ${RESULT_CODE} EQUAL 0)
+    message(STATUS "Some target files will be generated individually")
+  endif()
+  # Only output files listed in the results are up to date.
+  set(_up_to_date_output_files "")
+  if (EXISTS "${_results_file}")
+    file(STRINGS "${_results_file}" _up_to_date_output_files)
+    file(REMOVE "${_results_file}")
+  endif()
+  foreach (output_file ${_up_to_date_output_files})
+    set_property(GLOBAL PROPERTY "SVCB_BATCH_GENERATED_${output_file}" TRUE)
+  endforeach()
+endfunction()
+
+# Perform the actions needed for the target `benchmark_target` declared in
+# a target include file (e.g. recording it in the benchmark index). `INPUT_FILE`
+# is the benchmark specification file that declares the target. If augmented
+# benchmark specification files are enabled an entry is appended to
+# `_svcb_augmented_spec_entries` in the caller's scope for
+# `svcb_add_augmented_spec_command()`.
+function(svcb_add_benchmark_target_actions benchmark_target INPUT_FILE)
+  # Record the target for the benchmark index. This mirrors where
+  # CMake places the executable.
+  get_target_property(_exe_dir ${benchmark_target} RUNTIME_OUTPUT_DIRECTORY)
+  if (NOT _exe_dir)
+    set(_exe_dir "${CMAKE_CURRENT_BINARY_DIR}")
+  endif()
+  set(_exe_path "${_exe_dir}/${benchmark_target}${CMAKE_EXECUTABLE_SUFFIX}")
+  set(_bc_path "")
+  if (WLLVM_RUN_EXTRACT_BC)
+    set(_bc_path "${_exe_path}.bc")
+  endif()
+  set(_augmented_spec_path "")
+  if (EMIT_AUGMENTED_BENCHMARK_SPECIFICATION_FILES)
+    set(_augmented_spec_path "${CMAKE_CURRENT_BINARY_DIR}/${benchmark_target}.yml")
+  endif()
+  set_property(GLOBAL APPEND PROPERTY
+    SVCB_BENCHMARK_INDEX_ENTRIES
+    "${benchmark_target}\t${INPUT_FILE}\t${_exe_path}\t${_bc_path}\t${_augmented_spec_path}"
+  )
+  if (WLLVM_RUN_EXTRACT_BC)
+    add_custom_command(TARGET ${benchmark_target}
+      POST_BUILD
+      COMMAND ${WLLVM_EXTRACT_BC_TOOL} "$<TARGET_FILE:${benchmark_target}>" -o "$<TARGET_FILE:${benchmark_target}>.bc"
+      COMMENT "Running ${WLLVM_EXTRACT_BC_TOOL} on ${benchmark_target}"
+      ${ADD_CUSTOM_COMMAND_USES_TERMINAL_ARG}
+    )
+    # Make sure the output file gets removed when the `clean` target is invoked
+    set_property(DIRECTORY
+      APPEND
+      PROPERTY ADDITIONAL_MAKE_CLEAN_FILES "$<TARGET_FILE:${benchmark_target}>.bc"
+    )
+  endif()
+
+  if (EMIT_AUGMENTED_BENCHMARK_SPECIFICATION_FILES)
+    # Generated by `svcb_add_augmented_spec_command()`
+    set(_bc_genex "")
+    if (WLLVM_RUN_EXTRACT_BC)
+      set(_bc_genex "$<TARGET_FILE:${benchmark_target}>.bc")
+    endif()
+    list(APPEND _svcb_augmented_spec_entries
+      "${benchmark_target}\t${INPUT_FILE}\t$<TARGET_FILE:${benchmark_target}>\t${_bc_genex}\t${_augmented_spec_path}"
+    )
+    set(_svcb_augmented_spec_entries "${_svcb_augmented_spec_entries}" PARENT_SCOPE)
+  endif()
+endfunction()
+
+# Add a single command (and the custom target `build-augmented-spec-${NAME}`)
+# that generates the augmented benchmark specification files for all the
+# entries in `_svcb_augmented_spec_entries` (see
+# `svcb_add_benchmark_target_actions()`) and then clears it. Using a single
+# command per benchmark specification file (or suite) rather than one per target
+# keeps the build graph small and avoids starting a Python interpreter and
+# loading the same benchmark specification file for every target.
+# `MANIFEST_FILE` is where the entries are written to at generate time (so that
+# generator expressions in them are evaluated).
+function(svcb_add_augmented_spec_command NAME MANIFEST_FILE)
+  if ("${_svcb_augmented_spec_entries}" STREQUAL "")
+    return()
+  endif()
+  set(_manifest_contents "")
+  set(_output_files "")
+  set(_spec_files "")
+  foreach (entry ${_svcb_augmented_spec_entries})
+    set(_manifest_contents "${_manifest_contents}${entry}\n")
+    string(REPLACE "\t" ";" _fields "${entry}")
+    list(GET _fields 1 _spec_file)
+    list(GET _fields 4 _output_file)
+    list(APPEND _spec_files "${_spec_file}")
+    list(APPEND _output_files "${_output_file}")
+  endforeach()
+  list(REMOVE_DUPLICATES _spec_files)
+  file(GENERATE OUTPUT "${MANIFEST_FILE}" CONTENT "${_manifest_contents}")
+  add_custom_command(OUTPUT ${_output_files}
+    COMMAND "${PYTHON_EXECUTABLE}" "${SVCB_DIR}/tools/svcb-emit-cmake-augmented-spec.py"
+      "--manifest" "${MANIFEST_FILE}"
+      "--format" "${AUGMENTED_BENCHMARK_SPECIFICATION_FILE_FORMAT}"
+      "--cache-dir" "${SVCB_CACHE_DIR}"
+      "--log-level" "warning"
+    DEPENDS
+      "${MANIFEST_FILE}"
+      ${_spec_files}
+      "${SVCB_DIR}/tools/svcb-emit-cmake-augmented-spec.py"
+      ${SVCOMP_ADDITIONAL_GEN_CMAKE_INC_DEPS}
+    COMMENT "Generating augmented benchmark specification files for ${NAME}"
+  )
+  add_custom_target("build-augmented-spec-${NAME}"
+    DEPENDS ${_output_files})
+  add_dependencies(build-augmented-spec-files "build-augmented-spec-${NAME}")
+  set_property(GLOBAL APPEND PROPERTY
+    SVCB_AUGMENTED_BENCHMARK_SPECIFICATION_FILES
+    ${_output_files}
+  )
+  set(_svcb_augmented_spec_entries "" PARENT_SCOPE)
+endfunction()
+
+macro(add_benchmark BENCHMARK_DIR)
+  set(INPUT_FILE ${CMAKE_CURRENT_SOURCE_DIR}/${BENCHMARK_DIR}/spec.yml)
+  set(OUTPUT_FILE ${CMAKE_CURRENT_BINARY_DIR}/${BENCHMARK_DIR}_targets.cmake)
+  # Only re-generate the file if necessary so that re-configure is as fast as possible
+  svcb_targets_file_is_stale(_should_force_regen "${OUTPUT_FILE}" "${INPUT_FILE}")
+  if (${_should_force_regen})
     message(STATUS "Generating \"${OUTPUT_FILE}\"")
     get_filename_component(OUTPUT_DIR "${OUTPUT_FILE}" DIRECTORY)
     file(MAKE_DIRECTORY ${OUTPUT_DIR})
@@ -76,6 +272,7 @@ macro(add_benchmark BENCHMARK_DIR)
                               ${INPUT_FILE}
                               --architecture ${SVCOMP_ARCHITECTURE}
                               --output ${OUTPUT_FILE}
+                              --cache-dir "${SVCB_CACHE_DIR}"
                               --coverage
                               ${_handler_args}
                       RESULT_VARIABLE RESULT_CODE
@@ -85,6 +282,7 @@ macro(add_benchmark BENCHMARK_DIR)
                               ${INPUT_FILE}
                               --architecture ${SVCOMP_ARCHITECTURE}
                               --output ${OUTPUT_FILE}
+                              --cache-dir "${SVCB_CACHE_DIR}"
                               ${_handler_args}
                       RESULT_VARIABLE RESULT_CODE
                      )
@@ -92,7 +290,7 @@ macro(add_benchmark BENCHMARK_DIR)
     if (NOT ${RESULT_CODE} EQUAL 0)
       # Remove the generated output file because it is broken and if we don't
       # the next time configure runs it will succeed.
-      file(REMOVE "${OUTPUT_FILE}")
+      file(REMOVE "${OUTPUT_FILE}" "${OUTPUT_FILE}.manifest")
       message(FATAL_ERROR "Failed to process benchmark ${BENCHMARK_DIR}. With error ${RESULT_CODE}")
     endif()
     unset(_handler_args)
@@ -101,50 +299,15 @@ macro(add_benchmark BENCHMARK_DIR)
   include(${OUTPUT_FILE})
 
   # Iterate over the declared targets and perform any necessary action
+  set(_svcb_augmented_spec_entries "")
   foreach (benchmark_target ${_benchmark_targets})
-    if (WLLVM_RUN_EXTRACT_BC)
-      add_custom_command(TARGET ${benchmark_target}
-        POST_BUILD
-        COMMAND ${WLLVM_EXTRACT_BC_TOOL} "$<TARGET_FILE:${benchmark_target}>" -o "$<TARGET_FILE:${benchmark_target}>.bc"
-        COMMENT "Running ${WLLVM_EXTRACT_BC_TOOL} on ${benchmark_target}"
-        ${ADD_CUSTOM_COMMAND_USES_TERMINAL_ARG}
-      )
-      # Make sure the output file gets removed when the `clean` target is invoked
-      set_property(DIRECTORY
-        APPEND
-        PROPERTY ADDITIONAL_MAKE_CLEAN_FILES "$<TARGET_FILE:${benchmark_target}>.bc"
-      )
-    endif()
-
-    if (EMIT_AUGMENTED_BENCHMARK_SPECIFICATION_FILES)
-      if (WLLVM_RUN_EXTRACT_BC)
-        set(_extract_bc_arg "--llvm-bc-path" "$<TARGET_FILE:${benchmark_target}>.bc")
-      endif()
-      set(OUTPUT_SPEC_FILE "${CMAKE_CURRENT_BINARY_DIR}/${benchmark_target}.yml")
-      # FIXME: It's dumb that I can't do `OUTPUT $<TARGET_FILE:${benchmark_target}.yml"
-      add_custom_command(OUTPUT "${OUTPUT_SPEC_FILE}"
-        COMMAND "${PYTHON_EXECUTABLE}" "${SVCB_DIR}/tools/svcb-emit-cmake-augmented-spec.py"
-          "${INPUT_FILE}"
-          "${benchmark_target}"
-          "-o" "${OUTPUT_SPEC_FILE}"
-          "--exe-path" "$<TARGET_FILE:${benchmark_target}>"
-          ${_extract_bc_arg}
-        MAIN_DEPENDENCY "${INPUT_FILE}"
-        DEPENDS
-          "${SVCB_DIR}/tools/svcb-emit-cmake-augmented-spec.py"
-          ${SVCOMP_ADDITIONAL_GEN_CMAKE_INC_DEPS}
-        COMMENT "Generating augmented benchmark specification file for ${benchmark_target}"
-      )
-      add_custom_target("build-augmented-spec-${benchmark_target}"
-        DEPENDS "${OUTPUT_SPEC_FILE}")
-      add_dependencies(build-augmented-spec-files "build-augmented-spec-${benchmark_target}")
-      set_property(GLOBAL APPEND PROPERTY
-        SVCB_AUGMENTED_BENCHMARK_SPECIFICATION_FILES
-        "${OUTPUT_SPEC_FILE}"
-      )
-    endif()
+    svcb_add_benchmark_target_actions(${benchmark_target} "${INPUT_FILE}")
   endforeach()
-  unset(_extract_bc_arg)
+  file(RELATIVE_PATH _augmented_spec_name "${CMAKE_SOURCE_DIR}" "${CMAKE_CURRENT_SOURCE_DIR}/${BENCHMARK_DIR}")
+  string(MAKE_C_IDENTIFIER "${_augmented_spec_name}" _augmented_spec_name)
+  svcb_add_augmented_spec_command("${_augmented_spec_name}"
+    "${CMAKE_CURRENT_BINARY_DIR}/${BENCHMARK_DIR}_augmented_specs.txt")
+  unset(_augmented_spec_name)
 
   if ("${CMAKE_VERSION}" VERSION_LESS "3.0")
     message(FATAL_ERROR "Need CMake >= 3.0 to support CMAKE_CONFIGURE_DEPENDS property on directories")
@@ -157,3 +320,161 @@ macro(add_benchmark BENCHMARK_DIR)
   endforeach()
   unset(_should_force_regen)
 endmacro()
+
+# Declare the benchmarks in each of the given directories (relative to
+# `CMAKE_CURRENT_SOURCE_DIR`). This is equivalent to calling `add_benchmark()`
+# on each directory. However if `SVCB_SUITE_TARGET_FILES` is enabled the
+# targets are declared by a single target include file for the whole suite
+# that evaluates the checks shared by the benchmarks (e.g. dependencies and
+# language standards) once and declares targets with the same checks inside
+# a single guard. This avoids CMake having to parse an include file for every
+# benchmark.
+#
+# The optional `NAME <name>` argument names the files generated for the suite
+# (`svcb_suite_<name>_targets.cmake` and `svcb_suite_<name>_augmented_specs.txt`)
+# and its `build-augmented-spec-<dir>_suite_<name>` target so that a directory
+# can declare more than one suite. If it is not given the name is derived from
+# the list of benchmark directories.
+#
+# add_benchmark_suite([NAME <name>] <benchmark_dir>...)
+macro(add_benchmark_suite)
+  cmake_parse_arguments(_suite "" "NAME" "" ${ARGN})
+  if (NOT SVCB_SUITE_TARGET_FILES)
+    foreach (_benchmark_dir ${_suite_UNPARSED_ARGUMENTS})
+      add_benchmark(${_benchmark_dir})
+    endforeach()
+  else()
+    if ("${_suite_NAME}" STREQUAL "")
+      string(MD5 _suite_NAME "${_suite_UNPARSED_ARGUMENTS}")
+      string(SUBSTRING "${_suite_NAME}" 0 12 _suite_NAME)
+    else()
+      string(MAKE_C_IDENTIFIER "${_suite_NAME}" _suite_NAME)
+    endif()
+    set(_suite_input_files "")
+    foreach (_benchmark_dir ${_suite_UNPARSED_ARGUMENTS})
+      list(APPEND _suite_input_files "${CMAKE_CURRENT_SOURCE_DIR}/${_benchmark_dir}/spec.yml")
+    endforeach()
+    set(_suite_output_file "${CMAKE_CURRENT_BINARY_DIR}/svcb_suite_${_suite_NAME}_targets.cmake")
+    svcb_targets_file_is_stale(_should_force_regen "${_suite_output_file}" ${_suite_input_files})
+    if (${_should_force_regen})
+      message(STATUS "Generating \"${_suite_output_file}\"")
+      file(MAKE_DIRECTORY "${CMAKE_CURRENT_BINARY_DIR}")
+      set(_handler_args "")
+      list(LENGTH SVCOMP_DEPENDENCY_HANDLERS SVCOMP_DEPENDENCY_HANDLERS_LENGTH)
+      if ("${SVCOMP_DEPENDENCY_HANDLERS_LENGTH}" GREATER 0)
+        set(_handler_args "--load-dependency-handlers" ${SVCOMP_DEPENDENCY_HANDLERS})
+      endif()
+      set(_coverage_arg "")
+      if (BUILD_WITH_PROFILING)
+        set(_coverage_arg "--coverage")
+      endif()
+      execute_process(COMMAND ${PYTHON_EXECUTABLE} "${SVCB_DIR}/tools/svcb-emit-cmake-decls.py"
+                              --suite ${_suite_input_files}
+                              --architecture ${SVCOMP_ARCHITECTURE}
+                              --output "${_suite_output_file}"
+                              --cache-dir "${SVCB_CACHE_DIR}"
+                              ${_coverage_arg}
+                              ${_handler_args}
+                      RESULT_VARIABLE RESULT_CODE
+                     )
+      if (NOT ${RESULT_CODE} EQUAL 0)
+        file(REMOVE "${_suite_output_file}" "${_suite_output_file}.manifest")
+        message(FATAL_ERROR "Failed to process benchmark suite in ${CMAKE_CURRENT_SOURCE_DIR}. With error ${RESULT_CODE}")
+      endif()
+      unset(_handler_args)
+      unset(_coverage_arg)
+    endif()
+    include("${_suite_output_file}")
+
+    # `_benchmark_spec_files` holds the benchmark specification file
+    # of each target in `_benchmark_targets`.
+    set(_svcb_augmented_spec_entries "")
+    list(LENGTH _benchmark_targets _suite_target_count)
+    if (${_suite_target_count} GREATER 0)
+      math(EXPR _suite_last_index "${_suite_target_count} - 1")
+      foreach (_suite_index RANGE ${_suite_last_index})
+        list(GET _benchmark_targets ${_suite_index} _suite_target)
+        list(GET _benchmark_spec_files ${_suite_index} _suite_spec_file)
+        svcb_add_benchmark_target_actions(${_suite_target} "${_suite_spec_file}")
+      endforeach()
+    endif()
+    file(RELATIVE_PATH _augmented_spec_name "${CMAKE_SOURCE_DIR}" "${CMAKE_CURRENT_SOURCE_DIR}")
+    string(MAKE_C_IDENTIFIER "${_augmented_spec_name}_suite_${_suite_NAME}" _augmented_spec_name)
+    svcb_add_augmented_spec_command("${_augmented_spec_name}"
+      "${CMAKE_CURRENT_BINARY_DIR}/svcb_suite_${_suite_NAME}_augmented_specs.txt")
+
+    # Let CMake know that configuration depends on the benchmark specification files
+    foreach (dep ${_suite_input_files} ${SVCOMP_ADDITIONAL_GEN_CMAKE_INC_DEPS})
+      set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS "${dep}")
+    endforeach()
+    unset(_suite_input_files)
+    unset(_suite_output_file)
+    unset(_suite_target_count)
+    unset(_suite_last_index)
+    unset(_suite_target)
+    unset(_suite_spec_file)
+    unset(_augmented_spec_name)
+    unset(_should_force_regen)
+  endif()
+  unset(_suite_NAME)
+  unset(_suite_UNPARSED_ARGUMENTS)
+endmacro()
+
+# Write the benchmark index (see `svcb-build-index.py`) to `OUTPUT_FILE`
+# for all the targets declared by `add_benchmark()`. This must be called after
+# all calls to `add_benchmark()`. The index is only rebuilt if the set of
+# targets or any of the benchmark specification files changed.
+function(svcb_generate_benchmark_index OUTPUT_FILE)
+  get_property(_entries GLOBAL PROPERTY SVCB_BENCHMARK_INDEX_ENTRIES)
+  list(SORT _entries)
+  set(_manifest_file "${CMAKE_BINARY_DIR}/svcb_benchmark_index_manifest.txt")
+  set(_manifest_contents "")
+  set(_spec_files "")
+  foreach (entry ${_entries})
+    set(_manifest_contents "${_manifest_contents}${entry}\n")
+    string(REPLACE "\t" ";" _fields "${entry}")
+    list(GET _fields 1 _spec_file)
+    list(APPEND _spec_files "${_spec_file}")
+  endforeach()
+  list(REMOVE_DUPLICATES _spec_files)
+
+  # Only write the manifest if it changed so its timestamp can be used to
+  # decide if the index is stale.
+  set(_old_manifest_contents "")
+  if (EXISTS "${_manifest_file}")
+    file(READ "${_manifest_file}" _old_manifest_contents)
+  endif()
+  if (NOT "${_old_manifest_contents}" STREQUAL "${_manifest_contents}")
+    file(WRITE "${_manifest_file}" "${_manifest_contents}")
+  endif()
+
+  set(_is_stale FALSE)
+  foreach (dep "${_manifest_file}"
+               "${SVCB_DIR}/svcb/filters.py"
+               "${SVCB_DIR}/svcb/index.py"
+               "${SVCB_DIR}/svcb/scan.py"
+               "${SVCB_DIR}/tools/svcb-build-index.py"
+               ${SVCOMP_ADDITIONAL_GEN_CMAKE_INC_DEPS}
+               ${_spec_files})
+    if ("${dep}" IS_NEWER_THAN "${OUTPUT_FILE}")
+      set(_is_stale TRUE)
+      break()
+    endif()
+  endforeach()
+  if (NOT ${_is_stale})
+    return()
+  endif()
+
+  message(STATUS "Generating benchmark index \"${OUTPUT_FILE}\"")
+  execute_process(COMMAND ${PYTHON_EXECUTABLE} "${SVCB_DIR}/tools/svcb-build-index.py"
+                          --manifest "${_manifest_file}"
+                          --output "${OUTPUT_FILE}"
+                          --cache-dir "${SVCB_CACHE_DIR}"
+                          --log-level warning
+                  RESULT_VARIABLE RESULT_CODE
+                 )
+  if (NOT ${RESULT_CODE} EQUAL 0)
+    file(REMOVE "${OUTPUT_FILE}")
+    message(FATAL_ERROR "Failed to generate benchmark index. With error ${RESULT_CODE}")
+  endif()
+endfunction()
@@ -47,7 +47,21 @@ extern "C" {
    }
    ```
    */ \
-  T __VERIFIER_nondet_ ## NAME();
+  T __VERIFIER_nondet_ ## NAME(); \
+  /*! \brief Set ``count`` values of type T to non-deterministic values
+   \details
+   This function is not part of SV-COMP. It is equivalent to calling
+   ``__VERIFIER_nondet_ ## NAME()`` for each element of ``values`` but
+   allows an implementation to make the whole array non-deterministic at
+   once (e.g. with a single call to ``klee_make_symbolic()``). \n\n
+   ```
+   void __VERIFIER_nondet_fill_ ## NAME(T* values, size_t count) {
+      for (size_t i = 0; i < count; ++i)
+        values[i] = __VERIFIER_nondet_ ## NAME();
+   }
+   ```
+   */ \
+  void __VERIFIER_nondet_fill_ ## NAME(T* values, size_t count);
 
 #define SVCOMP_NONDET_DECL(NAME) SVCOMP_NONDET_DECL_D(NAME,NAME)
 
@@ -158,6 +172,15 @@ void __VERIFIER_atomic_begin();
  */
 void __VERIFIER_atomic_end();
 
+/*! \brief Return the number of calls to __VERIFIER_atomic_begin()
+ *
+ * This function is not part of SV-COMP. It is intended for diagnostics
+ * (e.g. checking that a benchmark enters the atomic sections it is
+ * expected to). It is only defined by the runtimes when they are built
+ * with the SVCB_ATOMIC_BEGIN_COUNTER CMake option.
+ */
+uint64_t __VERIFIER_atomic_begin_count();
+
 #ifdef __cplusplus
 }
 #endif
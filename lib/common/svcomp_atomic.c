@@ -0,0 +1,65 @@
+/* Copyright (c) 2016, Daniel Liew
+   This file is covered by the license in LICENSE-SVCB.txt
+*/
+
+// Implementation of the SV-COMP atomic sections shared by the KLEE and
+// fuzzing runtimes.
+//
+// Atomic sections are implemented with a recursive lock shared by all
+// threads. The owner is identified by the address of a thread local
+// variable so no threading library is needed. Under KLEE (and in single
+// threaded benchmarks) the lock is never contended so taking it is a
+// single compare-and-swap (which KLEE lowers to a load and a store) and
+// no external functions are called.
+//
+// When `SVCOMP_ATOMIC_BEGIN_COUNTER` is defined the number of calls to
+// `__VERIFIER_atomic_begin()` is counted and can be read with
+// `__VERIFIER_atomic_begin_count()`.
+#include "svcomp/svcomp.h"
+#include <sched.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+static _Thread_local char svcomp_atomic_thread_marker;
+static void* svcomp_atomic_owner = NULL;
+// Only accessed by the owner of the lock
+static unsigned svcomp_atomic_depth = 0;
+#ifdef SVCOMP_ATOMIC_BEGIN_COUNTER
+// Only modified by the owner of the lock but can be read by any thread
+static uint64_t svcomp_atomic_begin_counter = 0;
+#endif
+
+void __VERIFIER_atomic_begin() {
+  void* self = &svcomp_atomic_thread_marker;
+  if (__atomic_load_n(&svcomp_atomic_owner, __ATOMIC_RELAXED) != self) {
+    void* expected = NULL;
+    while (!__atomic_compare_exchange_n(&svcomp_atomic_owner, &expected, self,
+                                        /*weak=*/ 0, __ATOMIC_ACQUIRE, __ATOMIC_RELAXED)) {
+      expected = NULL;
+      sched_yield();
+    }
+  }
+  ++svcomp_atomic_depth;
+#ifdef SVCOMP_ATOMIC_BEGIN_COUNTER
+  __atomic_store_n(&svcomp_atomic_begin_counter,
+                   __atomic_load_n(&svcomp_atomic_begin_counter, __ATOMIC_RELAXED) + 1,
+                   __ATOMIC_RELAXED);
+#endif
+}
+
+void __VERIFIER_atomic_end() {
+  void* self = &svcomp_atomic_thread_marker;
+  if (__atomic_load_n(&svcomp_atomic_owner, __ATOMIC_RELAXED) != self) {
+    fprintf(stderr, "__VERIFIER_atomic_end() called outside of an atomic section\n");
+    abort();
+  }
+  if (--svcomp_atomic_depth == 0)
+    __atomic_store_n(&svcomp_atomic_owner, NULL, __ATOMIC_RELEASE);
+}
+
+#ifdef SVCOMP_ATOMIC_BEGIN_COUNTER
+uint64_t __VERIFIER_atomic_begin_count() {
+  return __atomic_load_n(&svcomp_atomic_begin_counter, __ATOMIC_RELAXED);
+}
+#endif
@@ -0,0 +1,29 @@
+/* Copyright (c) 2016, Daniel Liew
+   This file is covered by the license in LICENSE-SVCB.txt
+*/
+
+// The subset of KLEE's runtime functions that are implemented by
+// the fuzzing runtime (`lib/svcomp_fuzz_runtime/runtime.c`). Symbolic
+// values are read from the fuzzer's input.
+#ifndef SVCOMP_FUZZ_KLEE_H
+#define SVCOMP_FUZZ_KLEE_H
+#include <stddef.h>
+#include <stdint.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+void klee_make_symbolic(void *addr, size_t nbytes, const char *name);
+int klee_range(int begin, int end, const char *name);
+int klee_int(const char *name);
+void klee_assume(uintptr_t condition);
+void klee_silent_exit(int status) __attribute__((noreturn));
+void klee_abort(void) __attribute__((noreturn));
+void klee_report_error(const char *file, int line, const char *message, const char *suffix) __attribute__((noreturn));
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,409 @@
+/* Copyright (c) 2016, Daniel Liew
+   This file is covered by the license in LICENSE-SVCB.txt
+*/
+
+// This provides an implementation of the SV-COMP runtime functions (and
+// the commonly used KLEE runtime functions) that reads non-deterministic
+// values from an input buffer so that benchmarks can be fuzzed natively.
+//
+// Values are read from the input in the order they are requested. Once
+// the input is exhausted values are zero.
+//
+// By default the input is read from the file named by the
+// `SVCOMP_FUZZ_INPUT` environment variable (or standard input if it is
+// not set) the first time a value is requested (e.g. for AFL).
+//
+// If the `SVCOMP_FUZZ_SAMPLE_SEED` environment variable is set no input
+// is read. Instead values are drawn from a pseudo-random generator seeded
+// with it. Floating point values (`__VERIFIER_nondet_double()` and
+// `__VERIFIER_nondet_float()`) are drawn from a mix of special values
+// (signed zeros, subnormals, infinities, NaNs with payloads and the
+// extremes of each format), values near powers of two and random bit
+// patterns. Integers (and other values) are drawn from a mix of integer
+// boundary values, small values and random bit patterns. The type of a
+// `klee_make_symbolic()` object is not known so it is sampled as an
+// integer unless `SVCOMP_FUZZ_SAMPLE_FP_BY_SIZE` is set, in which case
+// objects the size of a double or float are sampled as one.
+//
+// If `SVCOMP_FUZZ_LIBFUZZER` is defined this file instead provides
+// `LLVMFuzzerTestOneInput()` which runs the benchmark's `main()`
+// (renamed to `svcb_fuzz_main()`) on each input in the same process.
+#include "svcomp/svcomp.h"
+#include "klee/klee.h"
+#include <float.h>
+#include <math.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+static const uint8_t* svcomp_fuzz_data = NULL;
+static size_t svcomp_fuzz_size = 0;
+static size_t svcomp_fuzz_offset = 0;
+
+#ifdef SVCOMP_FUZZ_LIBFUZZER
+#include <setjmp.h>
+
+int svcb_fuzz_main(int argc, char** argv);
+
+static jmp_buf svcomp_fuzz_exit_point;
+
+int LLVMFuzzerTestOneInput(const uint8_t* data, size_t size) {
+  static char programName[] = "benchmark";
+  char* argv[] = { programName, NULL };
+  svcomp_fuzz_data = data;
+  svcomp_fuzz_size = size;
+  svcomp_fuzz_offset = 0;
+  if (setjmp(svcomp_fuzz_exit_point) == 0) {
+    svcb_fuzz_main(1, argv);
+  }
+  return 0;
+}
+
+// Stop running the current input without reporting an error
+// (e.g. because an assumption does not hold).
+static void svcomp_fuzz_stop(void) {
+  longjmp(svcomp_fuzz_exit_point, 1);
+}
+
+static void svcomp_fuzz_ensure_input(void) {}
+
+static int svcomp_fuzz_sampling = 0;
+static int svcomp_fuzz_sample_fp_by_size = 0;
+static uint64_t svcomp_fuzz_random(void) { return 0; }
+#else
+static void svcomp_fuzz_stop(void) {
+  exit(0);
+}
+
+static int svcomp_fuzz_sampling = 0;
+static int svcomp_fuzz_sample_fp_by_size = 0;
+static uint64_t svcomp_fuzz_random_state = 0;
+
+// splitmix64
+static uint64_t svcomp_fuzz_random(void) {
+  uint64_t z = (svcomp_fuzz_random_state += UINT64_C(0x9E3779B97F4A7C15));
+  z = (z ^ (z >> 30)) * UINT64_C(0xBF58476D1CE4E5B9);
+  z = (z ^ (z >> 27)) * UINT64_C(0x94D049BB133111EB);
+  return z ^ (z >> 31);
+}
+
+static void svcomp_fuzz_ensure_input(void) {
+  static int loaded = 0;
+  if (loaded)
+    return;
+  loaded = 1;
+  const char* seed = getenv("SVCOMP_FUZZ_SAMPLE_SEED");
+  if (seed) {
+    svcomp_fuzz_sampling = 1;
+    svcomp_fuzz_random_state = strtoull(seed, NULL, 0);
+    svcomp_fuzz_sample_fp_by_size = getenv("SVCOMP_FUZZ_SAMPLE_FP_BY_SIZE") != NULL;
+    return;
+  }
+  FILE* f = stdin;
+  const char* path = getenv("SVCOMP_FUZZ_INPUT");
+  if (path) {
+    f = fopen(path, "rb");
+    if (!f) {
+      fprintf(stderr, "Failed to open fuzzing input \"%s\"\n", path);
+      abort();
+    }
+  }
+  size_t capacity = 4096;
+  uint8_t* data = malloc(capacity);
+  size_t size = 0;
+  size_t count = 0;
+  while (data && (count = fread(data + size, 1, capacity - size, f)) > 0) {
+    size += count;
+    if (size == capacity) {
+      capacity *= 2;
+      data = realloc(data, capacity);
+    }
+  }
+  if (!data) {
+    fprintf(stderr, "Failed to allocate fuzzing input\n");
+    abort();
+  }
+  if (f != stdin)
+    fclose(f);
+  svcomp_fuzz_data = data;
+  svcomp_fuzz_size = size;
+}
+#endif
+
+static void svcomp_fuzz_sample_bytes(void* value, size_t size) {
+  uint8_t* bytes = (uint8_t*) value;
+  while (size > 0) {
+    uint64_t bits = svcomp_fuzz_random();
+    size_t count = size < sizeof(bits) ? size : sizeof(bits);
+    memcpy(bytes, &bits, count);
+    bytes += count;
+    size -= count;
+  }
+}
+
+// Sample an integer of `size` bytes. Objects that are not the size of
+// an integer type (e.g. arrays and structures) are random bit patterns.
+static void svcomp_fuzz_sample_integer(void* value, size_t size) {
+  if (size != 1 && size != 2 && size != 4 && size != 8) {
+    svcomp_fuzz_sample_bytes(value, size);
+    return;
+  }
+  uint64_t r = svcomp_fuzz_random();
+  uint64_t signBit = UINT64_C(1) << ((size * 8) - 1);
+  uint64_t bits;
+  switch (r % 4) {
+    case 0:
+      // Boundary values. Truncating to `size` bytes gives the value for
+      // that width.
+      switch ((r >> 8) % 8) {
+        case 0: bits = 0; break;
+        case 1: bits = 1; break;
+        case 2: bits = UINT64_MAX; break; // -1 and the unsigned maximum
+        case 3: bits = signBit; break; // Signed minimum
+        case 4: bits = signBit - 1; break; // Signed maximum
+        case 5: bits = signBit + 1; break;
+        case 6: bits = signBit - 2; break;
+        default: bits = 2; break;
+      }
+      break;
+    case 1:
+      // Small values in [-128, 127]
+      bits = (uint64_t) ((int64_t) ((r >> 8) % 256) - 128);
+      break;
+    default:
+      bits = svcomp_fuzz_random();
+      break;
+  }
+  switch (size) {
+    case 1: { uint8_t v = (uint8_t) bits; memcpy(value, &v, size); break; }
+    case 2: { uint16_t v = (uint16_t) bits; memcpy(value, &v, size); break; }
+    case 4: { uint32_t v = (uint32_t) bits; memcpy(value, &v, size); break; }
+    default: memcpy(value, &bits, size); break;
+  }
+}
+
+// Special values of each floating point type as bit patterns
+static const uint64_t svcomp_fuzz_double_specials[] = {
+  UINT64_C(0x0000000000000000), // +0
+  UINT64_C(0x8000000000000000), // -0
+  UINT64_C(0x0000000000000001), // Smallest subnormal
+  UINT64_C(0x8000000000000001),
+  UINT64_C(0x000FFFFFFFFFFFFF), // Largest subnormal
+  UINT64_C(0x800FFFFFFFFFFFFF),
+  UINT64_C(0x0010000000000000), // Smallest normal
+  UINT64_C(0x8010000000000000),
+  UINT64_C(0x7FEFFFFFFFFFFFFF), // Largest normal
+  UINT64_C(0xFFEFFFFFFFFFFFFF),
+  UINT64_C(0x7FF0000000000000), // +inf
+  UINT64_C(0xFFF0000000000000), // -inf
+  UINT64_C(0x7FF8000000000000), // Quiet NaN
+  UINT64_C(0xFFF8000000000000),
+  UINT64_C(0x7FF8000000000001), // Quiet NaN with payload
+  UINT64_C(0x7FF0000000000001), // Signalling NaN
+  UINT64_C(0x7FF7FFFFFFFFFFFF), // Signalling NaN with largest payload
+  UINT64_C(0x3FF0000000000000), // 1
+  UINT64_C(0xBFF0000000000000), // -1
+  UINT64_C(0x3CB0000000000000), // DBL_EPSILON
+};
+static const uint32_t svcomp_fuzz_float_specials[] = {
+  UINT32_C(0x00000000), // +0
+  UINT32_C(0x80000000), // -0
+  UINT32_C(0x00000001), // Smallest subnormal
+  UINT32_C(0x80000001),
+  UINT32_C(0x007FFFFF), // Largest subnormal
+  UINT32_C(0x807FFFFF),
+  UINT32_C(0x00800000), // Smallest normal
+  UINT32_C(0x80800000),
+  UINT32_C(0x7F7FFFFF), // Largest normal
+  UINT32_C(0xFF7FFFFF),
+  UINT32_C(0x7F800000), // +inf
+  UINT32_C(0xFF800000), // -inf
+  UINT32_C(0x7FC00000), // Quiet NaN
+  UINT32_C(0xFFC00000),
+  UINT32_C(0x7FC00001), // Quiet NaN with payload
+  UINT32_C(0x7F800001), // Signalling NaN
+  UINT32_C(0x7FBFFFFF), // Signalling NaN with largest payload
+  UINT32_C(0x3F800000), // 1
+  UINT32_C(0xBF800000), // -1
+  UINT32_C(0x34000000), // FLT_EPSILON
+};
+
+#define SVCOMP_FUZZ_ARRAY_SIZE(X) (sizeof(X) / sizeof(X[0]))
+
+static double svcomp_fuzz_sample_double(void) {
+  uint64_t r = svcomp_fuzz_random();
+  uint64_t bits = svcomp_fuzz_random();
+  double value;
+  switch (r % 4) {
+    case 0:
+      bits = svcomp_fuzz_double_specials[(r >> 8) % SVCOMP_FUZZ_ARRAY_SIZE(svcomp_fuzz_double_specials)];
+      break;
+    case 1: {
+      // A power of two (or the value either side of it). The exponent
+      // covers the normal range and the bottom of the subnormal range.
+      int exponent = (int) ((r >> 8) % (DBL_MAX_EXP - DBL_MIN_EXP + DBL_MANT_DIG + 1)) + DBL_MIN_EXP - DBL_MANT_DIG;
+      value = ldexp(1.0, exponent);
+      if ((r >> 20) & 1)
+        value = nextafter(value, ((r >> 21) & 1) ? INFINITY : 0.0);
+      if ((r >> 22) & 1)
+        value = -value;
+      return value;
+    }
+    default:
+      // Random bit pattern
+      break;
+  }
+  memcpy(&value, &bits, sizeof(value));
+  return value;
+}
+
+static float svcomp_fuzz_sample_float(void) {
+  uint64_t r = svcomp_fuzz_random();
+  uint32_t bits = (uint32_t) svcomp_fuzz_random();
+  float value;
+  switch (r % 4) {
+    case 0:
+      bits = svcomp_fuzz_float_specials[(r >> 8) % SVCOMP_FUZZ_ARRAY_SIZE(svcomp_fuzz_float_specials)];
+      break;
+    case 1: {
+      int exponent = (int) ((r >> 8) % (FLT_MAX_EXP - FLT_MIN_EXP + FLT_MANT_DIG + 1)) + FLT_MIN_EXP - FLT_MANT_DIG;
+      value = ldexpf(1.0f, exponent);
+      if ((r >> 20) & 1)
+        value = nextafterf(value, ((r >> 21) & 1) ? INFINITY : 0.0f);
+      if ((r >> 22) & 1)
+        value = -value;
+      return value;
+    }
+    default:
+      break;
+  }
+  memcpy(&value, &bits, sizeof(value));
+  return value;
+}
+
+static void svcomp_fuzz_read(void* value, size_t size) {
+  svcomp_fuzz_ensure_input();
+  if (svcomp_fuzz_sampling) {
+    svcomp_fuzz_sample_integer(value, size);
+    return;
+  }
+  size_t available = svcomp_fuzz_size - svcomp_fuzz_offset;
+  size_t count = size < available ? size : available;
+  memcpy(value, svcomp_fuzz_data + svcomp_fuzz_offset, count);
+  memset(((uint8_t*) value) + count, 0, size - count);
+  svcomp_fuzz_offset += count;
+}
+
+#define SVCOMP_NONDET_DEFN_D(NAME,T) \
+T __VERIFIER_nondet_ ## NAME() { \
+  T value; \
+  svcomp_fuzz_read(&value, sizeof(T)); \
+  return value; \
+} \
+void __VERIFIER_nondet_fill_ ## NAME(T* values, size_t count) { \
+  if (count > (SIZE_MAX / sizeof(T))) \
+    abort(); \
+  svcomp_fuzz_read(values, sizeof(T) * count); \
+}
+
+// Floating point values are sampled by type (rather than by size)
+#define SVCOMP_NONDET_FP_DEFN(NAME) \
+NAME __VERIFIER_nondet_ ## NAME() { \
+  NAME value; \
+  svcomp_fuzz_ensure_input(); \
+  if (svcomp_fuzz_sampling) \
+    return svcomp_fuzz_sample_ ## NAME(); \
+  svcomp_fuzz_read(&value, sizeof(NAME)); \
+  return value; \
+} \
+void __VERIFIER_nondet_fill_ ## NAME(NAME* values, size_t count) { \
+  svcomp_fuzz_ensure_input(); \
+  if (svcomp_fuzz_sampling) { \
+    for (size_t i = 0; i < count; ++i) \
+      values[i] = svcomp_fuzz_sample_ ## NAME(); \
+    return; \
+  } \
+  if (count > (SIZE_MAX / sizeof(NAME))) \
+    abort(); \
+  svcomp_fuzz_read(values, sizeof(NAME) * count); \
+}
+
+#define SVCOMP_NONDET_DEFN(NAME) SVCOMP_NONDET_DEFN_D(NAME, NAME)
+
+SVCOMP_NONDET_DEFN_D(bool,_Bool)
+SVCOMP_NONDET_DEFN(char)
+SVCOMP_NONDET_FP_DEFN(double)
+SVCOMP_NONDET_FP_DEFN(float)
+SVCOMP_NONDET_DEFN(int)
+SVCOMP_NONDET_DEFN(long)
+SVCOMP_NONDET_DEFN_D(pointer,void*)
+SVCOMP_NONDET_DEFN_D(pchar,char*)
+SVCOMP_NONDET_DEFN(short)
+SVCOMP_NONDET_DEFN(size_t)
+SVCOMP_NONDET_DEFN_D(u32, uint32_t)
+SVCOMP_NONDET_DEFN_D(uchar,unsigned char)
+SVCOMP_NONDET_DEFN_D(uint, unsigned int)
+SVCOMP_NONDET_DEFN_D(ulong, unsigned long)
+SVCOMP_NONDET_DEFN(unsigned)
+SVCOMP_NONDET_DEFN_D(ushort, unsigned short)
+
+void __VERIFIER_assume(int expression) {
+  if (!expression)
+    svcomp_fuzz_stop();
+}
+
+void klee_make_symbolic(void *addr, size_t nbytes, const char *name) {
+  (void) name;
+  svcomp_fuzz_ensure_input();
+  if (svcomp_fuzz_sampling && svcomp_fuzz_sample_fp_by_size) {
+    // The type is not known so guess from the size
+    if (nbytes == sizeof(double)) {
+      double d = svcomp_fuzz_sample_double();
+      memcpy(addr, &d, sizeof(d));
+      return;
+    }
+    if (nbytes == sizeof(float)) {
+      float f = svcomp_fuzz_sample_float();
+      memcpy(addr, &f, sizeof(f));
+      return;
+    }
+  }
+  svcomp_fuzz_read(addr, nbytes);
+}
+
+int klee_range(int begin, int end, const char *name) {
+  (void) name;
+  unsigned value;
+  svcomp_fuzz_read(&value, sizeof(value));
+  if (end <= begin)
+    return begin;
+  return (int) (begin + (value % ((unsigned) end - (unsigned) begin)));
+}
+
+int klee_int(const char *name) {
+  (void) name;
+  int value;
+  svcomp_fuzz_read(&value, sizeof(value));
+  return value;
+}
+
+void klee_assume(uintptr_t condition) {
+  if (!condition)
+    svcomp_fuzz_stop();
+}
+
+void klee_silent_exit(int status) {
+  (void) status;
+  svcomp_fuzz_stop();
+  abort(); // Unreachable
+}
+
+void klee_abort(void) {
+  abort();
+}
+
+void klee_report_error(const char *file, int line, const char *message, const char *suffix) {
+  fprintf(stderr, "%s:%d: %s (%s)\n", file, line, message, suffix);
+  abort();
+}
@@ -11,18 +11,76 @@
 #include <stdint.h>
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
+
+// Symbolic objects are named "symbolic_<N>_<TYPE>" where <N> counts
+// the objects of type <TYPE> made so far. Giving every object a unique
+// name avoids KLEE having to make names unique itself (which gets slower
+// with every object that has the same name). Names are built without
+// `sprintf()` because benchmarks can make many symbolic objects in loops.
+
+// Decimal representation of 0 to 99 (two characters each) so that
+// counters can be converted two digits at a time.
+static const char svcomp_digit_pairs[] =
+  "00010203040506070809"
+  "10111213141516171819"
+  "20212223242526272829"
+  "30313233343536373839"
+  "40414243444546474849"
+  "50515253545556575859"
+  "60616263646566676869"
+  "70717273747576777879"
+  "80818283848586878889"
+  "90919293949596979899";
+static_assert(sizeof(svcomp_digit_pairs) == (200 + 1), "Wrong size for digit pair table");
+
+#define SVCOMP_NAME_PREFIX "symbolic_"
+// Number of decimal digits in UINT64_MAX
+#define SVCOMP_MAX_DIGITS 20
+#define SVCOMP_NAME_SIZE(SUFFIX) (sizeof(SVCOMP_NAME_PREFIX) - 1 + SVCOMP_MAX_DIGITS + sizeof(SUFFIX))
+
+// Write the name for object number `counter` with `suffix` (of
+// `suffixSize` bytes including the terminating NUL) so that it ends at
+// `end` and return a pointer to the start of the name.
+static const char* svcomp_make_name(char* end, const char* suffix, size_t suffixSize, uint64_t counter) {
+  char* p = end - suffixSize;
+  memcpy(p, suffix, suffixSize);
+  while (counter >= 100) {
+    const char* digits = svcomp_digit_pairs + ((counter % 100) * 2);
+    counter /= 100;
+    p -= 2;
+    p[0] = digits[0];
+    p[1] = digits[1];
+  }
+  if (counter >= 10) {
+    p -= 2;
+    p[0] = svcomp_digit_pairs[counter * 2];
+    p[1] = svcomp_digit_pairs[(counter * 2) + 1];
+  } else {
+    *(--p) = (char) ('0' + counter);
+  }
+  p -= sizeof(SVCOMP_NAME_PREFIX) - 1;
+  memcpy(p, SVCOMP_NAME_PREFIX, sizeof(SVCOMP_NAME_PREFIX) - 1);
+  return p;
+}
 
 #define SVCOMP_NONDET_DEFN_D(NAME,T) \
+static uint64_t svcomp_nondet_counter_ ## NAME = 0; \
 T __VERIFIER_nondet_ ## NAME() { \
-  static uint64_t counter = 0; \
-  char name[] = "symbolic_xxxxxxxxxxxxxxxxxxxx_TTTTTTTT"; \
-  const char typeName[] = #NAME ;\
-  static_assert(sizeof(typeName) <= (8 + 1), "Not enough space allocated for name"); \
-  char* offsetStr = name + 9; \
-  sprintf(offsetStr, "%" PRIu64 "_%s", counter, typeName); \
+  char name[SVCOMP_NAME_SIZE("_" #NAME)]; \
   T initialValue; \
-  klee_make_symbolic(&initialValue, sizeof(T), name); \
+  klee_make_symbolic(&initialValue, sizeof(T), \
+    svcomp_make_name(name + sizeof(name), "_" #NAME, sizeof("_" #NAME), svcomp_nondet_counter_ ## NAME++)); \
   return initialValue; \
+} \
+void __VERIFIER_nondet_fill_ ## NAME(T* values, size_t count) { \
+  char name[SVCOMP_NAME_SIZE("_" #NAME "_array")]; \
+  if (count == 0) \
+    return; \
+  if (count > (SIZE_MAX / sizeof(T))) \
+    abort(); \
+  klee_make_symbolic(values, sizeof(T) * count, \
+    svcomp_make_name(name + sizeof(name), "_" #NAME "_array", sizeof("_" #NAME "_array"), svcomp_nondet_counter_ ## NAME++)); \
 }
 
 #define SVCOMP_NONDET_DEFN(NAME) SVCOMP_NONDET_DEFN_D(NAME, NAME)
@@ -50,13 +108,3 @@ SVCOMP_NONDET_DEFN_D(ushort, unsigned short)
 void __VERIFIER_assume(int expression) {
   klee_assume(expression);
 }
-
-// FIXME: We can probably do better than this
-void __VERIFIER_atomic_begin() {
-  fprintf(stderr, "__VERIFIER_atomic_begin() is a no-op\n");
-}
-
-// FIXME: We can probably do better than this
-void __VERIFIER_atomic_end() {
-  fprintf(stderr, "__VERIFIER_atomic_end() is a no-op\n");
-}
@@ -4,6 +4,7 @@ import copy
 import pprint
 import os
 import re
+from . import util
 
 # This declares dictionary of verification tasks
 # that is merged into to the loaded verification
@@ -20,68 +21,194 @@ DefaultVerificationTaskStatuses = {
   "no_overshift": { "correct": True},
 }
 
-class Benchmark(object):
+# Fields that are implicitly added to a benchmark
+# if they are not specified.
+_ImplicitFields = ('description', 'defines', 'dependencies', 'misc', 'runtime_environment')
+
+# Fields of a variant benchmark that differ from the global
+# benchmark specification.
+_VariantFields = _ImplicitFields + ('name', 'categories', 'verification_tasks')
+
+class Benchmark(util.SlotsPickleMixin):
+  """
+    A single benchmark (i.e. a benchmark specification without variants).
+
+    A ``Benchmark`` is either created from a complete dictionary (``data``)
+    or lazily by ``getBenchmarks()``. Lazy benchmarks only keep a reference
+    to the benchmark specification they come from and compute each field
+    (e.g. merged ``defines``) the first time it is accessed. The result is
+    memoised in ``_data``. ``getInternalRepr()`` computes all remaining
+    fields.
+  """
+  __slots__ = (
+    '_data',
+    # The following are only used by lazy benchmarks and are
+    # released once all fields have been computed.
+    '_spec',
+    '_variantName',
+    '_variantProperties',
+    '_addImplicitVerificationTasks',
+  )
+
   def __init__(self, data):
     assert isinstance(data, dict)
     # Just store the dict internally
     self._data = data
+    self._spec = None
+    self._variantName = None
+    self._variantProperties = None
+    self._addImplicitVerificationTasks = None
     assert 'variants' not in self._data
     # TODO: Add all implicit empty fields
-    if 'description' not in self._data:
-      self._data['description'] = ""
-    if 'defines' not in self._data:
-      self._data['defines'] = {}
-    if 'dependencies' not in self._data:
-      self._data['dependencies'] = {}
-    if 'misc' not in self._data:
-      self._data['misc'] = {}
-    if 'runtime_environment' not in self._data:
-      self._data['runtime_environment'] = {
-        'command_line_arguments': [],
-        'environment_variables': {}
-      }
+    for key in _ImplicitFields:
+      if key not in self._data:
+        self._data[key] = _makeImplicitField(key)
+
+  @classmethod
+  def _createLazy(ClassObj, benchSpec, variantName, variantProperties, addImplicitVerificationTasks):
+    newObj = ClassObj.__new__(ClassObj)
+    newObj._data = {}
+    newObj._spec = benchSpec
+    newObj._variantName = variantName
+    newObj._variantProperties = variantProperties
+    newObj._addImplicitVerificationTasks = addImplicitVerificationTasks
+    return newObj
 
   def __str__(self):
-    return pprint.pformat(self._data)
+    return pprint.pformat(self.getInternalRepr())
+
+  @property
+  def isLazy(self):
+    """
+      True iff some fields have not been computed yet.
+    """
+    return self._spec is not None
 
   def getInternalRepr(self):
+    if self._spec is not None:
+      # Compute all remaining fields
+      keys = set(self._spec.keys())
+      keys.discard('variants')
+      keys.update(_VariantFields if self._variantProperties is not None else _ImplicitFields)
+      keys.add('verification_tasks')
+      for key in keys:
+        self._getField(key)
+      self._spec = None
+      self._variantProperties = None
     return self._data
 
+  def _getField(self, key):
+    try:
+      return self._data[key]
+    except KeyError:
+      if self._spec is None:
+        raise
+    value = self._computeField(key)
+    self._data[key] = value
+    return value
+
+  def _computeField(self, key):
+    benchSpec = self._spec
+    variantProperties = self._variantProperties
+    if key == 'verification_tasks':
+      if variantProperties is not None and 'verification_tasks' in variantProperties:
+        assert 'verification_tasks' not in benchSpec
+        verificationTasks = variantProperties['verification_tasks']
+      else:
+        verificationTasks = benchSpec['verification_tasks']
+      return _layerVerificationTasks(verificationTasks, self._addImplicitVerificationTasks)
+    if key == 'misc':
+      # Clients (e.g. when emitting augmented spec files) add to `misc`
+      # so don't share it.
+      return dict(benchSpec['misc']) if 'misc' in benchSpec else {}
+
+    if variantProperties is None:
+      # Single benchmark
+      if key in benchSpec:
+        return benchSpec[key]
+      return _makeImplicitField(key)
+
+    # Variant benchmark
+    if key == 'name':
+      return "{}_{}".format(benchSpec['name'], self._variantName)
+    if key == 'defines' or key == 'dependencies':
+      # Union of the global and variant dictionaries
+      if key not in variantProperties:
+        return benchSpec[key] if key in benchSpec else {}
+      merged = dict(benchSpec.get(key, {}))
+      merged.update(variantProperties[key])
+      return merged
+    if key == 'categories':
+      # Global categories are sorted by `getBenchmarks()`
+      globalCategories = benchSpec.get('categories', [])
+      if 'categories' not in variantProperties:
+        return globalCategories
+      # Make categories unique and sorted.
+      benchmarkCategories = set(globalCategories)
+      benchmarkCategories.update(variantProperties['categories'])
+      return sorted(benchmarkCategories)
+    if key == 'description':
+      benchmarkDescription = benchSpec.get('description', "")
+      if 'description' in variantProperties:
+        # Make the description for the benchmark be the concatenation
+        # of the global and variant description.
+        benchmarkDescription += "\n{}".format(variantProperties['description'])
+      return benchmarkDescription
+    if key == 'runtime_environment':
+      runtimeEnvironment = _makeImplicitField('runtime_environment')
+      for properties in (benchSpec, variantProperties):
+        if 'runtime_environment' not in properties:
+          continue
+        # Append variant command line args on to global
+        assert isinstance(properties['runtime_environment']['command_line_arguments'], list)
+        runtimeEnvironment['command_line_arguments'].extend(
+          properties['runtime_environment']['command_line_arguments'])
+        # union the environment variables
+        assert isinstance(properties['runtime_environment']['environment_variables'], dict)
+        for envKey in properties['runtime_environment']['environment_variables']:
+          assert envKey not in runtimeEnvironment['environment_variables']
+        runtimeEnvironment['environment_variables'].update(
+          properties['runtime_environment']['environment_variables'])
+      return runtimeEnvironment
+    if key == 'variants':
+      raise KeyError(key)
+    return benchSpec[key]
+
   @property
   def name(self):
-    return self._data['name']
+    return self._getField('name')
 
   @property
   def sources(self):
-    return self._data['sources']
+    return self._getField('sources')
 
   @property
   def architectures(self):
-    return self._data['architectures']
+    return self._getField('architectures')
 
   @property
   def defines(self):
-    return self._data['defines']
+    return self._getField('defines')
 
   @property
   def language(self):
-    return self._data['language']
+    return self._getField('language')
 
   @property
   def dependencies(self):
-    return self._data['dependencies']
+    return self._getField('dependencies')
 
   @property
   def categories(self):
-    return set(self._data['categories'])
+    return set(self._getField('categories'))
 
   @property
   def description(self):
-    return self._data['description']
+    return self._getField('description')
 
   @property
   def verificationTasks(self):
-    return self._data['verification_tasks']
+    return self._getField('verification_tasks')
 
   def isLanguageC(self):
     return not self.isLanguageCXX()
@@ -91,13 +218,42 @@ class Benchmark(object):
 
   @property
   def misc(self):
-    return self._data['misc']
+    return self._getField('misc')
 
   @property
   def runtimeEnvironment(self):
-    return self._data['runtime_environment']
+    return self._getField('runtime_environment')
+
+def _makeImplicitField(key):
+  if key == 'description':
+    return ""
+  if key == 'runtime_environment':
+    return {
+      'command_line_arguments': [],
+      'environment_variables': {}
+    }
+  if key in _ImplicitFields:
+    return {}
+  raise KeyError(key)
+
+def getBenchmarks(benchSpec, addImplicitVerificationTasks=True, lazy=False):
+  """
+    Returns a list of ``Benchmark`` objects for the benchmarks
+    declared by ``benchSpec`` (one per variant).
 
-def getBenchmarks(benchSpec, addImplicitVerificationTasks=True):
+    To avoid copying the benchmark specification for every variant
+    each benchmark only contains new values for the fields that differ
+    from ``benchSpec`` (e.g. the merged ``defines``). All other values are
+    shared with ``benchSpec`` and the other benchmarks so clients must
+    not modify them in place. The exception is ``misc`` which is private
+    to each benchmark.
+
+    If ``lazy`` is True the fields of each benchmark are only computed
+    when they are first accessed so clients that only look at a few
+    fields (e.g. ``name`` and ``categories``) don't pay for the rest.
+    ``benchSpec`` must not be modified whilst any of the returned
+    benchmarks are lazy.
+  """
   # FIXME: addImplicitVerificationTasks should always be set to True by clients.
   # It should only ever be set to False in unittests where we want to test
   # without the implicit tasks being added.
@@ -105,114 +261,58 @@ def getBenchmarks(benchSpec, addImplicitVerificationTasks=True):
   # We should probably remove this option entirely and fix up the tests to
   # prevent abuse.
   assert isinstance(benchSpec, dict)
-  benchmarkSpecs = []
   benchmarkObjs = []
   if 'variants' in benchSpec:
-    # Create a ``Benchmark`` object from each variant
-    globalDefines = {}
-    if 'defines' in benchSpec:
-      globalDefines.update(benchSpec['defines'])
-    globalDependencies = {}
-    if 'dependencies' in benchSpec:
-      globalDependencies.update(benchSpec['dependencies'])
-    globalCategories = []
     if 'categories' in benchSpec:
-      globalCategories = benchSpec['categories']
       # Ensure the categories are always sorted so clients can rely on this behaviour
-      globalCategories.sort()
-    globalDescription = ""
-    if 'description' in benchSpec:
-      globalDescription += benchSpec['description']
-    globalName = benchSpec['name']
-    globalCmdLineArgs = []
-    globalEnvironmentVars = {}
-    if 'runtime_environment' in benchSpec:
-      assert isinstance(benchSpec['runtime_environment']['command_line_arguments'], list)
-      globalCmdLineArgs.extend(benchSpec['runtime_environment']['command_line_arguments'])
-      assert isinstance(benchSpec['runtime_environment']['environment_variables'], dict)
-      globalEnvironmentVars.update(benchSpec['runtime_environment']['environment_variables'])
+      benchSpec['categories'].sort()
+    # Create a ``Benchmark`` object from each variant
     for variantName, variantProperties in benchSpec['variants'].items():
-      # Make a copy to work with
-      benchSpecCopy = copy.deepcopy(benchSpec)
-      # Modify the copied benchmark specification so it looks
-      # like a single benchmark
-      benchmarkDefines = dict(globalDefines)
-      benchmarkDependencies = dict(globalDependencies)
-      benchmarkCategories = list(globalCategories)
-      benchmarkDescription = str(globalDescription)
-      benchmarkCmdLineArgs = list(globalCmdLineArgs)
-      benchmarkEnvironmentVars = dict(globalEnvironmentVars)
-      if 'defines' in variantProperties:
-        benchmarkDefines.update(variantProperties['defines'])
-      if 'dependencies' in variantProperties:
-        benchmarkDependencies.update(variantProperties['dependencies'])
-      if 'categories' in variantProperties:
-        benchmarkCategories.extend(variantProperties['categories'])
-        # Make categories unique and sorted.
-        benchmarkCategories = set(benchmarkCategories)
-        benchmarkCategories = list(benchmarkCategories)
-        benchmarkCategories.sort()
-      if 'description' in variantProperties:
-        # Make the description for the benchmark be the concatenation
-        # of the global and variant description.
-        benchmarkDescription += "\n{}".format(variantProperties['description'])
-      if 'runtime_environment' in variantProperties:
-        # Append variant command line args on to global
-        benchmarkCmdLineArgs.extend(variantProperties['runtime_environment']['command_line_arguments'])
-        # union the environment variables
-        for variantEnvKey in variantProperties['runtime_environment']['environment_variables']:
-          assert variantEnvKey not in globalEnvironmentVars
-        benchmarkEnvironmentVars.update(variantProperties['runtime_environment']['environment_variables'])
-      benchmarkName = "{}_{}".format(globalName, variantName)
-      del benchSpecCopy['variants']
-      benchSpecCopy['defines'] = benchmarkDefines
-      benchSpecCopy['name'] = benchmarkName
-      benchSpecCopy['dependencies'] = benchmarkDependencies
-      benchSpecCopy['categories'] = benchmarkCategories
-      benchSpecCopy['description'] = benchmarkDescription
-      benchSpecCopy['runtime_environment'] = {
-        'command_line_arguments': benchmarkCmdLineArgs,
-        'environment_variables': benchmarkEnvironmentVars
-      }
-
-      if 'verification_tasks' in variantProperties:
-        assert 'verification_tasks' not in benchSpecCopy
-        benchSpecCopy['verification_tasks'] = copy.deepcopy(variantProperties['verification_tasks'])
-      else:
-        assert 'verification_tasks' in benchSpecCopy
-
-      benchmarkSpecs.append(benchSpecCopy)
+      benchmarkObjs.append(Benchmark._createLazy(
+        benchSpec,
+        variantName,
+        variantProperties,
+        addImplicitVerificationTasks))
   else:
     # Single benchmark
-    # Make a copy to work with
-    benchSpecCopy = copy.deepcopy(benchSpec)
-    benchmarkSpecs.append(benchSpecCopy)
-
-  # Make the benchmark objects from the specs
-  for benchSpecCopy in benchmarkSpecs:
-    # Add implicit verification tasks
-    if addImplicitVerificationTasks:
-      verificationTasks = benchSpecCopy['verification_tasks']
-      for (task, properties) in DefaultVerificationTaskStatuses.items():
-        if task not in verificationTasks:
-          verificationTasks[task] = copy.deepcopy(properties)
-
-    # Add implicit `exhaustive_counter_examples` field.
-    for (task, properties) in benchSpecCopy['verification_tasks'].items():
-      if properties['correct'] is False and not 'exhaustive_counter_examples' in properties:
-        if 'counter_examples' in properties:
-          properties['exhaustive_counter_examples'] = True
-        else:
-          properties['exhaustive_counter_examples'] = False
-
-    # Finally build the object
-    benchmarkObjs.append(Benchmark(benchSpecCopy))
+    benchmarkObjs.append(Benchmark._createLazy(
+      benchSpec,
+      None,
+      None,
+      addImplicitVerificationTasks))
 
+  if not lazy:
+    for benchmarkObj in benchmarkObjs:
+      benchmarkObj.getInternalRepr()
   return benchmarkObjs
 
+def _layerVerificationTasks(verificationTasks, addImplicitVerificationTasks):
+  """
+    Returns a new verification task dictionary with the implicit
+    tasks and fields added. The properties of tasks that don't need
+    modifying are shared with ``verificationTasks``.
+  """
+  newVerificationTasks = {}
+  # Add implicit `exhaustive_counter_examples` field.
+  for (task, properties) in verificationTasks.items():
+    if properties['correct'] is False and not 'exhaustive_counter_examples' in properties:
+      properties = dict(properties)
+      if 'counter_examples' in properties:
+        properties['exhaustive_counter_examples'] = True
+      else:
+        properties['exhaustive_counter_examples'] = False
+    newVerificationTasks[task] = properties
+
+  # Add implicit verification tasks
+  if addImplicitVerificationTasks:
+    for (task, properties) in DefaultVerificationTaskStatuses.items():
+      if task not in newVerificationTasks:
+        newVerificationTasks[task] = dict(properties)
+  return newVerificationTasks
+
 def do_runtime_env_substitutions(runtime_environment, spec_file_path):
   assert isinstance(runtime_environment, dict)
-  assert isinstance(spec_file_path, str)
+  assert isinstance(spec_file_path, util.stringTypes)
   assert os.path.isabs(spec_file_path)
   copyRunEnv = runtime_environment.copy()
   copyRunEnv['command_line_arguments'] = []
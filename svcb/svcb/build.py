@@ -27,7 +27,20 @@ class GenerateCMakeDeclsException(Exception):
 # Instances of this object are just a convenient way
 # of passing around information needed to emit a
 # CMake decl that doesn't require clients to change
-# their function signatures if we add/remove information
+# their function signatures if we add/remove information.
+#
+# Handlers are called once for every target with its real name in
+# ``targetName``. The code they return is emitted in two places:
+#
+# - The guard code (first element) is emitted in a guard block that is
+#   shared by every target whose guard code is textually identical, so it
+#   should only depend on the dependency and only set or append to
+#   ``enableTargetCMakeVariable`` and ``disabledTargetReasonsCMakeVariable``.
+#   These name guard block variables, not ``ENABLE_TARGET_<NAME>``.
+# - The in guard code (second element) is emitted for the target only.
+#
+# Guard code that refers to ``targetName`` or ``benchmarkObj`` is still
+# correct but the target gets a guard block of its own.
 class CMakeDependencyAndTargetInfo(object):
   def __init__(self,
       dependencyInfo,
@@ -80,6 +93,7 @@ class CMakeDependencyDispatcher(object):
     newObj.register('openmp', generate_openmp_dependency_code)
     newObj.register('klee_runtime', generate_klee_runtime_dependency_code)
     newObj.register('svcomp_klee_runtime', generate_svcomp_klee_runtime_dependency_code)
+    newObj.register('svcomp_fuzz_runtime', generate_svcomp_fuzz_runtime_dependency_code)
     newObj.register('cmath', generate_cmath_dependency_code)
     newObj.register('gsl', generate_gsl_dependency_code)
 
@@ -159,128 +173,271 @@ class CMakeDependencyDispatcher(object):
     return result
 
 cmakeIndent = "  "
+
+# Pre-formatted CMake snippets used by `generateCMakeDecls()`.
+# The `_benchmark_targets` CMake variable holds the list of targets. This exists
+# so the build system can easily iterate through the declared targets.
+# `_svcb_warn_disabled_target()` is called for every target that will not be
+# built rather than repeating its body for every target.
+_declsHeader = """# Autogenerated. DO NOT MODIFY!
+set(_benchmark_targets "")
+function(_svcb_warn_disabled_target TARGET_NAME)
+{indent}set(msgConcat "")
+{indent}foreach (msg ${{ARGN}})
+{indent}{indent}set(msgConcat "${{msgConcat}}\\n  ${{msg}}")
+{indent}endforeach()
+{indent}message(WARNING "Not building target ${{TARGET_NAME}} due to ${{msgConcat}}")
+endfunction()
+""".format(indent=cmakeIndent)
+_unsupportedArchitectureTemplate = """### BEGIN target {0} ####
+message(STATUS "Compiler cannot build target {0}. Architecture not supported by compiler")
+"""
+
+# Targets with the same language and dependencies share a single guard block
+# that is evaluated once. Dependency handlers emit their guard code in terms
+# of these variables and the result is copied into per block variables.
+_guardEnableCMakeVariable = "_SVCB_GUARD_ENABLED"
+_guardDisabledReasonsCMakeVariable = "_SVCB_GUARD_DISABLED_REASONS"
+_guardBlockBegin = "set({} TRUE)\nset({} \"\")\n".format(
+  _guardEnableCMakeVariable,
+  _guardDisabledReasonsCMakeVariable)
+_languageGuardTemplate = """
+if (NOT HAS_STD_{lang_ver})
+{indent}set({enableTargetCMakeVariable} FALSE)
+{indent}list(APPEND {disabledTargetReasonsCMakeVariable} "Compiler does not support language standard {lang_ver}")
+endif()
+  \n"""
+_guardBlockEndTemplate = \
+  "set(_SVCB_GUARD_{{index}}_ENABLED ${{{{{enable}}}}})\n" \
+  "set(_SVCB_GUARD_{{index}}_DISABLED_REASONS \"${{{{{reasons}}}}}\")\n".format(
+    enable=_guardEnableCMakeVariable,
+    reasons=_guardDisabledReasonsCMakeVariable)
+
+# Everything emitted for a single target that can be built. `{deps}` is the
+# code emitted by the dependency handlers inside the guard.
+_targetBodyTemplate = """{indent}add_executable({target}
+{sources}{defines_decl}{indent}target_compile_options({target} PRIVATE ${{SVCOMP_STD_{lang_ver}}})
+{deps}list(APPEND _benchmark_targets {target})
+""".replace('{indent}', cmakeIndent)
+_targetTemplate = """### BEGIN target {target} ####
+set({enable} ${{_SVCB_GUARD_{index}_ENABLED}})
+set(DISABLED_TARGET_REASONS "${{_SVCB_GUARD_{index}_DISABLED_REASONS}}")
+if ({enable})
+""" + _targetBodyTemplate + """else()
+{indent}_svcb_warn_disabled_target({target} ${{DISABLED_TARGET_REASONS}})
+endif()
+""".replace('{indent}', cmakeIndent)
+_definesBeginTemplate = cmakeIndent + "target_compile_definitions({} PRIVATE\n"
+
+# Snippets used by `generateSuiteCMakeDecls()`. Targets that share a guard
+# block are declared inside a single `if()`. The `_benchmark_spec_files` CMake
+# variable holds the benchmark specification file of each target in
+# `_benchmark_targets`.
+_suiteHeader = _declsHeader + "set(_benchmark_spec_files \"\")\n"
+# Like `_targetTemplate` each target's `ENABLE_TARGET_<NAME>` variable is set.
+_suiteEnableTemplate = cmakeIndent + "set({enable} ${{_SVCB_GUARD_{index}_ENABLED}})\n"
+_suiteTargetTemplate = (_suiteEnableTemplate + _targetBodyTemplate +
+  "list(APPEND _benchmark_spec_files \"{spec_file}\")\n")
+_suiteGroupBeginTemplate = "if (_SVCB_GUARD_{}_ENABLED)\n"
+_suiteWarnDisabledTemplate = (_suiteEnableTemplate +
+  cmakeIndent + "_svcb_warn_disabled_target({target} ${{_SVCB_GUARD_{index}_DISABLED_REASONS}})\n")
+
+class _GuardBlockTable(object):
+  """
+    Emits the guard blocks deciding if targets can be built. The dependency
+    handlers are invoked for every target and targets whose guard code is
+    identical (e.g. because they have the same language and dependencies)
+    share a guard block. Guard blocks are appended to ``parts`` (a list of
+    strings) the first time they are used.
+  """
+  def __init__(self, dependencyDispatcher, parts):
+    self.dependencyDispatcher = dependencyDispatcher
+    self.parts = parts
+    # Maps the contents of a guard block to its index
+    self._indices = {}
+
+  def get(self, benchmarkObj, targetName):
+    """
+      Returns a tuple (guardBlockIndex, inGuardCode) for the target
+      ``targetName`` of ``benchmarkObj``.
+    """
+    dependencyHandlingCMakeDecls = generate_dependency_decls(benchmarkObj,
+      targetName,
+      _guardEnableCMakeVariable,
+      _guardDisabledReasonsCMakeVariable,
+      self.dependencyDispatcher)
+
+    # Emit code that can disable building the benchmark if a dependency
+    # is not available or the language version is not supported.
+    guardBlock = ''.join([ guardDecl for (guardDecl, _) in dependencyHandlingCMakeDecls ])
+    guardBlock += _languageGuardTemplate.format(
+      lang_ver=benchmarkObj.language.replace('+','X').upper(),
+      enableTargetCMakeVariable=_guardEnableCMakeVariable,
+      disabledTargetReasonsCMakeVariable=_guardDisabledReasonsCMakeVariable,
+      indent=cmakeIndent)
+    guardBlockIndex = self._indices.get(guardBlock, None)
+    if guardBlockIndex is None:
+      guardBlockIndex = len(self._indices)
+      self._indices[guardBlock] = guardBlockIndex
+      self.parts.append(_guardBlockBegin)
+      self.parts.append(guardBlock)
+      self.parts.append(_guardBlockEndTemplate.format(index=guardBlockIndex))
+
+    # Dependency code that adds necessary dependencies to the target
+    inGuardCode = ''.join([ depAddDecl for (_, depAddDecl) in dependencyHandlingCMakeDecls ])
+    return (guardBlockIndex, inGuardCode)
+
 def generateCMakeDecls(benchmarkObjs, sourceRootDir, supportedArchitecture, dependencyDispatcher, coverage):
   """
     Returns a string containing CMake declarations
     that declare the benchmarks in the list ``benchmarkObjs``.
   """
-  assert isinstance(benchmarkObjs, list)
-  assert os.path.exists(sourceRootDir)
-  assert os.path.isdir(sourceRootDir)
+  _checkDispatcher(dependencyDispatcher)
+  parts = [ _declsHeader ]
+  guardBlocks = _GuardBlockTable(dependencyDispatcher, parts)
+  for (targetName, fields) in _iterTargets(benchmarkObjs, sourceRootDir, supportedArchitecture, guardBlocks, coverage):
+    if fields is None:
+      parts.append(_unsupportedArchitectureTemplate.format(targetName))
+    else:
+      parts.append(_targetTemplate.format(**fields))
+  return ''.join(parts)
 
+def generateSuiteCMakeDecls(suite, supportedArchitecture, dependencyDispatcher, coverage):
+  """
+    Returns a string containing CMake declarations that declare the
+    benchmarks of a suite of benchmark specification files in a single
+    file. ``suite`` is a list of tuples ``(specFile, benchmarkObjs)``
+    where ``benchmarkObjs`` is the list of benchmarks declared by
+    ``specFile``. Source files are relative to the directory containing
+    ``specFile``.
+
+    Guard blocks are hoisted to the start of the file and the targets
+    sharing each guard block are declared inside a single ``if()``.
+  """
+  assert isinstance(suite, list)
+  _checkDispatcher(dependencyDispatcher)
+  guardParts = []
+  guardBlocks = _GuardBlockTable(dependencyDispatcher, guardParts)
+  unsupportedParts = []
+  # Maps guard block index to a tuple (targetParts, disabledParts)
+  groups = {}
+  for (specFile, benchmarkObjs) in suite:
+    sourceRootDir = os.path.dirname(specFile)
+    for (targetName, fields) in _iterTargets(benchmarkObjs, sourceRootDir, supportedArchitecture, guardBlocks, coverage):
+      if fields is None:
+        unsupportedParts.append(_unsupportedArchitectureTemplate.format(targetName))
+        continue
+      index = fields['index']
+      if index not in groups:
+        groups[index] = ([], [])
+      (targetParts, disabledParts) = groups[index]
+      targetParts.append(_suiteTargetTemplate.format(spec_file=specFile, **fields))
+      disabledParts.append(_suiteWarnDisabledTemplate.format(**fields))
+
+  parts = [ _suiteHeader ]
+  parts.extend(guardParts)
+  parts.extend(unsupportedParts)
+  for index in sorted(groups.keys()):
+    (targetParts, disabledParts) = groups[index]
+    parts.append(_suiteGroupBeginTemplate.format(index))
+    parts.extend(targetParts)
+    parts.append("else()\n")
+    parts.extend(disabledParts)
+    parts.append("endif()\n")
+  return ''.join(parts)
+
+def _checkDispatcher(dependencyDispatcher):
   if not isinstance(dependencyDispatcher, CMakeDependencyDispatcher):
     msg = "Provided `dependencyDispatcher` is not an instance of CMakeDependencyDispatcher"
     _logger.error(msg)
     raise GenerateCMakeDeclsException(msg)
 
-  declStr = "# Autogenerated. DO NOT MODIFY!\n"
-
-  # CMake Variable to hold list of targets. This exists so the build system
-  # can easily iterate through the declared targets.
-  declStr += "set(_benchmark_targets \"\")\n"
+def _iterTargets(benchmarkObjs, sourceRootDir, supportedArchitecture, guardBlocks, coverage):
+  """
+    Generator that yields a tuple ``(targetName, fields)`` for every target
+    of the benchmarks in the list ``benchmarkObjs``. ``fields`` is None if
+    the target's architecture is not supported. Otherwise it is a dictionary
+    used to format ``_targetTemplate`` and its variants.
+  """
+  assert isinstance(benchmarkObjs, list)
+  assert os.path.exists(sourceRootDir)
+  assert os.path.isdir(sourceRootDir)
 
   for b in benchmarkObjs:
-    assert isinstance(b.name, str)
     assert isinstance(b, benchmark.Benchmark)
+    name = b.name
+    assert isinstance(name, str)
 
-    benchmarkArchitectures = None
-    if isinstance(b.architectures, str):
-      assert b.architectures == 'any'
-      benchmarkArchitectures = {'any'}
-    else:
-      benchmarkArchitectures = b.architectures
+    benchmarkArchitectures = b.architectures
+    if isinstance(benchmarkArchitectures, str):
+      assert benchmarkArchitectures == 'any'
+      benchmarkArchitectures = ['any']
+
+    # Everything apart from the target name is the same for every architecture
+    # so is only computed when the first buildable target is found.
+    fields = None
+    definesDecl = None
 
     for arch in benchmarkArchitectures:
-      targetName = '{}.{}'.format(b.name, arch)
-      declStr += "### BEGIN target {targetName} ####\n".format(targetName=targetName)
+      targetName = '{}.{}'.format(name, arch)
       if arch != 'any' and arch != supportedArchitecture:
         # Architecture not supported
-        declStr += 'message(STATUS "Compiler cannot build target {}. Architecture not supported by compiler")\n'.format(targetName)
+        yield (targetName, None)
         continue
 
-      # Emit code that can be used by dependencies to prevent generaton of the target.
-      # This is useful if a library required is not available.
-      enableTargetCMakeVariable = "ENABLE_TARGET_{}".format(b.name.upper())
-      declStr += "set({} TRUE)\n".format(enableTargetCMakeVariable)
-      disabledTargetReasonsCMakeVariable = "DISABLED_TARGET_REASONS"
-      declStr += "set({} \"\")\n".format(disabledTargetReasonsCMakeVariable)
-
-      dependencyHandlingCMakeDecls = generate_dependency_decls(b, targetName, enableTargetCMakeVariable, disabledTargetReasonsCMakeVariable, dependencyDispatcher)
-
-      # Emit dependency code that may change guard on executable
-      for (guardDecl, _) in dependencyHandlingCMakeDecls:
-        declStr += guardDecl
-
-      # Emit code that can disable building the benchmark if the language
-      # version is not supported
-      lang_ver = b.language.replace('+','X').upper()
-      declStr += """
-if (NOT HAS_STD_{lang_ver})
-{indent}set({enableTargetCMakeVariable} FALSE)
-{indent}list(APPEND {disabledTargetReasonsCMakeVariable} "Compiler does not support language standard {lang_ver}")
-endif()
-  \n""".format(
-      lang_ver=lang_ver,
-      enableTargetCMakeVariable=enableTargetCMakeVariable,
-      disabledTargetReasonsCMakeVariable=disabledTargetReasonsCMakeVariable,
-      indent=cmakeIndent)
-
-      # Emit guard
-      declStr += "if ({})\n".format(enableTargetCMakeVariable)
-      # Emit ``add_executable()``
-      declStr += "{indent}add_executable({target_name}\n".format(indent=cmakeIndent, target_name=targetName)
-      # FIXME: Need to put in absolute path
-      for source in b.sources:
-        declStr += "{indent}{indent}{source_file}\n".format(indent=cmakeIndent, source_file=os.path.join(sourceRootDir, source))
-      # HACK: Emit svcomp_klee_runtime object files here if needed. We should use the `target_sources()` CMake
-      # command but only CMake >= 3.1 support this.
-      svcomp_klee_runtime_dependency = [ (name,info) for (name, info) in b.dependencies.items() if name == "svcomp_klee_runtime"]
-      assert(len(svcomp_klee_runtime_dependency) <= 1)
-      if len(svcomp_klee_runtime_dependency) == 1:
-        declStr += "{indent}{indent}$<TARGET_OBJECTS:svcomp_klee_runtime>\n".format(indent=cmakeIndent)
-      declStr += "{indent})\n".format(indent=cmakeIndent)
-
-      if len(b.defines) > 0:
-        declStr += "{indent}target_compile_definitions({target_name} PRIVATE\n".format(
-          indent=cmakeIndent,
-          target_name=targetName)
-        for (macroName,macroValue) in b.defines.items():
-          assert isinstance(macroName, str)
-          if macroValue != None:
-            declStr += "  {}={}\n".format(macroName, macroValue)
-          else:
-            declStr += "  {}\n".format(macroName)
-        declStr += ")\n"
-      # Emit compiler flags
-      declStr += "{indent}target_compile_options({target_name} PRIVATE ${{SVCOMP_STD_{lang_ver}}})\n".format(
-        indent = cmakeIndent,
-        target_name = targetName,
-        lang_ver = lang_ver
-      )
+      if fields is None:
+        definesDecl = _getDefinesDecl(b)
+        fields = {
+          'enable': "ENABLE_TARGET_{}".format(name.upper()),
+          'lang_ver': b.language.replace('+','X').upper(),
+          'sources': _getSourcesDecl(b, sourceRootDir),
+        }
+
+      (fields['index'], fields['deps']) = guardBlocks.get(b, targetName)
+      fields['target'] = targetName
+      if len(definesDecl) > 0:
+        fields['defines_decl'] = _definesBeginTemplate.format(targetName) + definesDecl
+      else:
+        fields['defines_decl'] = ''
       if coverage:
         # TODO: Potentially remove `coverage` option altogether. Keep for now as we
         # may need to alter the build in the future.
         pass
+      yield (targetName, fields)
 
-      # Emit dependency code that adds necessary dependencies to that target
-      for (_, depAddDecl) in dependencyHandlingCMakeDecls:
-        declStr += depAddDecl
-
-      # Add target to list of targets
-      declStr += "list(APPEND _benchmark_targets {targetName})".format(targetName=targetName)
-
-      # Close guard
-      declStr += """
-else()
-{indent}set(msgConcat "")
-{indent}foreach (msg ${{DISABLED_TARGET_REASONS}})
-{indent}{indent}set(msgConcat "${{msgConcat}}\\n  ${{msg}}")
-{indent}endforeach()
-{indent}message(WARNING "Not building target {target} due to ${{msgConcat}}")
-{indent}unset(msgConcat)
-endif()
-      \n""".format(indent=cmakeIndent, target=targetName)
-  return declStr
+def _getSourcesDecl(benchmarkObj, sourceRootDir):
+  """
+    Returns the arguments to ``add_executable()`` (and the closing
+    parenthesis) for the sources of ``benchmarkObj``.
+  """
+  lines = []
+  # FIXME: Need to put in absolute path
+  for source in benchmarkObj.sources:
+    lines.append("{indent}{indent}{source_file}\n".format(indent=cmakeIndent, source_file=os.path.join(sourceRootDir, source)))
+  # HACK: Emit svcomp_klee_runtime object files here if needed. We should use the `target_sources()` CMake
+  # command but only CMake >= 3.1 support this. The variable is empty when the fuzzing runtime is used.
+  if "svcomp_klee_runtime" in benchmarkObj.dependencies:
+    lines.append("{indent}{indent}${{SVCOMP_KLEE_RUNTIME_OBJECTS}}\n".format(indent=cmakeIndent))
+  lines.append("{indent})\n".format(indent=cmakeIndent))
+  return ''.join(lines)
+
+def _getDefinesDecl(benchmarkObj):
+  """
+    Returns the arguments to ``target_compile_definitions()`` (and the
+    closing parenthesis) for the macro definitions of ``benchmarkObj`` or
+    an empty string if it has none.
+  """
+  if len(benchmarkObj.defines) == 0:
+    return ''
+  lines = []
+  for (macroName,macroValue) in benchmarkObj.defines.items():
+    assert isinstance(macroName, str)
+    if macroValue != None:
+      lines.append("  {}={}\n".format(macroName, macroValue))
+    else:
+      lines.append("  {}\n".format(macroName))
+  lines.append(")\n")
+  return ''.join(lines)
 
 def generate_dependency_decls(benchmarkObj, targetName, enableTargetCMakeVariable, disabledTargetReasonsCMakeVariable, dependencyDispatcher):
   """
@@ -322,7 +479,15 @@ endif()
   addDepDecl = "{indent}target_link_libraries({targetName} PRIVATE ${{CMAKE_THREAD_LIBS_INIT}})\n".format(indent=cmakeIndent, targetName=targetName)
   return (guardDecl, addDepDecl)
 
-def generate_openmp_dependency_code(info, targetName, enableTargetCMakeVariable, disabledTargetReasonsCMakeVariable, benchmarkObj):
+def generate_openmp_dependency_code(depInfo):
+  # Unpack the needed information
+  assert isinstance(depInfo, CMakeDependencyAndTargetInfo)
+  info = depInfo.dependencyInfo
+  targetName = depInfo.targetName
+  enableTargetCMakeVariable = depInfo.enableTargetCMakeVariable
+  disabledTargetReasonsCMakeVariable = depInfo.disabledTargetReasonsCMakeVariable
+  benchmarkObj = depInfo.benchmarkObj
+
   guardDecl = """
 if (NOT OPENMP_FOUND)
 {indent}set({enableTargetCMakeVariable} FALSE)
@@ -353,16 +518,21 @@ def generate_klee_runtime_dependency_code(depInfo):
   disabledTargetReasonsCMakeVariable = depInfo.disabledTargetReasonsCMakeVariable
 
   guardDecl = """
-if (NOT KLEE_NATIVE_RUNTIME_FOUND)
+if (NOT KLEE_NATIVE_RUNTIME_FOUND AND NOT SVCB_FUZZ_RUNTIME)
 {indent}set({enableTargetCMakeVariable} FALSE)
 {indent}list(APPEND {disabledTargetReasonsCMakeVariable} "KLEE runtime not available")
 endif()
   \n""".format(enableTargetCMakeVariable=enableTargetCMakeVariable,
       disabledTargetReasonsCMakeVariable=disabledTargetReasonsCMakeVariable,
       indent=cmakeIndent)
-  addDepDecl = "{indent}target_include_directories({targetName} PRIVATE ${{KLEE_NATIVE_RUNTIME_INCLUDE_DIR}})\n".format(indent=cmakeIndent, targetName=targetName)
-  addDepDecl += "{indent}target_link_libraries({targetName} PRIVATE ${{KLEE_NATIVE_RUNTIME_LIB}})\n".format(indent=cmakeIndent, targetName=targetName)
-  return (guardDecl, addDepDecl)
+  (fuzzGuardDecl, fuzzAddDepDecl) = _getFuzzRuntimeDecls(depInfo)
+  addDepDecl = "{indent}if (SVCB_FUZZ_RUNTIME)\n".format(indent=cmakeIndent)
+  addDepDecl += _indentCMake(fuzzAddDepDecl)
+  addDepDecl += "{indent}else()\n".format(indent=cmakeIndent)
+  addDepDecl += "{indent}{indent}target_include_directories({targetName} PRIVATE ${{KLEE_NATIVE_RUNTIME_INCLUDE_DIR}})\n".format(indent=cmakeIndent, targetName=targetName)
+  addDepDecl += "{indent}{indent}target_link_libraries({targetName} PRIVATE ${{KLEE_NATIVE_RUNTIME_LIB}})\n".format(indent=cmakeIndent, targetName=targetName)
+  addDepDecl += "{indent}endif()\n".format(indent=cmakeIndent)
+  return (guardDecl + fuzzGuardDecl, addDepDecl)
 
 def generate_svcomp_klee_runtime_dependency_code(depInfo):
   # Unpack the needed information
@@ -373,19 +543,76 @@ def generate_svcomp_klee_runtime_dependency_code(depInfo):
   disabledTargetReasonsCMakeVariable = depInfo.disabledTargetReasonsCMakeVariable
 
   guardDecl = """
-if (NOT KLEE_NATIVE_RUNTIME_FOUND)
+if (NOT KLEE_NATIVE_RUNTIME_FOUND AND NOT SVCB_FUZZ_RUNTIME)
 {indent}set({enableTargetCMakeVariable} FALSE)
 {indent}list(APPEND {disabledTargetReasonsCMakeVariable} "KLEE runtime not available")
 endif()
   \n""".format(enableTargetCMakeVariable=enableTargetCMakeVariable,
       disabledTargetReasonsCMakeVariable=disabledTargetReasonsCMakeVariable,
       indent=cmakeIndent)
-  addDepDecl = "{indent}target_link_libraries({targetName} PRIVATE ${{KLEE_NATIVE_RUNTIME_LIB}})\n".format(indent=cmakeIndent, targetName=targetName)
+  (fuzzGuardDecl, fuzzAddDepDecl) = _getFuzzRuntimeDecls(depInfo)
+  addDepDecl = "{indent}if (SVCB_FUZZ_RUNTIME)\n".format(indent=cmakeIndent)
+  addDepDecl += _indentCMake(fuzzAddDepDecl)
+  addDepDecl += "{indent}else()\n".format(indent=cmakeIndent)
+  addDepDecl += "{indent}{indent}target_link_libraries({targetName} PRIVATE ${{KLEE_NATIVE_RUNTIME_LIB}})\n".format(indent=cmakeIndent, targetName=targetName)
+  addDepDecl += "{indent}endif()\n".format(indent=cmakeIndent)
   # svcomp_klee_runtime is an OBJECT library so we can't use `target_link_libraries`.
   # FIXME: We should use `target_sources()` here but that isn't available in CMake >= 3.1.
   # HACK: We add `$<TARGET_OBJECTS:svcomp_klee_runtime>` elsewhere.
+  return (guardDecl + fuzzGuardDecl, addDepDecl)
+
+def generate_svcomp_fuzz_runtime_dependency_code(depInfo):
+  # Unpack the needed information
+  assert isinstance(depInfo, CMakeDependencyAndTargetInfo)
+  info = depInfo.dependencyInfo
+  targetName = depInfo.targetName
+  enableTargetCMakeVariable = depInfo.enableTargetCMakeVariable
+  disabledTargetReasonsCMakeVariable = depInfo.disabledTargetReasonsCMakeVariable
+
+  guardDecl = """
+if (NOT SVCB_FUZZ_RUNTIME)
+{indent}set({enableTargetCMakeVariable} FALSE)
+{indent}list(APPEND {disabledTargetReasonsCMakeVariable} "Fuzzing runtime not enabled (SVCB_FUZZ_RUNTIME)")
+endif()
+  \n""".format(enableTargetCMakeVariable=enableTargetCMakeVariable,
+      disabledTargetReasonsCMakeVariable=disabledTargetReasonsCMakeVariable,
+      indent=cmakeIndent)
+  (fuzzGuardDecl, addDepDecl) = _getFuzzRuntimeDecls(depInfo)
+  return (guardDecl + fuzzGuardDecl, addDepDecl)
+
+def _getFuzzRuntimeDecls(depInfo):
+  """
+    Returns a tuple (preGuardCode, inGuardCode) that builds the target
+    against the fuzzing runtime. This is used by the handlers of the
+    dependencies that the fuzzing runtime can replace when
+    ``SVCB_FUZZ_RUNTIME`` is ON.
+  """
+  targetName = depInfo.targetName
+  guardDecl = ""
+  if not depInfo.benchmarkObj.isLanguageC():
+    # `main()` can only be renamed to `svcb_fuzz_main()` in C because
+    # in C++ it would not have C linkage.
+    guardDecl = """
+if (SVCB_FUZZ_RUNTIME AND SVCB_FUZZ_LIBFUZZER)
+{indent}set({enableTargetCMakeVariable} FALSE)
+{indent}list(APPEND {disabledTargetReasonsCMakeVariable} "libFuzzer harnesses can only be built for C benchmarks")
+endif()
+  \n""".format(enableTargetCMakeVariable=depInfo.enableTargetCMakeVariable,
+      disabledTargetReasonsCMakeVariable=depInfo.disabledTargetReasonsCMakeVariable,
+      indent=cmakeIndent)
+  addDepDecl = "{indent}target_include_directories({targetName} PRIVATE ${{SVCOMP_FUZZ_RUNTIME_INCLUDE_DIR}})\n".format(indent=cmakeIndent, targetName=targetName)
+  addDepDecl += "{indent}target_link_libraries({targetName} PRIVATE svcomp_fuzz_runtime)\n".format(indent=cmakeIndent, targetName=targetName)
+  addDepDecl += "{indent}if (SVCB_FUZZ_LIBFUZZER)\n".format(indent=cmakeIndent)
+  addDepDecl += "{indent}{indent}target_compile_definitions({targetName} PRIVATE main=svcb_fuzz_main)\n".format(indent=cmakeIndent, targetName=targetName)
+  addDepDecl += "{indent}endif()\n".format(indent=cmakeIndent)
   return (guardDecl, addDepDecl)
 
+def _indentCMake(code):
+  """
+    Returns the CMake ``code`` indented by one more level.
+  """
+  return ''.join(cmakeIndent + line for line in code.splitlines(True))
+
 def generate_cmath_dependency_code(depInfo):
   # Unpack the needed information
   assert isinstance(depInfo, CMakeDependencyAndTargetInfo)
@@ -0,0 +1,232 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Persistent on-disk cache of loaded benchmark specification files.
+
+Loading a benchmark specification file means parsing YAML, validating
+against the schema and expanding variants. All of this is deterministic
+given the file contents and the svcb sources so the results are stored
+(pickled) in a cache directory keyed by a hash of these. Warm loads
+then skip YAML parsing and validation entirely.
+"""
+from . import benchmark
+from . import schema
+from . import util
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+
+if sys.version_info >= (3,):
+  import pickle
+else:
+  import cPickle as pickle
+
+_logger = logging.getLogger(__name__)
+
+# Default upper bound on the total size of the entries in a cache directory.
+DefaultMaxSizeBytes = 256 * 1024 * 1024
+
+# Environment variable that clients can use as the default cache directory.
+CacheDirEnvVar = 'SVCB_CACHE_DIR'
+
+_entrySuffix = '.pickle'
+
+_sourceDigest = None
+def getSourceDigest():
+  """
+    Returns a digest of the svcb sources and schema. If these change
+    previously cached entries must not be used.
+  """
+  global _sourceDigest
+  if _sourceDigest is not None:
+    return _sourceDigest
+  h = hashlib.sha1()
+  moduleDir = os.path.dirname(os.path.abspath(__file__))
+  for fileName in sorted(os.listdir(moduleDir)):
+    if not (fileName.endswith('.py') or fileName.endswith('.yml')):
+      continue
+    h.update(fileName.encode('utf-8'))
+    with open(os.path.join(moduleDir, fileName), 'rb') as f:
+      h.update(f.read())
+  h.update(str(sys.version_info[0]).encode('utf-8'))
+  _sourceDigest = h.hexdigest()
+  return _sourceDigest
+
+class SpecCache(object):
+  """
+    Loads benchmark specification files via a cache directory.
+
+    If ``cacheDir`` is None (or empty) no caching is done which lets clients
+    use the same interface regardless of whether caching is enabled.
+
+    Entries are evicted least recently used first when the total
+    size of the cache exceeds ``maxSizeBytes``.
+  """
+  def __init__(self, cacheDir, maxSizeBytes=DefaultMaxSizeBytes):
+    # An empty directory name (e.g. an empty `SVCB_CACHE_DIR`) disables caching
+    self.cacheDir = cacheDir or None
+    assert maxSizeBytes > 0
+    self.maxSizeBytes = maxSizeBytes
+    # Lazily computed total size of entries in the cache
+    self._totalSize = None
+    self.hits = 0
+    self.misses = 0
+    if self.cacheDir is not None and not os.path.isdir(self.cacheDir):
+      os.makedirs(self.cacheDir)
+
+  @classmethod
+  def fromEnvironment(ClassObj, cacheDir=None):
+    """
+      Create a cache using ``cacheDir`` falling back to the
+      directory named by the ``SVCB_CACHE_DIR`` environment variable.
+    """
+    if cacheDir is None:
+      cacheDir = os.environ.get(CacheDirEnvVar, None)
+    return ClassObj(cacheDir)
+
+  @property
+  def enabled(self):
+    return self.cacheDir is not None
+
+  def loadBenchmarkSpecification(self, specFilePath):
+    """
+      Equivalent to ``schema.loadBenchmarkSpecification()`` on the
+      opened ``specFilePath``.
+    """
+    return self._load(specFilePath)['spec']
+
+  def getBenchmarks(self, specFilePath):
+    """
+      Equivalent to ``benchmark.getBenchmarks()`` on the benchmark
+      specification loaded from ``specFilePath``.
+    """
+    return self._load(specFilePath)['benchmarks']
+
+  def loadBenchmarkSpecificationAndBenchmarks(self, specFilePath):
+    """
+      Returns a tuple (benchSpec, benchmarkObjs).
+    """
+    entry = self._load(specFilePath)
+    return (entry['spec'], entry['benchmarks'])
+
+  def _load(self, specFilePath):
+    with open(specFilePath, 'rb') as f:
+      contents = f.read()
+
+    if not self.enabled:
+      return self._makeEntry(contents)
+
+    entryPath = self._entryPath(contents)
+    entry = self._readEntry(entryPath)
+    if entry is not None:
+      self.hits += 1
+      return entry
+    self.misses += 1
+    entry = self._makeEntry(contents)
+    self._writeEntry(entryPath, entry)
+    return entry
+
+  def _makeEntry(self, contents):
+    # Raises `BenchmarkSpecificationValidationError` if invalid. Invalid
+    # specifications are never cached.
+    benchSpec = util.loadYaml(contents)
+    schema.validateBenchmarkSpecification(benchSpec)
+    # Lazy benchmarks share the specification so are cheap to store.
+    benchmarkObjs = benchmark.getBenchmarks(benchSpec, lazy=True)
+    return { 'spec': benchSpec, 'benchmarks': benchmarkObjs }
+
+  def _entryPath(self, contents):
+    h = hashlib.sha1()
+    h.update(contents)
+    h.update(str(schema.getSchema()['__version__']).encode('utf-8'))
+    h.update(getSourceDigest().encode('utf-8'))
+    return os.path.join(self.cacheDir, h.hexdigest() + _entrySuffix)
+
+  def _readEntry(self, entryPath):
+    try:
+      with open(entryPath, 'rb') as f:
+        entry = pickle.load(f)
+    except (IOError, OSError):
+      return None
+    except Exception as e:
+      # Corrupt entry. Treat as a miss and it will be overwritten.
+      _logger.warning('Ignoring corrupt cache entry "{}": {}'.format(entryPath, e))
+      return None
+    # Mark as recently used
+    try:
+      os.utime(entryPath, None)
+    except OSError:
+      pass
+    return entry
+
+  def _writeEntry(self, entryPath, entry):
+    data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+    # Write to a temporary file and rename so concurrent readers
+    # never see a partially written entry.
+    (fd, tempPath) = tempfile.mkstemp(dir=self.cacheDir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+      os.rename(tempPath, entryPath)
+    except (IOError, OSError) as e:
+      _logger.warning('Failed to write cache entry "{}": {}'.format(entryPath, e))
+      if os.path.exists(tempPath):
+        os.remove(tempPath)
+      return
+    if self._totalSize is None:
+      self._totalSize = self._computeTotalSize()
+    else:
+      self._totalSize += len(data)
+    if self._totalSize > self.maxSizeBytes:
+      self._evict()
+
+  def _listEntries(self):
+    """
+      Returns a list of tuples (lastUsedTime, size, path).
+    """
+    entries = []
+    for fileName in os.listdir(self.cacheDir):
+      if not fileName.endswith(_entrySuffix):
+        continue
+      path = os.path.join(self.cacheDir, fileName)
+      try:
+        st = os.stat(path)
+      except OSError:
+        # Concurrently evicted
+        continue
+      entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+  def _computeTotalSize(self):
+    return sum(size for (_, size, _) in self._listEntries())
+
+  def _evict(self):
+    """
+      Remove least recently used entries until the cache
+      is at most three quarters of its maximum size.
+    """
+    entries = sorted(self._listEntries())
+    totalSize = sum(size for (_, size, _) in entries)
+    targetSize = (self.maxSizeBytes * 3) // 4
+    for (_, size, path) in entries:
+      if totalSize <= targetSize:
+        break
+      try:
+        os.remove(path)
+      except OSError:
+        pass
+      totalSize -= size
+    _logger.debug('Evicted cache entries. Size is now {} bytes'.format(totalSize))
+    self._totalSize = totalSize
+
+  def clear(self):
+    if not self.enabled:
+      return
+    for (_, _, path) in self._listEntries():
+      try:
+        os.remove(path)
+      except OSError:
+        pass
+    self._totalSize = 0
@@ -0,0 +1,212 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Check the results of verification tools against the expected
+correctness of the verification tasks of benchmarks.
+
+A result record is a dictionary describing the outcome of running a
+tool on one verification task of one benchmark:
+
+* ``benchmark`` (benchmark name), ``target`` (CMake target name) or
+  ``augmented_spec_file``: identifies the benchmark.
+* ``task``: the verification task (e.g. ``no_assert_fail``). It can be
+  omitted if ``result`` is ``unknown`` or ``timeout``.
+* ``result``: one of ``ResultValues``. ``incorrect`` means the tool
+  found a counter example, ``correct`` means it showed there are none
+  and ``unknown`` means it gave up.
+* ``counter_examples`` (optional): list of the source locations
+  (``file``, ``line`` and optionally ``column``) of the counter examples
+  found by the tool.
+
+Each record is classified as one of ``Classifications`` using an
+``ExpectationIndex`` that holds the expected correctness and counter
+example locations of every task of every benchmark.
+"""
+from . import filters
+from . import util
+import json
+import logging
+import os
+
+_logger = logging.getLogger(__name__)
+
+ResultValues = ('correct', 'incorrect', 'unknown', 'timeout')
+
+Classifications = (
+  'true_positive', # Counter example found for an incorrect task
+  'false_positive', # Counter example found for a correct task
+  'unexpected_counter_example', # Counter example not in the exhaustive list of an incorrect task
+  'true_negative', # Correct task shown to be correct
+  'false_negative', # Incorrect task shown to be correct
+  'timeout',
+  'unknown', # Tool gave up or the expected correctness is not known
+  'error', # Record is malformed or refers to an unknown benchmark or task
+)
+
+_recordFileExtensions = ('.yml', '.yaml', '.json', '.jsonl')
+
+class Expectation(util.SlotsPickleMixin):
+  """
+    The expected outcome of a verification task.
+
+    ``correct``: expected correctness (``True``, ``False`` or ``None``).
+    ``exhaustive``: True if the counter examples are exhaustive.
+    ``locationsByLine``: dictionary mapping a line number to a list of
+    (file, column) tuples of the expected counter example locations on
+    that line (column is None if not specified).
+  """
+  __slots__ = ('correct', 'exhaustive', 'locationsByLine')
+  def __init__(self, taskProperties):
+    self.correct = taskProperties['correct']
+    self.exhaustive = filters.hasExhaustiveCounterExamples(taskProperties)
+    self.locationsByLine = {}
+    for counterExample in taskProperties.get('counter_examples', []):
+      for location in counterExample['locations']:
+        if 'line' not in location:
+          continue
+        self.locationsByLine.setdefault(location['line'], []).append(
+          (location.get('file', None), location.get('column', None)))
+
+  def isExpectedLocation(self, location):
+    """
+      Returns True if ``location`` (a dictionary with ``file``, ``line``
+      and optionally ``column``) matches an expected counter example
+      location. Files match if one is a path suffix of the other so a tool
+      can report absolute paths.
+    """
+    for (expectedFile, expectedColumn) in self.locationsByLine.get(location.get('line', None), []):
+      column = location.get('column', None)
+      if expectedColumn is not None and column is not None and expectedColumn != column:
+        continue
+      if expectedFile is None or _isPathSuffix(expectedFile, location.get('file', '')):
+        return True
+    return False
+
+class ExpectationIndex(object):
+  """
+    Index of the ``Expectation`` of every verification task of a set
+    of benchmarks. Benchmarks can be looked up by name or by any of
+    their target names.
+  """
+  def __init__(self):
+    self._expectations = {}
+    self._nameByTarget = {}
+
+  def add(self, benchmarkObj):
+    if benchmarkObj.name in self._expectations:
+      raise CheckException('Benchmark "{}" was added more than once'.format(benchmarkObj.name))
+    self._expectations[benchmarkObj.name] = { task: Expectation(properties)
+      for (task, properties) in benchmarkObj.verificationTasks.items() }
+    architectures = benchmarkObj.architectures
+    if not isinstance(architectures, list):
+      architectures = [ architectures ]
+    for architecture in architectures:
+      self._nameByTarget['{}.{}'.format(benchmarkObj.name, architecture)] = benchmarkObj.name
+
+  def __len__(self):
+    return len(self._expectations)
+
+  def getBenchmarkName(self, record):
+    """
+      Returns the name of the benchmark ``record`` refers to or None if
+      it is not in the index.
+    """
+    if 'benchmark' in record:
+      name = record['benchmark']
+      return name if name in self._expectations else None
+    if 'target' in record:
+      target = record['target']
+    elif 'augmented_spec_file' in record:
+      target = os.path.basename(record['augmented_spec_file'])
+      for extension in ('.yml', '.json'):
+        if target.endswith(extension):
+          target = target[:-len(extension)]
+    else:
+      return None
+    return self._nameByTarget.get(target, None)
+
+  def get(self, name, task):
+    """
+      Returns the ``Expectation`` for ``task`` of benchmark ``name`` or
+      None if there is no such task.
+    """
+    return self._expectations.get(name, {}).get(task, None)
+
+class CheckException(Exception):
+  pass
+
+def classify(record, expectationIndex):
+  """
+    Returns a tuple of the classification (one of ``Classifications``)
+    of ``record`` using ``expectationIndex`` and a message explaining an
+    ``error`` classification (None otherwise).
+  """
+  if not isinstance(record, dict):
+    return ('error', 'Record is not a mapping')
+  result = record.get('result', None)
+  if result not in ResultValues:
+    return ('error', 'Result "{}" is not one of {}'.format(result, ', '.join(ResultValues)))
+  name = expectationIndex.getBenchmarkName(record)
+  if name is None:
+    return ('error', 'Record does not refer to a known benchmark')
+  if record.get('task', None) is None and result in ('unknown', 'timeout'):
+    # The tool gave up before finding out which task is incorrect (e.g. a
+    # replayed test case that did not fail).
+    return (result, None)
+  expectation = expectationIndex.get(name, record.get('task', None))
+  if expectation is None:
+    return ('error', 'Benchmark "{}" has no task "{}"'.format(name, record.get('task', None)))
+
+  if result == 'timeout':
+    return ('timeout', None)
+  if result == 'unknown' or expectation.correct is None:
+    return ('unknown', None)
+  if result == 'correct':
+    return ('true_negative' if expectation.correct else 'false_negative', None)
+  assert result == 'incorrect'
+  if expectation.correct:
+    return ('false_positive', None)
+  if expectation.exhaustive:
+    for counterExample in record.get('counter_examples', []):
+      if not isinstance(counterExample, dict):
+        return ('error', 'Counter example is not a mapping')
+      if not expectation.isExpectedLocation(counterExample):
+        return ('unexpected_counter_example', None)
+  return ('true_positive', None)
+
+def findRecordFiles(directory):
+  """
+    Returns a sorted list of the result record files in ``directory``
+    (and its sub-directories).
+  """
+  recordFiles = []
+  for (dirPath, dirNames, fileNames) in os.walk(directory):
+    for fileName in fileNames:
+      if fileName.endswith(_recordFileExtensions):
+        recordFiles.append(os.path.join(dirPath, fileName))
+  recordFiles.sort()
+  return recordFiles
+
+def loadRecords(recordFile):
+  """
+    Returns the list of result records in ``recordFile``. The file holds
+    a single record, a list of records or (if it ends in ``.jsonl``) a
+    record on each line.
+  """
+  with open(recordFile, 'r') as f:
+    if recordFile.endswith('.jsonl'):
+      return [ json.loads(line) for line in f if len(line.strip()) > 0 ]
+    data = util.loadYaml(f)
+  if isinstance(data, list):
+    return data
+  return [ data ]
+
+def _isPathSuffix(a, b):
+  """
+    Returns True if the path components of ``a`` are a suffix of
+    those of ``b`` or vice versa.
+  """
+  aParts = os.path.normpath(a).split(os.sep)
+  bParts = os.path.normpath(b).split(os.sep)
+  n = min(len(aParts), len(bParts))
+  return aParts[-n:] == bParts[-n:]
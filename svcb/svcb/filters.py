@@ -0,0 +1,155 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Predicates for selecting benchmarks.
+
+A ``BenchmarkFilter`` is applied in two stages so that benchmarks
+can be rejected as early (and cheaply) as possible:
+
+1. ``acceptsSpec()`` on the benchmark specification. This rejects
+   every benchmark declared by a specification without expanding
+   any variants (e.g. because of its ``language``).
+
+2. ``accepts()`` on each (lazy) ``Benchmark``. This only computes the
+   fields needed by the predicates so rejected variants are never
+   fully built.
+"""
+from . import util
+
+class BenchmarkFilter(util.SlotsPickleMixin):
+  """
+    Selects benchmarks that satisfy all of the given predicates.
+    A predicate that is None is not applied.
+
+    ``anyCategories``: benchmark must belong to at least one of these categories.
+    ``allCategories``: benchmark must belong to all of these categories.
+    ``languages``: benchmark language must be one of these.
+    ``architectures``: benchmark must support at least one of these architectures.
+    ``dependencies``: benchmark must use all of these dependencies.
+    ``taskCorrectness``: dictionary mapping a verification task name to the
+    allowed values of its ``correct`` field (``True``, ``False`` or ``None``).
+    ``exhaustiveCounterExampleTasks``: verification tasks that must be expected
+    to be incorrect with exhaustive counter examples.
+  """
+  __slots__ = ('anyCategories', 'allCategories', 'languages', 'architectures',
+               'dependencies', 'taskCorrectness', 'exhaustiveCounterExampleTasks')
+  def __init__(self, anyCategories=None, allCategories=None, languages=None,
+               architectures=None, dependencies=None, taskCorrectness=None,
+               exhaustiveCounterExampleTasks=None):
+    self.anyCategories = _toSet(anyCategories)
+    self.allCategories = _toSet(allCategories)
+    self.languages = _toSet(languages)
+    self.architectures = _toSet(architectures)
+    self.dependencies = _toSet(dependencies)
+    self.exhaustiveCounterExampleTasks = _toSet(exhaustiveCounterExampleTasks)
+    self.taskCorrectness = None
+    if taskCorrectness is not None:
+      assert isinstance(taskCorrectness, dict)
+      self.taskCorrectness = {}
+      for (task, allowedValues) in taskCorrectness.items():
+        for value in allowedValues:
+          assert value is True or value is False or value is None
+        self.taskCorrectness[task] = frozenset(allowedValues)
+
+  @property
+  def acceptsEverything(self):
+    return all(getattr(self, attr) is None for attr in self.__slots__)
+
+  def acceptsSpec(self, benchSpec):
+    """
+      Returns False if no benchmark declared by ``benchSpec`` can be
+      accepted. Returns True otherwise.
+    """
+    assert isinstance(benchSpec, dict)
+    if self.languages is not None and benchSpec['language'] not in self.languages:
+      return False
+    if self.architectures is not None and not _supportsArchitecture(benchSpec['architectures'], self.architectures):
+      return False
+
+    variants = benchSpec.get('variants', {})
+    if self.anyCategories is not None or self.allCategories is not None:
+      # Categories that at least one benchmark could belong to
+      possibleCategories = set(benchSpec.get('categories', []))
+      for variantProperties in variants.values():
+        possibleCategories.update(variantProperties.get('categories', []))
+      if self.anyCategories is not None and self.anyCategories.isdisjoint(possibleCategories):
+        return False
+      if self.allCategories is not None and not self.allCategories.issubset(possibleCategories):
+        return False
+    if self.dependencies is not None:
+      possibleDependencies = set(benchSpec.get('dependencies', {}).keys())
+      for variantProperties in variants.values():
+        possibleDependencies.update(variantProperties.get('dependencies', {}).keys())
+      if not self.dependencies.issubset(possibleDependencies):
+        return False
+    return True
+
+  def accepts(self, benchmarkObj):
+    """
+      Returns True if ``benchmarkObj`` satisfies all the predicates.
+    """
+    if self.languages is not None and benchmarkObj.language not in self.languages:
+      return False
+    if self.architectures is not None and not _supportsArchitecture(benchmarkObj.architectures, self.architectures):
+      return False
+    if self.anyCategories is not None or self.allCategories is not None:
+      categories = benchmarkObj.categories
+      if self.anyCategories is not None and self.anyCategories.isdisjoint(categories):
+        return False
+      if self.allCategories is not None and not self.allCategories.issubset(categories):
+        return False
+    if self.dependencies is not None:
+      if not self.dependencies.issubset(benchmarkObj.dependencies.keys()):
+        return False
+    if self.taskCorrectness is not None:
+      verificationTasks = benchmarkObj.verificationTasks
+      for (task, allowedValues) in self.taskCorrectness.items():
+        if task not in verificationTasks:
+          return False
+        if verificationTasks[task]['correct'] not in allowedValues:
+          return False
+    if self.exhaustiveCounterExampleTasks is not None:
+      verificationTasks = benchmarkObj.verificationTasks
+      for task in self.exhaustiveCounterExampleTasks:
+        if not hasExhaustiveCounterExamples(verificationTasks.get(task, None)):
+          return False
+    return True
+
+  def apply(self, benchSpec, benchmarkObjs):
+    """
+      Returns a tuple (accepted, rejected) of lists partitioning
+      ``benchmarkObjs`` (the benchmarks declared by ``benchSpec``).
+    """
+    if self.acceptsEverything:
+      return (list(benchmarkObjs), [])
+    if not self.acceptsSpec(benchSpec):
+      return ([], list(benchmarkObjs))
+    accepted = []
+    rejected = []
+    for benchmarkObj in benchmarkObjs:
+      if self.accepts(benchmarkObj):
+        accepted.append(benchmarkObj)
+      else:
+        rejected.append(benchmarkObj)
+    return (accepted, rejected)
+
+def hasExhaustiveCounterExamples(taskProperties):
+  """
+    Returns True if the verification task properties ``taskProperties``
+    (with implicit fields added) declare the task to be incorrect
+    with an exhaustive list of counter examples.
+  """
+  if taskProperties is None or taskProperties['correct'] is not False:
+    return False
+  return taskProperties['exhaustive_counter_examples'] is True
+
+def _toSet(values):
+  if values is None:
+    return None
+  assert not isinstance(values, util.stringTypes)
+  return frozenset(values)
+
+def _supportsArchitecture(benchmarkArchitectures, architectures):
+  if benchmarkArchitectures == 'any':
+    return True
+  return not architectures.isdisjoint(benchmarkArchitectures)
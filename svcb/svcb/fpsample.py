@@ -0,0 +1,139 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Sample the inputs of native benchmarks built against the fuzzing
+runtime (``-DSVCB_FUZZ_RUNTIME=ON``).
+
+Each run of a benchmark sets the ``SVCOMP_FUZZ_SAMPLE_SEED``
+environment variable which makes the fuzzing runtime draw every
+nondeterministic value from a generator seeded with it. Floating point
+values are drawn from a mix of special values (signed zeros,
+subnormals, infinities, NaNs with payloads), values near powers of two
+and random bit patterns. A run is therefore reproduced by running the
+benchmark with the same seed.
+
+The outcome of sampling a job is one of ``Outcomes``:
+
+* ``counter_example``: a run aborted (e.g. an assertion failed).
+* ``crash``: a run was killed by another signal (e.g. ``SIGSEGV``).
+* ``timeout``: a run exceeded the timeout.
+* ``none``: every run exited normally.
+* ``error``: the program could not be run.
+"""
+from . import runner
+from . import util
+import logging
+import os
+import signal
+
+_logger = logging.getLogger(__name__)
+
+Outcomes = ('counter_example', 'crash', 'timeout', 'none', 'error')
+
+SeedEnvironmentVariable = 'SVCOMP_FUZZ_SAMPLE_SEED'
+
+class SampleOptions(util.SlotsPickleMixin):
+  """
+    Options for sampling jobs.
+
+    ``runs``: maximum number of runs of each job.
+    ``firstSeed``: seed of the first run. Run ``i`` uses ``firstSeed + i``.
+    ``timeout``: wallclock timeout in seconds for each run (None for no limit).
+    ``memoryLimit``: maximum address space in bytes of each run (None for no limit).
+  """
+  __slots__ = ('runs', 'firstSeed', 'timeout', 'memoryLimit')
+  def __init__(self, runs, firstSeed=0, timeout=None, memoryLimit=None):
+    assert runs > 0
+    assert firstSeed >= 0
+    self.runs = runs
+    self.firstSeed = firstSeed
+    self.timeout = timeout
+    self.memoryLimit = memoryLimit
+
+def sampleJob(job, options):
+  """
+    Run the native program of ``job`` with successive seeds until a run
+    does not exit normally or ``options.runs`` runs have been done. The
+    output of the program is discarded.
+
+    Returns a record (a dictionary) with the keys
+
+    ``program``: the program that was run.
+    ``augmented_spec_file``: the augmented spec file of the job (or None).
+    ``outcome``: one of ``Outcomes``.
+    ``runs``: the number of runs done.
+    ``seed``: the seed of the last run (None if no run was done).
+    ``exit_code``: the exit code of the last run (None if it was killed or not done).
+    ``signal``: the number of the signal that killed the last run (or None).
+    ``wallclock_time``: the total time in seconds of all the runs.
+    ``error``: a message if the program could not be run (None otherwise).
+  """
+  record = _newRecord(job)
+  commandLine = [ job['program'] ] + [ str(arg) for arg in job.get('command_line_arguments', []) ]
+  cwd = os.path.dirname(os.path.abspath(job['program']))
+  env = dict(os.environ)
+  for (name, value) in job.get('environment_variables', {}).items():
+    env[name] = str(value)
+
+  with open(os.devnull, 'r+') as devNull:
+    for seed in range(options.firstSeed, options.firstSeed + options.runs):
+      env[SeedEnvironmentVariable] = str(seed)
+      try:
+        (returnCode, timedOut, wallclockTime) = runner.runProcess(
+          commandLine, cwd, env, devNull, devNull, devNull,
+          options.timeout, options.memoryLimit)
+      except OSError as e:
+        record['outcome'] = 'error'
+        record['error'] = 'Failed to run "{}": {}'.format(commandLine[0], e)
+        break
+      record['runs'] += 1
+      record['seed'] = seed
+      record['wallclock_time'] += wallclockTime
+      if returnCode < 0:
+        record['signal'] = -returnCode
+        record['exit_code'] = None
+      else:
+        record['signal'] = None
+        record['exit_code'] = returnCode
+      if timedOut:
+        record['outcome'] = 'timeout'
+        break
+      if returnCode == -signal.SIGABRT:
+        record['outcome'] = 'counter_example'
+        break
+      if returnCode < 0:
+        record['outcome'] = 'crash'
+        break
+  return record
+
+def _newRecord(job):
+  """
+    Returns the record (see ``sampleJob()``) of ``job`` before it is
+    sampled.
+  """
+  return {
+    'program': job.get('program', None),
+    'augmented_spec_file': job.get('misc', {}).get('augmented_spec_file', None),
+    'outcome': 'none',
+    'runs': 0,
+    'seed': None,
+    'exit_code': None,
+    'signal': None,
+    'wallclock_time': 0.0,
+    'error': None,
+  }
+
+def _onSampleJobError(job, options, e):
+  record = _newRecord(job)
+  record['outcome'] = 'error'
+  record['error'] = '{}: {}'.format(type(e).__name__, e)
+  return record
+
+def sampleJobs(jobs, options, workers=None):
+  """
+    Generator that samples ``jobs`` using ``workers`` processes
+    (default: number of CPUs) and yields the record (see ``sampleJob()``)
+    of each job in the same order as ``jobs``.
+  """
+  # Jobs are long running so hand them out one at a time
+  return util.mapInPool(sampleJob, jobs, options, workers, chunkSize=1, onError=_onSampleJobError)
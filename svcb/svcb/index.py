@@ -0,0 +1,361 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+SQLite index of expanded benchmarks.
+
+The index holds one row per build target (i.e. benchmark and
+architecture) along with its categories, dependencies and expected
+verification task results. Tools can answer queries from it without
+loading any benchmark specification files.
+"""
+from . import filters
+import logging
+import os
+import sqlite3
+import tempfile
+
+_logger = logging.getLogger(__name__)
+
+# Increment when the database layout changes
+IndexVersion = 2
+
+_tables = """
+CREATE TABLE metadata (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+CREATE TABLE benchmarks (
+  id INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  target TEXT NOT NULL UNIQUE,
+  architecture TEXT NOT NULL,
+  language TEXT NOT NULL,
+  spec_path TEXT NOT NULL,
+  exe_path TEXT,
+  llvm_bc_path TEXT,
+  augmented_spec_path TEXT
+);
+CREATE TABLE categories (
+  benchmark_id INTEGER NOT NULL REFERENCES benchmarks(id),
+  category TEXT NOT NULL
+);
+CREATE TABLE dependencies (
+  benchmark_id INTEGER NOT NULL REFERENCES benchmarks(id),
+  dependency TEXT NOT NULL
+);
+CREATE TABLE tasks (
+  benchmark_id INTEGER NOT NULL REFERENCES benchmarks(id),
+  task TEXT NOT NULL,
+  correct INTEGER,
+  exhaustive_counter_examples INTEGER NOT NULL
+);
+"""
+
+# Created after the tables are populated which is faster
+# than updating them on every insert.
+_indexes = """
+CREATE INDEX benchmarks_name ON benchmarks(name);
+CREATE INDEX categories_category ON categories(category, benchmark_id);
+CREATE INDEX categories_benchmark ON categories(benchmark_id);
+CREATE INDEX dependencies_dependency ON dependencies(dependency, benchmark_id);
+CREATE INDEX dependencies_benchmark ON dependencies(benchmark_id);
+CREATE INDEX tasks_task ON tasks(task, correct, benchmark_id);
+CREATE INDEX tasks_benchmark ON tasks(benchmark_id);
+"""
+
+class BenchmarkIndexException(Exception):
+  pass
+
+class IndexEntry(object):
+  """
+    A build target recorded in a ``BenchmarkIndex``.
+
+    ``tasks`` maps each verification task name to its expected
+    correctness (``True``, ``False`` or ``None``).
+    ``exhaustiveCounterExampleTasks`` is the set of tasks that are expected
+    to be incorrect with exhaustive counter examples.
+  """
+  __slots__ = ('name', 'target', 'architecture', 'language', 'specPath',
+               'exePath', 'llvmBcPath', 'augmentedSpecPath', 'categories',
+               'dependencies', 'tasks', 'exhaustiveCounterExampleTasks')
+  def __init__(self, name, target, architecture, language, specPath,
+               exePath=None, llvmBcPath=None, augmentedSpecPath=None):
+    self.name = name
+    self.target = target
+    self.architecture = architecture
+    self.language = language
+    self.specPath = specPath
+    self.exePath = exePath
+    self.llvmBcPath = llvmBcPath
+    self.augmentedSpecPath = augmentedSpecPath
+    self.categories = set()
+    self.dependencies = set()
+    self.tasks = {}
+    self.exhaustiveCounterExampleTasks = set()
+
+  def toDict(self):
+    """
+      Returns a dictionary representation suitable for
+      serialising as JSON or YAML.
+    """
+    return {
+      'name': self.name,
+      'target': self.target,
+      'architecture': self.architecture,
+      'language': self.language,
+      'spec_path': self.specPath,
+      'exe_path': self.exePath,
+      'llvm_bc_path': self.llvmBcPath,
+      'augmented_spec_path': self.augmentedSpecPath,
+      'categories': sorted(self.categories),
+      'dependencies': sorted(self.dependencies),
+      'verification_tasks': { task: {
+        'correct': correct,
+        'exhaustive_counter_examples': task in self.exhaustiveCounterExampleTasks }
+        for (task, correct) in self.tasks.items() },
+    }
+
+  def __str__(self):
+    return 'IndexEntry({})'.format(self.target)
+
+class BenchmarkIndex(object):
+  """
+    Wrapper around a SQLite database containing the index.
+
+    Use ``create()`` to write a new index and the constructor
+    to open an existing one.
+  """
+  def __init__(self, path):
+    if not os.path.exists(path):
+      raise BenchmarkIndexException('Index "{}" does not exist'.format(path))
+    self.path = path
+    self._connection = sqlite3.connect(path)
+    try:
+      version = self._getMetadata('index_version')
+    except sqlite3.DatabaseError as e:
+      self.close()
+      raise BenchmarkIndexException('"{}" is not a benchmark index: {}'.format(path, e))
+    if version != str(IndexVersion):
+      self.close()
+      raise BenchmarkIndexException('Index "{}" has version {} but expected {}'.format(
+        path, version, IndexVersion))
+
+  @classmethod
+  def create(ClassObj, path, entries):
+    """
+      Write a new index to ``path`` containing the ``IndexEntry``
+      objects in ``entries`` and return it opened. Any existing file
+      at ``path`` is only replaced once the new index is complete.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    (fd, tempPath) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+      connection = sqlite3.connect(tempPath)
+      try:
+        # The temporary file is thrown away on failure so durability
+        # is not needed.
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.executescript(_tables)
+        connection.execute('INSERT INTO metadata VALUES (?, ?)', ('index_version', str(IndexVersion)))
+        count = _insertEntries(connection, entries)
+        connection.executescript(_indexes)
+        connection.commit()
+      finally:
+        connection.close()
+      os.rename(tempPath, path)
+    except Exception:
+      if os.path.exists(tempPath):
+        os.remove(tempPath)
+      raise
+    _logger.debug('Wrote {} entries to index "{}"'.format(count, path))
+    return ClassObj(path)
+
+  def close(self):
+    if self._connection is not None:
+      self._connection.close()
+      self._connection = None
+
+  def _getMetadata(self, key):
+    row = self._connection.execute('SELECT value FROM metadata WHERE key = ?', (key,)).fetchone()
+    return None if row is None else row[0]
+
+  def query(self, benchmarkFilter=None):
+    """
+      Returns a list of the ``IndexEntry`` objects (sorted by target)
+      accepted by ``benchmarkFilter`` (a ``filters.BenchmarkFilter``).
+    """
+    (whereClause, params) = _translateFilter(benchmarkFilter)
+    entries = []
+    entryById = {}
+    for row in self._connection.execute(
+        'SELECT id, name, target, architecture, language, spec_path, exe_path, '
+        'llvm_bc_path, augmented_spec_path FROM benchmarks AS b WHERE {} '
+        'ORDER BY target'.format(whereClause), params):
+      entry = IndexEntry(*row[1:])
+      entries.append(entry)
+      entryById[row[0]] = entry
+    if len(entries) == 0:
+      return entries
+
+    idQuery = 'SELECT b.id FROM benchmarks AS b WHERE {}'.format(whereClause)
+    for (benchmarkId, category) in self._connection.execute(
+        'SELECT benchmark_id, category FROM categories WHERE benchmark_id IN ({})'.format(idQuery), params):
+      entryById[benchmarkId].categories.add(category)
+    for (benchmarkId, dependency) in self._connection.execute(
+        'SELECT benchmark_id, dependency FROM dependencies WHERE benchmark_id IN ({})'.format(idQuery), params):
+      entryById[benchmarkId].dependencies.add(dependency)
+    for (benchmarkId, task, correct, exhaustive) in self._connection.execute(
+        'SELECT benchmark_id, task, correct, exhaustive_counter_examples FROM tasks '
+        'WHERE benchmark_id IN ({})'.format(idQuery), params):
+      entryById[benchmarkId].tasks[task] = _fromCorrectColumn(correct)
+      if exhaustive:
+        entryById[benchmarkId].exhaustiveCounterExampleTasks.add(task)
+    return entries
+
+  def getAugmentedSpecPaths(self, benchmarkFilter=None):
+    """
+      Returns a set of the augmented benchmark specification file
+      paths of the targets accepted by ``benchmarkFilter``.
+    """
+    (whereClause, params) = _translateFilter(benchmarkFilter)
+    return set(row[0] for row in self._connection.execute(
+      'SELECT augmented_spec_path FROM benchmarks AS b WHERE {} '
+      'AND augmented_spec_path IS NOT NULL'.format(whereClause), params))
+
+  def count(self, benchmarkFilter=None):
+    """
+      Returns the number of targets accepted by ``benchmarkFilter``.
+    """
+    (whereClause, params) = _translateFilter(benchmarkFilter)
+    return self._connection.execute(
+      'SELECT COUNT(*) FROM benchmarks AS b WHERE {}'.format(whereClause), params).fetchone()[0]
+
+def makeEntries(benchmarkObj, specPath, architectures=None):
+  """
+    Returns a list of ``IndexEntry`` objects for ``benchmarkObj``. One
+    entry is made for each architecture of the benchmark. If
+    ``architectures`` is not None only entries for those
+    architectures are made.
+  """
+  if isinstance(benchmarkObj.architectures, list):
+    benchmarkArchitectures = benchmarkObj.architectures
+  else:
+    assert benchmarkObj.architectures == 'any'
+    benchmarkArchitectures = ['any']
+  entries = []
+  for architecture in benchmarkArchitectures:
+    if architectures is not None and architecture not in architectures:
+      continue
+    entry = IndexEntry(
+      name=benchmarkObj.name,
+      target='{}.{}'.format(benchmarkObj.name, architecture),
+      architecture=architecture,
+      language=benchmarkObj.language,
+      specPath=specPath)
+    entry.categories.update(benchmarkObj.categories)
+    entry.dependencies.update(benchmarkObj.dependencies.keys())
+    for (task, properties) in benchmarkObj.verificationTasks.items():
+      entry.tasks[task] = properties['correct']
+      if filters.hasExhaustiveCounterExamples(properties):
+        entry.exhaustiveCounterExampleTasks.add(task)
+    entries.append(entry)
+  return entries
+
+def _insertEntries(connection, entries):
+  categoryRows = []
+  dependencyRows = []
+  taskRows = []
+  count = 0
+  for (benchmarkId, entry) in enumerate(entries):
+    try:
+      connection.execute('INSERT INTO benchmarks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+        benchmarkId,
+        entry.name,
+        entry.target,
+        entry.architecture,
+        entry.language,
+        entry.specPath,
+        entry.exePath,
+        entry.llvmBcPath,
+        entry.augmentedSpecPath))
+    except sqlite3.IntegrityError:
+      raise BenchmarkIndexException('Target "{}" was added to the index more than once'.format(entry.target))
+    categoryRows.extend((benchmarkId, c) for c in entry.categories)
+    dependencyRows.extend((benchmarkId, d) for d in entry.dependencies)
+    taskRows.extend((benchmarkId, t, _toCorrectColumn(c), 1 if t in entry.exhaustiveCounterExampleTasks else 0)
+                    for (t, c) in entry.tasks.items())
+    count += 1
+  connection.executemany('INSERT INTO categories VALUES (?, ?)', categoryRows)
+  connection.executemany('INSERT INTO dependencies VALUES (?, ?)', dependencyRows)
+  connection.executemany('INSERT INTO tasks VALUES (?, ?, ?, ?)', taskRows)
+  return count
+
+def _toCorrectColumn(correct):
+  if correct is None:
+    return None
+  return 1 if correct else 0
+
+def _fromCorrectColumn(value):
+  if value is None:
+    return None
+  return value == 1
+
+def _placeholders(values):
+  return ', '.join(['?'] * len(values))
+
+def _translateFilter(benchmarkFilter):
+  """
+    Returns a tuple (whereClause, params) that selects the rows of the
+    ``benchmarks`` table (aliased as ``b``) accepted by ``benchmarkFilter``.
+  """
+  if benchmarkFilter is None:
+    return ('1', [])
+  assert isinstance(benchmarkFilter, filters.BenchmarkFilter)
+  clauses = []
+  params = []
+  if benchmarkFilter.languages is not None:
+    values = sorted(benchmarkFilter.languages)
+    clauses.append('b.language IN ({})'.format(_placeholders(values)))
+    params.extend(values)
+  if benchmarkFilter.architectures is not None:
+    values = sorted(benchmarkFilter.architectures)
+    clauses.append("(b.architecture = 'any' OR b.architecture IN ({}))".format(_placeholders(values)))
+    params.extend(values)
+  if benchmarkFilter.anyCategories is not None:
+    values = sorted(benchmarkFilter.anyCategories)
+    clauses.append('EXISTS (SELECT 1 FROM categories AS c WHERE c.benchmark_id = b.id '
+                   'AND c.category IN ({}))'.format(_placeholders(values)))
+    params.extend(values)
+  for (table, column, values) in [
+      ('categories', 'category', benchmarkFilter.allCategories),
+      ('dependencies', 'dependency', benchmarkFilter.dependencies)]:
+    if values is None:
+      continue
+    for value in sorted(values):
+      clauses.append('EXISTS (SELECT 1 FROM {table} AS x WHERE x.benchmark_id = b.id '
+                     'AND x.{column} = ?)'.format(table=table, column=column))
+      params.append(value)
+  if benchmarkFilter.taskCorrectness is not None:
+    for (task, allowedValues) in sorted(benchmarkFilter.taskCorrectness.items()):
+      correctClauses = []
+      values = sorted([ _toCorrectColumn(v) for v in allowedValues if v is not None ])
+      if len(values) > 0:
+        correctClauses.append('t.correct IN ({})'.format(_placeholders(values)))
+      if None in allowedValues:
+        correctClauses.append('t.correct IS NULL')
+      if len(correctClauses) == 0:
+        correctClauses.append('0')
+      clauses.append('EXISTS (SELECT 1 FROM tasks AS t WHERE t.benchmark_id = b.id '
+                     'AND t.task = ? AND ({}))'.format(' OR '.join(correctClauses)))
+      params.append(task)
+      params.extend(values)
+  if benchmarkFilter.exhaustiveCounterExampleTasks is not None:
+    for task in sorted(benchmarkFilter.exhaustiveCounterExampleTasks):
+      clauses.append('EXISTS (SELECT 1 FROM tasks AS t WHERE t.benchmark_id = b.id '
+                     'AND t.task = ? AND t.exhaustive_counter_examples = 1)')
+      params.append(task)
+  if len(clauses) == 0:
+    return ('1', [])
+  return (' AND '.join(clauses), params)
@@ -0,0 +1,218 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Cost hints for klee-runner invocation info jobs.
+
+Jobs can be ordered (longest first) and split into shards (one
+self-contained invocation info file per worker) that are balanced on a
+cost hint for each job. The hint comes from one of the ``CostSources``:
+
+* ``estimated_run_time``: the wallclock time of a previous run of the
+  job if known, otherwise an estimate from the size of the job's
+  program and the number of symbolic inputs in its sources (see
+  ``estimateMissingCosts()``).
+* ``run_time``: the wallclock time of a previous run of the job.
+* ``misc``: the ``cost`` field of the benchmark's ``misc`` property.
+* ``program_size``: the size in bytes of the job's program (i.e. the
+  LLVM bitcode file unless the executable is being run).
+
+Jobs that still have no hint are given the mean of the known hints.
+"""
+from . import util
+import heapq
+import logging
+import os
+import re
+
+_logger = logging.getLogger(__name__)
+
+CostSources = ('estimated_run_time', 'run_time', 'misc', 'program_size')
+
+# Calls that introduce symbolic inputs
+_symbolicInputRegex = re.compile(r'\b(klee_make_symbolic|klee_range|klee_int|__VERIFIER_nondet_\w+)\s*\(')
+
+# Maps source file paths to the number of symbolic inputs in them
+_symbolicInputCounts = {}
+
+class CostException(Exception):
+  pass
+
+def loadRunTimes(openFile):
+  """
+    Returns a dictionary mapping (absolute) augmented spec file paths
+    to the wallclock time in seconds of a previous run of their job.
+
+    ``openFile`` is either a klee-runner result info file (a mapping
+    with a ``results`` list where each result has ``invocation_info``
+    and ``wallclock_time`` keys) or a mapping from augmented spec file
+    paths to times. If a job was run more than once the longest time is
+    used.
+  """
+  data = util.loadYaml(openFile)
+  if not isinstance(data, dict):
+    raise CostException('Run times must be a mapping')
+  runTimes = {}
+  if 'results' in data:
+    if not isinstance(data['results'], list):
+      raise CostException('"results" must be a list')
+    pairs = []
+    for result in data['results']:
+      try:
+        path = result['invocation_info']['misc']['augmented_spec_file']
+      except (KeyError, TypeError):
+        raise CostException('Result has no "invocation_info.misc.augmented_spec_file"')
+      pairs.append((path, result.get('wallclock_time', None)))
+  else:
+    pairs = data.items()
+  for (path, runTime) in pairs:
+    if runTime is None:
+      # E.g. the run did not complete
+      continue
+    runTime = _toCost(runTime, 'Run time for "{}"'.format(path))
+    path = os.path.abspath(path)
+    runTimes[path] = max(runTime, runTimes.get(path, 0.0))
+  return runTimes
+
+def getJobCost(job, benchmarkObj, costSource, runTimes=None):
+  """
+    Returns the cost hint from ``costSource`` for the invocation info
+    ``job`` of ``benchmarkObj`` or None if it is not known. ``runTimes``
+    is the dictionary returned by ``loadRunTimes()`` and is required
+    for the ``run_time`` source.
+  """
+  if costSource == 'misc':
+    cost = benchmarkObj.misc.get('cost', None)
+    if cost is None:
+      return None
+    return _toCost(cost, '"misc.cost" of benchmark "{}"'.format(benchmarkObj.name))
+  elif costSource == 'run_time' or costSource == 'estimated_run_time':
+    assert runTimes is not None or costSource == 'estimated_run_time'
+    if runTimes is None:
+      return None
+    return runTimes.get(job['misc']['augmented_spec_file'], None)
+  elif costSource == 'program_size':
+    try:
+      return float(os.path.getsize(job['program']))
+    except OSError:
+      return None
+  else:
+    raise Exception('Unreachable')
+
+def getEstimateFeatures(job, benchmarkObj):
+  """
+    Returns a tuple of the size in bytes of the program run by ``job``
+    (None if it does not exist) and the number of symbolic inputs in
+    the sources of ``benchmarkObj`` (which was loaded from an augmented
+    spec file).
+  """
+  try:
+    programSize = os.path.getsize(job['program'])
+  except OSError:
+    programSize = None
+  sourceDir = os.path.dirname(benchmarkObj.misc['original_spec'])
+  symbolicInputCount = 0
+  for source in benchmarkObj.sources:
+    symbolicInputCount += countSymbolicInputs(os.path.join(sourceDir, source))
+  return (programSize, symbolicInputCount)
+
+def countSymbolicInputs(sourceFile):
+  """
+    Returns the number of calls that introduce symbolic inputs (e.g.
+    ``klee_make_symbolic()``) in ``sourceFile`` or 0 if it cannot be read.
+  """
+  if sourceFile not in _symbolicInputCounts:
+    try:
+      with open(sourceFile, 'r') as f:
+        count = len(_symbolicInputRegex.findall(f.read()))
+    except (IOError, OSError, UnicodeDecodeError):
+      _logger.warning('Failed to read "{}"'.format(sourceFile))
+      count = 0
+    _symbolicInputCounts[sourceFile] = count
+  return _symbolicInputCounts[sourceFile]
+
+def estimateMissingCosts(costs, features):
+  """
+    Returns a copy of the list ``costs`` where each None is replaced by
+    an estimate from the corresponding ``(programSize, symbolicInputCount)``
+    tuple in ``features`` (see ``getEstimateFeatures()``).
+
+    The estimate is ``scale * programSize * (1 + symbolicInputCount)``.
+    ``scale`` is the median ratio of cost to ``programSize * (1 +
+    symbolicInputCount)`` of the jobs with a known cost so that estimates
+    are in the same units (or 1.0 if there are no such jobs). Costs that
+    cannot be estimated (because the program size is not known) are left
+    as None.
+  """
+  assert len(costs) == len(features)
+  def _work(feature):
+    (programSize, symbolicInputCount) = feature
+    if programSize is None:
+      return None
+    return float(programSize * (1 + symbolicInputCount))
+  ratios = []
+  for (cost, feature) in zip(costs, features):
+    work = _work(feature)
+    if cost is not None and work:
+      ratios.append(cost / work)
+  scale = 1.0
+  if len(ratios) > 0:
+    ratios.sort()
+    scale = ratios[len(ratios) // 2]
+  estimatedCosts = []
+  for (cost, feature) in zip(costs, features):
+    if cost is None:
+      work = _work(feature)
+      if work is not None:
+        cost = scale * work
+    estimatedCosts.append(cost)
+  return estimatedCosts
+
+def fillMissingCosts(costs):
+  """
+    Returns a copy of the list ``costs`` where each None is replaced by
+    the mean of the other costs (or 1.0 if no costs are known).
+  """
+  knownCosts = [ c for c in costs if c is not None ]
+  if len(knownCosts) < len(costs):
+    _logger.info('{} of {} job(s) have no cost hint'.format(
+      len(costs) - len(knownCosts), len(costs)))
+  defaultCost = 1.0
+  if len(knownCosts) > 0:
+    defaultCost = sum(knownCosts) / len(knownCosts)
+  return [ defaultCost if c is None else c for c in costs ]
+
+def shardJobs(costs, shardCount):
+  """
+    Split jobs with the given ``costs`` into ``shardCount`` shards so that
+    the total costs of the shards are balanced. Jobs are assigned in
+    decreasing order of cost to the shard with the lowest total so far
+    (longest processing time first).
+
+    Returns a list of ``shardCount`` lists of job indices. The indices in
+    each shard are in increasing order.
+  """
+  assert shardCount > 0
+  shards = [ [] for _ in range(shardCount) ]
+  # (total cost, shard index)
+  heap = [ (0.0, i) for i in range(shardCount) ]
+  for jobIndex in orderJobs(costs):
+    (total, shardIndex) = heapq.heappop(heap)
+    shards[shardIndex].append(jobIndex)
+    heapq.heappush(heap, (total + costs[jobIndex], shardIndex))
+  for shard in shards:
+    shard.sort()
+  return shards
+
+def orderJobs(costs):
+  """
+    Returns the list of job indices ordered by decreasing cost (longest
+    processing time first). Jobs with the same cost keep their order.
+  """
+  return sorted(range(len(costs)), key=lambda i: (-costs[i], i))
+
+def _toCost(value, description):
+  if isinstance(value, bool) or not isinstance(value, util.integerTypes + (float,)):
+    raise CostException('{} must be a number'.format(description))
+  if value < 0:
+    raise CostException('{} must not be negative'.format(description))
+  return float(value)
@@ -0,0 +1,311 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Replay KLEE test cases (``.ktest`` files) against the native benchmark
+binaries to confirm the counter examples KLEE found.
+
+The native binaries must be linked against KLEE's native runtime
+(``libkleeRuntest``) which the build does when it finds it. That runtime
+makes ``klee_make_symbolic()`` read the values from the ``.ktest`` file
+named by the ``KTEST_FILE`` environment variable.
+
+Each ``.ktest`` file records the command line KLEE ran. The program in
+it is mapped back to its benchmark (and so the native binary and
+expected counter examples) through the augmented spec files using a
+``ProgramIndex``.
+
+The outcome of replaying a test case is one of ``Outcomes``:
+
+* ``reproduced``: the program failed (e.g. an assertion failed).
+* ``not_reproduced``: the program exited normally.
+* ``timeout``: the program exceeded the timeout.
+* ``error``: the test case could not be replayed.
+"""
+from . import check
+from . import runner
+from . import util
+import logging
+import os
+import re
+import signal
+import struct
+import tempfile
+
+_logger = logging.getLogger(__name__)
+
+Outcomes = ('reproduced', 'not_reproduced', 'timeout', 'error')
+
+_ktestMagics = (b'KTEST', b'BOUT\n')
+
+# Assertion failure messages written to standard error by the C library
+_assertionRegexes = (
+  # glibc
+  re.compile(r"^.*?: (?P<file>[^\n]+?):(?P<line>\d+): (?P<function>[^\n]*?): Assertion `.*' failed\.$", re.MULTILINE),
+  # BSD and macOS
+  re.compile(r'^Assertion failed: \(.*\), function (?P<function>[^,\n]+), file (?P<file>[^,\n]+), line (?P<line>\d+)\.$', re.MULTILINE),
+)
+
+# Written by KLEE's native runtime if the test case does not match the program
+_ktestErrorPrefix = 'KLEE_RUN_TEST_ERROR'
+
+class ReplayException(Exception):
+  pass
+
+def readKTestArguments(ktestFile):
+  """
+    Returns the list of command line arguments (the first being the
+    program) that KLEE ran when it generated ``ktestFile``.
+  """
+  try:
+    with open(ktestFile, 'rb') as f:
+      data = f.read()
+  except (IOError, OSError) as e:
+    raise ReplayException('Failed to read "{}": {}'.format(ktestFile, e))
+  magic = None
+  for m in _ktestMagics:
+    if data.startswith(m):
+      magic = m
+  if magic is None:
+    raise ReplayException('"{}" is not a ktest file'.format(ktestFile))
+  offset = len(magic)
+  try:
+    # Big endian version and argument count
+    (_, argCount) = struct.unpack_from('>II', data, offset)
+    offset += 8
+    args = []
+    for _ in range(argCount):
+      (size,) = struct.unpack_from('>I', data, offset)
+      offset += 4
+      if offset + size > len(data):
+        raise ReplayException('"{}" is truncated'.format(ktestFile))
+      args.append(data[offset:offset + size].decode('utf-8', 'replace'))
+      offset += size
+  except struct.error:
+    raise ReplayException('"{}" is truncated'.format(ktestFile))
+  if len(args) == 0:
+    raise ReplayException('"{}" records no program'.format(ktestFile))
+  return args
+
+def findKTestFiles(directory):
+  """
+    Returns a sorted list of the ``.ktest`` files in ``directory`` (and
+    its sub-directories).
+  """
+  ktestFiles = []
+  for (dirPath, dirNames, fileNames) in os.walk(directory):
+    for fileName in fileNames:
+      if fileName.endswith('.ktest'):
+        ktestFiles.append(os.path.join(dirPath, fileName))
+  ktestFiles.sort()
+  return ktestFiles
+
+class ReplayTarget(util.SlotsPickleMixin):
+  """
+    The native binary of a benchmark to replay test cases against.
+  """
+  __slots__ = ('augmentedSpecFile', 'exePath', 'environmentVariables')
+  def __init__(self, augmentedSpecFile, exePath, environmentVariables):
+    self.augmentedSpecFile = augmentedSpecFile
+    self.exePath = exePath
+    self.environmentVariables = environmentVariables
+
+class ProgramIndex(object):
+  """
+    Maps the program recorded in a ``.ktest`` file to the ``ReplayTarget``
+    of its benchmark. Programs are looked up by the name of their file
+    (e.g. ``<target>.bc`` or ``<target>``) so that test cases generated
+    on another machine can be replayed. The ``.bc`` extension is ignored
+    if the augmented spec file has no ``llvm_bc_path``.
+  """
+  def __init__(self):
+    self._targets = {}
+
+  def add(self, benchmarkObj, augmentedSpecFile):
+    augmentedSpecFile = os.path.abspath(augmentedSpecFile)
+    exePath = benchmarkObj.misc.get('exe_path', None)
+    if exePath is None:
+      raise ReplayException('"{}" has no "misc.exe_path"'.format(augmentedSpecFile))
+    target = ReplayTarget(augmentedSpecFile,
+                          os.path.join(os.path.dirname(augmentedSpecFile), exePath),
+                          benchmarkObj.runtimeEnvironment['environment_variables'])
+    names = set([ os.path.basename(exePath) ])
+    if 'llvm_bc_path' in benchmarkObj.misc:
+      names.add(os.path.basename(benchmarkObj.misc['llvm_bc_path']))
+    for name in names:
+      if name in self._targets:
+        raise ReplayException('Program "{}" of "{}" is also used by "{}"'.format(
+          name, augmentedSpecFile, self._targets[name].augmentedSpecFile))
+      self._targets[name] = target
+
+  def __len__(self):
+    return len(set(t.augmentedSpecFile for t in self._targets.values()))
+
+  def get(self, program):
+    """
+      Returns the ``ReplayTarget`` of ``program`` or None if it is not in
+      the index.
+    """
+    name = os.path.basename(program)
+    target = self._targets.get(name, None)
+    if target is None and name.endswith('.bc'):
+      # The bitcode extracted from the binary by wllvm
+      target = self._targets.get(name[:-len('.bc')], None)
+    return target
+
+def parseAssertionFailure(stderr):
+  """
+    Returns the location (a dictionary with ``file`` and ``line``) of the
+    last assertion failure reported in ``stderr`` or None.
+  """
+  location = None
+  for regex in _assertionRegexes:
+    for match in regex.finditer(stderr):
+      location = { 'file': match.group('file'), 'line': int(match.group('line')) }
+  return location
+
+def getFailureTask(signalNumber, stderr, location):
+  """
+    Returns the verification task that a program killed by
+    ``signalNumber`` (with standard error ``stderr`` and assertion
+    failure ``location`` from ``parseAssertionFailure()``) shows is
+    incorrect or None if it is not known.
+  """
+  if location is not None:
+    return 'no_assert_fail'
+  if signalNumber == signal.SIGABRT:
+    if 'free()' in stderr or 'double free' in stderr:
+      return 'no_invalid_free'
+    # `__VERIFIER_error()` aborts
+    return 'no_reach_error_function'
+  if signalNumber == signal.SIGFPE:
+    return 'no_integer_division_by_zero'
+  if signalNumber in (signal.SIGSEGV, signal.SIGBUS):
+    return 'no_invalid_deref'
+  return None
+
+class ReplayOptions(util.SlotsPickleMixin):
+  """
+    Options for replaying test cases.
+
+    ``programIndex``: ``ProgramIndex`` of the benchmarks.
+    ``expectationIndex``: ``check.ExpectationIndex`` of the benchmarks.
+    ``timeout``: wallclock timeout in seconds for each replay (None for no limit).
+    ``memoryLimit``: maximum address space in bytes of each replay (None for no limit).
+  """
+  __slots__ = ('programIndex', 'expectationIndex', 'timeout', 'memoryLimit')
+  def __init__(self, programIndex, expectationIndex, timeout=None, memoryLimit=None):
+    self.programIndex = programIndex
+    self.expectationIndex = expectationIndex
+    self.timeout = timeout
+    self.memoryLimit = memoryLimit
+
+def replayKTest(ktestFile, options):
+  """
+    Replay ``ktestFile`` against the native binary of its benchmark and
+    return a record (a dictionary). The record is also a result record
+    that can be classified by ``check.classify()``. Its keys are
+
+    ``ktest_file``: ``ktestFile``.
+    ``augmented_spec_file``: the augmented spec file of the benchmark (None if not known).
+    ``program``: the native binary that was run (None if not known).
+    ``outcome``: one of ``Outcomes``.
+    ``exit_code``: the exit code of the program (None if it was killed or not run).
+    ``signal``: the number of the signal that killed the program (or None).
+    ``wallclock_time``: the time in seconds the program ran for (None if not run).
+    ``task``: the verification task the failure shows is incorrect (or None).
+    ``result``: ``incorrect`` if the failure was reproduced, ``timeout`` if the
+    program timed out and ``unknown`` otherwise.
+    ``counter_examples``: list of the location of the assertion failure (if any).
+    ``classification``: one of ``check.Classifications`` if the failure was reproduced (None otherwise).
+    ``message``: a message explaining an ``error`` outcome or classification (None otherwise).
+  """
+  record = _newRecord(ktestFile)
+  try:
+    args = readKTestArguments(ktestFile)
+  except ReplayException as e:
+    record['message'] = str(e)
+    return record
+  target = options.programIndex.get(args[0])
+  if target is None:
+    record['message'] = 'Program "{}" is not a known benchmark'.format(args[0])
+    return record
+  record['augmented_spec_file'] = target.augmentedSpecFile
+  record['program'] = target.exePath
+
+  commandLine = [ target.exePath ] + args[1:]
+  env = dict(os.environ)
+  for (name, value) in target.environmentVariables.items():
+    env[name] = str(value)
+  env['KTEST_FILE'] = os.path.abspath(ktestFile)
+  with open(os.devnull, 'r+') as devNull, tempfile.TemporaryFile('w+') as stderrFile:
+    try:
+      (returnCode, timedOut, record['wallclock_time']) = runner.runProcess(
+        commandLine, os.path.dirname(target.exePath), env, devNull, devNull, stderrFile,
+        options.timeout, options.memoryLimit)
+    except OSError as e:
+      record['message'] = 'Failed to run "{}": {}'.format(commandLine[0], e)
+      return record
+    stderrFile.seek(0)
+    stderr = stderrFile.read()
+
+  if returnCode < 0:
+    record['signal'] = -returnCode
+  else:
+    record['exit_code'] = returnCode
+  if timedOut:
+    record['outcome'] = 'timeout'
+    record['result'] = 'timeout'
+    return record
+  if _ktestErrorPrefix in stderr:
+    record['message'] = 'Test case does not match the program'
+    return record
+  location = parseAssertionFailure(stderr)
+  task = None
+  if returnCode < 0:
+    task = getFailureTask(-returnCode, stderr, location)
+  if task is None:
+    record['outcome'] = 'not_reproduced'
+    return record
+  record['outcome'] = 'reproduced'
+  record['task'] = task
+  record['result'] = 'incorrect'
+  if location is not None:
+    record['counter_examples'] = [ location ]
+  (record['classification'], record['message']) = check.classify(record, options.expectationIndex)
+  return record
+
+def _newRecord(ktestFile):
+  """
+    Returns the record (see ``replayKTest()``) of ``ktestFile`` before it
+    is replayed.
+  """
+  return {
+    'ktest_file': ktestFile,
+    'augmented_spec_file': None,
+    'program': None,
+    'outcome': 'error',
+    'exit_code': None,
+    'signal': None,
+    'wallclock_time': None,
+    'task': None,
+    'result': 'unknown',
+    'counter_examples': [],
+    'classification': None,
+    'message': None,
+  }
+
+def _onReplayKTestError(ktestFile, options, e):
+  record = _newRecord(ktestFile)
+  record['message'] = '{}: {}'.format(type(e).__name__, e)
+  return record
+
+def replayKTests(ktestFiles, options, workers=None):
+  """
+    Generator that replays ``ktestFiles`` using ``workers`` processes
+    (default: number of CPUs) and yields the record (see
+    ``replayKTest()``) of each test case in the same order as
+    ``ktestFiles``.
+  """
+  # Test cases usually run quickly and there can be many of them so hand
+  # them out in chunks.
+  return util.mapInPool(replayKTest, ktestFiles, options, workers, chunkSize=None, onError=_onReplayKTestError)
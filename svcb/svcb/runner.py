@@ -0,0 +1,275 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Run the jobs of a klee-runner invocation info file on this machine.
+
+Each job runs in its own (working) directory with its standard output
+and error redirected to files in that directory. Jobs whose program is LLVM bitcode are run with
+KLEE, other jobs are run natively. Jobs are run by a bounded pool of
+worker processes and each job is subject to a wallclock timeout and a
+memory limit (``RLIMIT_AS``).
+
+The result of each job is a dictionary in the same style as the
+klee-runner result info format (see ``runJob()``).
+"""
+from . import util
+import json
+import logging
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import yaml
+
+_logger = logging.getLogger(__name__)
+
+Tools = ('auto', 'native', 'klee')
+
+class RunnerException(Exception):
+  pass
+
+class RunOptions(util.SlotsPickleMixin):
+  """
+    Options for running jobs.
+
+    ``outputDir``: directory to create a directory in for each job.
+    ``tool``: one of ``Tools``. ``auto`` runs LLVM bitcode (``.bc``)
+    programs with KLEE and other programs natively.
+    ``kleePath``: path to the KLEE executable (None if not available).
+    ``kleeArgs``: extra arguments to pass to KLEE before the program.
+    ``timeout``: wallclock timeout in seconds for each job (None for no limit).
+    ``memoryLimit``: maximum address space in bytes of each job (None for no limit).
+  """
+  __slots__ = ('outputDir', 'tool', 'kleePath', 'kleeArgs', 'timeout', 'memoryLimit')
+  def __init__(self, outputDir, tool='auto', kleePath=None, kleeArgs=None, timeout=None, memoryLimit=None):
+    assert tool in Tools
+    self.outputDir = outputDir
+    self.tool = tool
+    self.kleePath = kleePath
+    self.kleeArgs = list(kleeArgs) if kleeArgs is not None else []
+    self.timeout = timeout
+    self.memoryLimit = memoryLimit
+
+def findExecutable(name):
+  """
+    Returns the absolute path to the executable ``name`` in ``PATH``
+    or None if it cannot be found.
+  """
+  for directory in os.environ.get('PATH', '').split(os.pathsep):
+    path = os.path.join(directory, name)
+    if os.path.isfile(path) and os.access(path, os.X_OK):
+      return os.path.abspath(path)
+  return None
+
+def loadJobs(openFile):
+  """
+    Returns the list of jobs in an invocation info file. All the
+    formats written by ``svcb-emit-klee-runner-invocation-info.py`` are
+    supported (a YAML or JSON document with a ``jobs`` list, a YAML
+    stream of jobs or a JSON object per line).
+  """
+  data = openFile.read() if hasattr(openFile, 'read') else openFile
+  try:
+    documents = [ util.loadYaml(data) ]
+  except yaml.YAMLError:
+    # A stream of jobs
+    if data.lstrip()[:1] == '{':
+      try:
+        documents = [ json.loads(line) for line in data.splitlines() if len(line.strip()) > 0 ]
+      except ValueError as e:
+        raise RunnerException('Failed to parse JSON lines: {}'.format(e))
+    else:
+      try:
+        documents = list(yaml.load_all(data, Loader=util._loader))
+      except yaml.YAMLError as e:
+        raise RunnerException('Failed to parse YAML: {}'.format(e))
+  if len(documents) == 1 and isinstance(documents[0], dict) and 'jobs' in documents[0]:
+    jobs = documents[0]['jobs']
+  else:
+    jobs = [ d for d in documents if d is not None ]
+  for job in jobs:
+    if not isinstance(job, dict) or 'program' not in job:
+      raise RunnerException('Job "{}" has no program'.format(job))
+  return jobs
+
+def getTool(job, options):
+  """
+    Returns the tool (``native`` or ``klee``) used to run ``job``.
+  """
+  if options.tool == 'auto':
+    return 'klee' if job['program'].endswith('.bc') else 'native'
+  return options.tool
+
+def getKleeOutputDir(jobDir):
+  """
+    Returns the directory KLEE writes its output to when running the
+    job in ``jobDir``.
+  """
+  return os.path.join(jobDir, 'klee-out')
+
+def getCommandLine(job, jobDir, options):
+  """
+    Returns the command line (a list) to run ``job`` with. Raises
+    ``RunnerException`` if the job cannot be run.
+  """
+  program = job['program']
+  tool = getTool(job, options)
+  args = [ str(arg) for arg in job.get('command_line_arguments', []) ]
+  if tool == 'native':
+    return [ program ] + args
+  assert tool == 'klee'
+  if options.kleePath is None:
+    raise RunnerException('KLEE is needed to run "{}" but was not found'.format(program))
+  for arg in options.kleeArgs:
+    if arg.lstrip('-').startswith('output-dir'):
+      raise RunnerException('"{}" cannot be passed to KLEE because the output directory is set for each job'.format(arg))
+  return ([ options.kleePath, '--output-dir={}'.format(getKleeOutputDir(jobDir)) ] +
+          options.kleeArgs + [ program ] + args)
+
+def runJob(job, jobDir, options):
+  """
+    Run ``job`` in ``jobDir`` (which is created) and return its result.
+    The result is a dictionary with the keys
+
+    ``invocation_info``: ``job``.
+    ``command_line``: the command line that was run.
+    ``working_directory``: ``jobDir``.
+    ``exit_code``: the exit code of the program (None if it was killed by a signal or could not be run).
+    ``signal``: the number of the signal that killed the program (or None).
+    ``timeout``: True if the program was killed because it exceeded the timeout.
+    ``wallclock_time``: the time in seconds the program ran for.
+    ``stdout_file``/``stderr_file``: files holding the output of the program.
+    ``error``: a message if the program could not be run (None otherwise).
+  """
+  result = _newResult(job, jobDir)
+  try:
+    if not os.path.isdir(jobDir):
+      os.makedirs(jobDir)
+    commandLine = getCommandLine(job, jobDir, options)
+    # KLEE refuses to use an existing output directory so remove the one
+    # left by a previous run of the job.
+    kleeOutputDir = getKleeOutputDir(jobDir)
+    if getTool(job, options) == 'klee' and os.path.lexists(kleeOutputDir):
+      if os.path.isdir(kleeOutputDir) and not os.path.islink(kleeOutputDir):
+        shutil.rmtree(kleeOutputDir)
+      else:
+        os.remove(kleeOutputDir)
+  except (RunnerException, OSError) as e:
+    result['error'] = str(e)
+    return result
+  result['command_line'] = commandLine
+
+  env = dict(os.environ)
+  for (name, value) in job.get('environment_variables', {}).items():
+    env[name] = str(value)
+
+  with open(os.devnull, 'r') as stdinFile, \
+       open(result['stdout_file'], 'w') as stdoutFile, \
+       open(result['stderr_file'], 'w') as stderrFile:
+    try:
+      (returnCode, timedOut, result['wallclock_time']) = runProcess(
+        commandLine, jobDir, env, stdinFile, stdoutFile, stderrFile,
+        options.timeout, options.memoryLimit)
+    except OSError as e:
+      result['error'] = 'Failed to run "{}": {}'.format(commandLine[0], e)
+      return result
+
+  if returnCode < 0:
+    result['signal'] = -returnCode
+  else:
+    result['exit_code'] = returnCode
+  result['timeout'] = timedOut
+  return result
+
+def _newResult(job, jobDir):
+  """
+    Returns the result (see ``runJob()``) of ``job`` before it is run.
+  """
+  return {
+    'invocation_info': job,
+    'command_line': None,
+    'working_directory': jobDir,
+    'exit_code': None,
+    'signal': None,
+    'timeout': False,
+    'wallclock_time': None,
+    'stdout_file': os.path.join(jobDir, 'stdout.txt'),
+    'stderr_file': os.path.join(jobDir, 'stderr.txt'),
+    'error': None,
+  }
+
+def runProcess(commandLine, cwd, env, stdin, stdout, stderr, timeout=None, memoryLimit=None):
+  """
+    Run ``commandLine`` in its own process group and wait for it to
+    finish. The process group is killed if it runs for longer than
+    ``timeout`` seconds and the process' address space is limited to
+    ``memoryLimit`` bytes (if not None). Raises ``OSError`` if the
+    process cannot be started.
+
+    Returns a tuple of the return code of the process (negative if it
+    was killed by a signal), True if it was killed because of the
+    timeout and the time in seconds it ran for.
+  """
+  def _setLimits():
+    # Put the process in its own process group so that the whole group
+    # (e.g. processes it forks) can be killed on timeout.
+    os.setsid()
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if memoryLimit is not None:
+      resource.setrlimit(resource.RLIMIT_AS, (memoryLimit, memoryLimit))
+
+  timedOut = threading.Event()
+  startTime = time.time()
+  process = subprocess.Popen(commandLine,
+                             cwd=cwd,
+                             env=env,
+                             stdin=stdin,
+                             stdout=stdout,
+                             stderr=stderr,
+                             preexec_fn=_setLimits,
+                             close_fds=True)
+  def _kill():
+    timedOut.set()
+    try:
+      os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+      # Already exited
+      pass
+  timer = None
+  if timeout is not None:
+    timer = threading.Timer(timeout, _kill)
+    timer.start()
+  try:
+    returnCode = process.wait()
+  finally:
+    if timer is not None:
+      timer.cancel()
+  wallclockTime = time.time() - startTime
+  # The timer may fire just after the program exited by itself
+  return (returnCode, timedOut.is_set() and returnCode == -signal.SIGKILL, wallclockTime)
+
+def _getJobDir(index, options):
+  return os.path.join(options.outputDir, 'job-{}'.format(index))
+
+def _runJob(indexAndJob, options):
+  (index, job) = indexAndJob
+  return runJob(job, _getJobDir(index, options), options)
+
+def _onRunJobError(indexAndJob, options, e):
+  (index, job) = indexAndJob
+  result = _newResult(job, _getJobDir(index, options))
+  result['error'] = '{}: {}'.format(type(e).__name__, e)
+  return result
+
+def runJobs(jobs, options, workers=None):
+  """
+    Generator that runs ``jobs`` using ``workers`` processes (default:
+    number of CPUs) and yields the result (see ``runJob()``) of each job
+    in the same order as ``jobs``. The directory of the job at index
+    ``i`` is ``job-<i>`` inside ``options.outputDir``.
+  """
+  # Jobs are long running so hand them out one at a time
+  return util.mapInPool(_runJob, enumerate(jobs), options, workers, chunkSize=1, onError=_onRunJobError)
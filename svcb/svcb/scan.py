@@ -0,0 +1,160 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Discover and load benchmark specification files in a directory tree.
+
+Loading (parsing YAML, validating and expanding variants) is spread
+across a pool of worker processes. Results are always given back in
+the order the files were discovered (sorted by path) so the output of
+tools is deterministic regardless of the number of jobs.
+
+An optional ``filters.BenchmarkFilter`` is applied in the worker
+processes so rejected benchmarks are never fully built or sent back
+to the caller.
+"""
+from . import cache
+from . import schema
+from . import util
+import logging
+import os
+
+_logger = logging.getLogger(__name__)
+
+DefaultSpecFileName = 'spec.yml'
+
+def _listDirectory(directory):
+  """
+    Returns a tuple (subDirectories, fileNames) of the
+    entries in ``directory``. Symbolic links to directories
+    are not followed (matching ``os.walk()``).
+  """
+  subDirectories = []
+  fileNames = []
+  if hasattr(os, 'scandir'):
+    for entry in os.scandir(directory):
+      if entry.is_dir(follow_symlinks=False):
+        subDirectories.append(entry.name)
+      else:
+        fileNames.append(entry.name)
+  else:
+    # Python < 3.5
+    for name in os.listdir(directory):
+      fullPath = os.path.join(directory, name)
+      if os.path.isdir(fullPath) and not os.path.islink(fullPath):
+        subDirectories.append(name)
+      else:
+        fileNames.append(name)
+  return (subDirectories, fileNames)
+
+def findSpecFiles(rootDirectory, specFileName=DefaultSpecFileName):
+  """
+    Returns a list of the paths to files named ``specFileName``
+    found by recursively traversing ``rootDirectory``. The list is in a
+    deterministic (depth first, sorted by name) order.
+  """
+  specFiles = []
+  pending = [ rootDirectory ]
+  while len(pending) > 0:
+    directory = pending.pop()
+    try:
+      (subDirectories, fileNames) = _listDirectory(directory)
+    except OSError as e:
+      _logger.warning('Failed to read directory "{}": {}'.format(directory, e))
+      continue
+    if specFileName in fileNames:
+      specFiles.append(os.path.join(directory, specFileName))
+    # Push in reverse so that directories are popped in sorted order
+    for subDirectory in sorted(subDirectories, reverse=True):
+      pending.append(os.path.join(directory, subDirectory))
+  return specFiles
+
+class ScanResult(util.SlotsPickleMixin):
+  """
+    The result of loading a single benchmark specification file.
+
+    On success ``benchmarks`` is the list of ``Benchmark`` objects declared
+    by the file and ``error`` is None. On failure ``benchmarks`` is None and
+    ``error`` is a message describing the failure. ``isValidationError``
+    is True if the failure was due to the file not conforming to the schema.
+
+    ``benchmarks`` only contains the benchmarks accepted by the filter
+    (if any). ``filteredOutNames`` is a list of the names of the
+    rejected benchmarks.
+  """
+  __slots__ = ('fileName', 'benchmarks', 'filteredOutNames', 'error', 'isValidationError')
+  def __init__(self, fileName, benchmarks=None, filteredOutNames=None, error=None, isValidationError=False):
+    assert (benchmarks is None) != (error is None)
+    self.fileName = fileName
+    self.benchmarks = benchmarks
+    self.filteredOutNames = filteredOutNames if filteredOutNames is not None else []
+    self.error = error
+    self.isValidationError = isValidationError
+
+  @property
+  def success(self):
+    return self.error is None
+
+class _LoadOptions(util.SlotsPickleMixin):
+  """
+    Options for ``_loadSpecFile()``. Each process creates its own
+    ``cache.SpecCache`` the first time it is used.
+  """
+  __slots__ = ('cacheDir', 'benchmarkFilter', '_specCache')
+  def __init__(self, cacheDir, benchmarkFilter):
+    self.cacheDir = cacheDir
+    self.benchmarkFilter = benchmarkFilter
+    self._specCache = None
+
+  @property
+  def specCache(self):
+    if self._specCache is None:
+      self._specCache = cache.SpecCache.fromEnvironment(self.cacheDir)
+    return self._specCache
+
+def _loadSpecFile(fileName, options):
+  try:
+    (benchSpec, benchmarkObjs) = options.specCache.loadBenchmarkSpecificationAndBenchmarks(fileName)
+  except schema.BenchmarkSpecificationValidationError as e:
+    return ScanResult(fileName, error=e.message, isValidationError=True)
+  filteredOutNames = None
+  if options.benchmarkFilter is not None:
+    (benchmarkObjs, rejected) = options.benchmarkFilter.apply(benchSpec, benchmarkObjs)
+    filteredOutNames = [ b.name for b in rejected ]
+  return ScanResult(fileName, benchmarks=benchmarkObjs, filteredOutNames=filteredOutNames)
+
+def _onLoadSpecFileError(fileName, options, e):
+  return ScanResult(fileName, error='{}: {}'.format(type(e).__name__, e))
+
+def loadSpecFiles(specFiles, jobs=None, cacheDir=None, benchmarkFilter=None):
+  """
+    Generator that loads each of the benchmark specification files
+    in ``specFiles`` and yields a ``ScanResult`` for each one in the
+    same order as ``specFiles``.
+
+    ``jobs`` is the number of worker processes to use (default: number
+    of CPUs). If it is 1 files are loaded in the calling process.
+    ``cacheDir`` is passed to ``cache.SpecCache.fromEnvironment()``.
+    ``benchmarkFilter`` is an optional ``filters.BenchmarkFilter``.
+  """
+  return util.mapInPool(_loadSpecFile, specFiles, _LoadOptions(cacheDir, benchmarkFilter), jobs,
+                        chunkSize=None, onError=_onLoadSpecFileError)
+
+def scanBenchmarks(rootDirectory, jobs=None, cacheDir=None, benchmarkFilter=None, specFileName=DefaultSpecFileName):
+  """
+    Generator that yields a ``ScanResult`` for every benchmark
+    specification file found in ``rootDirectory``.
+  """
+  return loadSpecFiles(findSpecFiles(rootDirectory, specFileName),
+                       jobs=jobs,
+                       cacheDir=cacheDir,
+                       benchmarkFilter=benchmarkFilter)
+
+def iterBenchmarks(scanResults):
+  """
+    Generator that yields the ``Benchmark`` objects of the successful
+    ``ScanResult`` objects in ``scanResults``.
+  """
+  for scanResult in scanResults:
+    if scanResult.success:
+      for benchmarkObj in scanResult.benchmarks:
+        yield benchmarkObj
@@ -7,6 +7,7 @@ import os
 import pprint
 import yaml
 import jsonschema
+import jsonschema.validators
 
 class BenchmarkSpecificationValidationError(Exception):
   def __init__(self, message, absoluteSchemaPath=None):
@@ -24,18 +25,62 @@ def loadBenchmarkSpecification(openFile):
   validateBenchmarkSpecification(benchSpec)
   return benchSpec
 
+# Cache of the parsed schema. See ``getSchema()``.
+_schema = None
+
 def getSchema():
   """
     Return the Schema for SV-COMP benchmark specification
     files.
+
+    The schema file is only parsed on the first call. Subsequent
+    calls return the same object so clients must not modify it.
   """
+  global _schema
+  if _schema is not None:
+    return _schema
   yamlFile = os.path.join(os.path.dirname(__file__), 'schema.yml')
   schema = None
   with open(yamlFile, 'r') as f:
     schema = util.loadYaml(f)
   assert isinstance(schema, dict)
   assert '__version__' in schema
-  return schema
+  _schema = schema
+  return _schema
+
+class _CachedValidator(object):
+  """
+    A validator built for a particular schema. The schema is
+    only checked against the metaschema when it is built.
+  """
+  def __init__(self, schema):
+    assert isinstance(schema, dict)
+    self.schema = schema
+    validatorClass = jsonschema.validators.validator_for(schema)
+    # Only check the schema against the metaschema once.
+    validatorClass.check_schema(schema)
+    self.validator = validatorClass(schema)
+
+# Maps a schema's ``__version__`` to a ``_CachedValidator``.
+# See ``getValidator()``.
+_validators = {}
+
+def getValidator(schema=None):
+  """
+    Return a ``_CachedValidator`` for ``schema`` (defaults to ``getSchema()``).
+
+    Validators are cached by the schema's ``__version__`` so the
+    metaschema check and construction of the validator only happen
+    once per schema.
+  """
+  if schema == None:
+    schema = getSchema()
+  assert '__version__' in schema
+  cached = _validators.get(schema['__version__'])
+  if cached is None or cached.schema is not schema:
+    cached = _CachedValidator(schema)
+    _validators[schema['__version__']] = cached
+  return cached
 
 def getAllArchitectures(schema=None):
   if schema == None:
@@ -76,9 +121,11 @@ def validateBenchmarkSpecification(benchSpec, schema=None):
           schema['__version__']))
 
   # Validate against the schema
-  try:
-    jsonschema.validate(benchSpec, schema)
-  except jsonschema.exceptions.ValidationError as e:
+  # Error objects are only built if ``benchSpec`` is invalid. The first
+  # error is reported.
+  validator = getValidator(schema).validator
+  if not validator.is_valid(benchSpec):
+    e = next(iter(validator.iter_errors(benchSpec)))
     raise BenchmarkSpecificationValidationError(
         str(e),
         e.absolute_schema_path)
@@ -113,7 +160,7 @@ def validateBenchmarkSpecification(benchSpec, schema=None):
     globalMacroNames.update(benchSpec['defines'].keys())
   if 'variants' in benchSpec:
     for (variantName, variantProperties) in benchSpec['variants'].items():
-      macrosForVariant = copy.deepcopy(globalMacroNames)
+      macrosForVariant = set(globalMacroNames)
       if 'defines' in variantProperties:
         for macroName in variantProperties['defines'].keys():
           if macroName in macrosForVariant:
@@ -1,13 +1,153 @@
 # Copyright (c) 2016, Daniel Liew
 # This file is covered by the license in LICENSE-SVCB.txt
+import json
+import multiprocessing
+import signal
+import sys
 import yaml
 
+if sys.version_info >= (3,):
+  stringTypes = (str,)
+  integerTypes = (int,)
+else:
+  stringTypes = (str, unicode)
+  integerTypes = (int, long)
+
 if hasattr(yaml, 'CLoader'):
   # Use libyaml which is faster
   _loader = yaml.CLoader
 else:
   _loader = yaml.Loader
 
+if hasattr(yaml, 'CDumper'):
+  # Use libyaml which is faster
+  _dumper = yaml.CDumper
+else:
+  _dumper = yaml.Dumper
+
+def _isJson(data):
+  if sys.version_info < (3,):
+    # `json` gives unicode strings rather than `str` on Python 2
+    return False
+  prefix = data[:64].lstrip()
+  if isinstance(prefix, bytes):
+    return prefix[:1] in (b'{', b'[')
+  return prefix[:1] in ('{', '[')
+
 def loadYaml(openFile):
-  return yaml.load(openFile, Loader=_loader)
+  """
+    Load YAML from an open file or a string. Documents that are JSON
+    (which is a subset of YAML) are loaded using the faster ``json``
+    module.
+  """
+  data = openFile.read() if hasattr(openFile, 'read') else openFile
+  if _isJson(data):
+    try:
+      if isinstance(data, bytes):
+        data = data.decode('utf-8')
+      return json.loads(data)
+    except ValueError:
+      # Not JSON (e.g. a YAML flow mapping)
+      pass
+  return yaml.load(data, Loader=_loader)
+
+def dumpYaml(data):
+  """
+    Returns ``data`` as a YAML string in block style.
+  """
+  return yaml.dump(data, Dumper=_dumper, default_flow_style=False)
+
+def dumpJson(data):
+  """
+    Returns ``data`` as an (indented) JSON string. This is also valid YAML
+    and much faster to load.
+  """
+  return json.dumps(data, indent=2, sort_keys=True) + '\n'
+
+class SlotsPickleMixin(object):
+  """
+    Makes instances of a class that uses ``__slots__`` (and so has no
+    ``__dict__``) picklable (e.g. so that they can be sent to worker
+    processes). Every slot must be set.
+  """
+  __slots__ = ()
+
+  def __getstate__(self):
+    return tuple(getattr(self, attr) for attr in self.__slots__)
+
+  def __setstate__(self, state):
+    for (attr, value) in zip(self.__slots__, state):
+      setattr(self, attr, value)
+
+def getDefaultJobs():
+  """
+    Returns the default number of worker processes (the number of CPUs).
+  """
+  try:
+    return multiprocessing.cpu_count()
+  except NotImplementedError:
+    return 1
+
+# Per process state used by `_callInWorker()`
+_workerFunc = None
+_workerOptions = None
+_workerOnError = None
+
+def _initWorker(func, options, onError):
+  global _workerFunc, _workerOptions, _workerOnError
+  _workerFunc = func
+  _workerOptions = options
+  _workerOnError = onError
+  # Let the parent process handle interrupts
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _callInWorker(item):
+  return _call(_workerFunc, item, _workerOptions, _workerOnError)
+
+def _call(func, item, options, onError):
+  try:
+    return func(item, options)
+  except Exception as e:
+    if onError is None:
+      raise
+    # Exceptions are not guaranteed to survive being sent back from a
+    # worker process so they are turned into a result.
+    return onError(item, options, e)
+
+def mapInPool(func, items, options, workers=None, chunkSize=1, onError=None):
+  """
+    Generator that calls ``func(item, options)`` for each of ``items``
+    using ``workers`` processes (default: ``getDefaultJobs()``) and yields
+    the results in the same order as ``items``. If only one worker is
+    needed ``func`` is called in the calling process.
+
+    If ``func`` raises an exception the result is
+    ``onError(item, options, exception)`` instead. ``func`` and
+    ``onError`` must be module level functions and ``options`` and the
+    results must be picklable. Items are handed out ``chunkSize`` at a
+    time. If ``chunkSize`` is None it is chosen so that the work is
+    spread evenly.
+  """
+  items = list(items)
+  if workers is None:
+    workers = getDefaultJobs()
+  assert workers > 0
+  workers = min(workers, len(items))
+  if workers <= 1:
+    for item in items:
+      yield _call(func, item, options, onError)
+    return
 
+  if chunkSize is None:
+    # Large enough to amortize the IPC overhead but small enough
+    # that the work is spread evenly.
+    chunkSize = max(1, min(64, len(items) // (workers * 8)))
+  pool = multiprocessing.Pool(processes=workers, initializer=_initWorker, initargs=(func, options, onError))
+  try:
+    for result in pool.imap(_callInWorker, items, chunkSize):
+      yield result
+    pool.close()
+  finally:
+    # Handles the consumer not exhausting the generator
+    pool.terminate()
+    pool.join()
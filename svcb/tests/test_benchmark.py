@@ -221,3 +221,83 @@ class TestBenchmark(unittest.TestCase):
       self.assertTrue(isinstance(properties, dict))
       self.assertTrue('correct' in properties)
       self.assertEqual(properties['correct'], True)
+
+  def testVariantsDoNotModifySpecOrEachOther(self):
+    counterExamples = [ { 'locations': [ { 'file': 'a.c', 'line': 1 } ] } ]
+    s = {
+      'architectures': ['x86_64'],
+      'categories': ['xxx'],
+      'language': 'c99',
+      'misc': { 'dummy': 1 },
+      'name': 'basename',
+      'sources': ['a.c'],
+      'verification_tasks': {
+        'no_assert_fail': { 'correct': False, 'counter_examples': counterExamples }
+      },
+      'variants': {
+        'foo': { 'defines': { 'FOO': None } },
+        'bar': { 'defines': { 'BAR': None } },
+      }
+    }
+    self.appendSchemaVersion(s)
+    schema.validateBenchmarkSpecification(s, schema=self.persistentSchema)
+    original = copy.deepcopy(s)
+    benchmarkObjs = svcb.benchmark.getBenchmarks(s)
+    self.assertEqual(len(benchmarkObjs), 2)
+    self.assertEqual(s, original)
+    (first, second) = benchmarkObjs
+    # Unmodified data is shared rather than copied
+    self.assertIs(first.sources, second.sources)
+    self.assertIs(
+      first.verificationTasks['no_assert_fail']['counter_examples'],
+      second.verificationTasks['no_assert_fail']['counter_examples'])
+    # `misc` is private to each benchmark
+    first.getInternalRepr()['misc']['exe_path'] = 'foo'
+    self.assertEqual(second.misc, { 'dummy': 1 })
+    self.assertEqual(s['misc'], { 'dummy': 1 })
+
+  def testLazyBenchmarks(self):
+    s = {
+      'architectures': ['x86_64'],
+      'categories': ['xxx', 'cheese'],
+      'defines': { 'DUMMY':'1' },
+      'language': 'c99',
+      'name': 'basename',
+      'sources': ['a.c'],
+      'variants': {
+        'foo': {
+          'verification_tasks':{ 'no_assert_fail': {'correct': True} },
+          'defines': {'FAIL':'0'},
+          'categories': ['foo_category'],
+        },
+        'bar': {
+          'verification_tasks':{ 'no_assert_fail': {'correct': False} },
+          'description': 'This is bar',
+        }
+      }
+    }
+    self.appendSchemaVersion(s)
+    schema.validateBenchmarkSpecification(s, schema=self.persistentSchema)
+    eagerObjs = svcb.benchmark.getBenchmarks(copy.deepcopy(s))
+    lazyObjs = svcb.benchmark.getBenchmarks(s, lazy=True)
+    self.assertEqual(len(lazyObjs), 2)
+    for b in lazyObjs:
+      self.assertTrue(b.isLazy)
+    for b in eagerObjs:
+      self.assertFalse(b.isLazy)
+    fooBenchmark = list(filter(lambda b: b.name == 'basename_foo', lazyObjs))[0]
+    self.assertEqual(fooBenchmark.categories, {'cheese', 'foo_category', 'xxx'})
+    # Only the accessed fields have been computed
+    self.assertTrue(fooBenchmark.isLazy)
+    self.assertEqual(set(fooBenchmark._data.keys()), {'name', 'categories'})
+    # Modifications before all fields are computed are preserved
+    fooBenchmark.misc['exe_path'] = 'foo'
+    self.assertEqual(fooBenchmark.getInternalRepr()['misc'], {'exe_path': 'foo'})
+    self.assertFalse(fooBenchmark.isLazy)
+    fooBenchmark.misc.clear()
+
+    # Fully computed lazy benchmarks are the same as eagerly created benchmarks
+    key = lambda b: b.name
+    self.assertEqual(
+      [ b.getInternalRepr() for b in sorted(eagerObjs, key=key) ],
+      [ b.getInternalRepr() for b in sorted(lazyObjs, key=key) ])
@@ -0,0 +1,135 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+from svcb import schema
+import svcb.benchmark
+import svcb.build
+import os
+import tempfile
+import unittest
+
+class TestGenerateCMakeDecls(unittest.TestCase):
+  def setUp(self):
+    self.sourceRootDir = tempfile.gettempdir()
+    self.dispatcher = svcb.build.CMakeDependencyDispatcher.getDefaultDispatcher()
+
+  def getBenchmarks(self, variants, architectures='any'):
+    s = {
+      'architectures': architectures,
+      'categories': ['xxx'],
+      'language': 'c99',
+      'name': 'foo',
+      'schema_version': schema.getSchema()['__version__'],
+      'sources': ['main.c'],
+      'variants': variants,
+      'verification_tasks': { 'no_assert_fail': {'correct': True} },
+    }
+    schema.validateBenchmarkSpecification(s)
+    return svcb.benchmark.getBenchmarks(s)
+
+  def generate(self, benchmarkObjs):
+    return svcb.build.generateCMakeDecls(benchmarkObjs,
+                                         sourceRootDir=self.sourceRootDir,
+                                         supportedArchitecture='x86_64',
+                                         dependencyDispatcher=self.dispatcher,
+                                         coverage=False)
+
+  def testGuardBlocksAreShared(self):
+    benchmarkObjs = self.getBenchmarks({
+      'a': { 'dependencies': { 'pthreads': {} } },
+      'b': { 'dependencies': { 'pthreads': {} } },
+      'c': { 'dependencies': { 'cmath': {} } },
+    })
+    decls = self.generate(benchmarkObjs)
+    # One guard block for `pthreads` and one for `cmath`
+    self.assertEqual(decls.count('if (NOT CMAKE_USE_PTHREADS_INIT)'), 1)
+    self.assertEqual(decls.count('if (NOT HAS_STD_C99)'), 2)
+    self.assertIn('set(ENABLE_TARGET_FOO_A ${_SVCB_GUARD_0_ENABLED})', decls)
+    self.assertIn('set(ENABLE_TARGET_FOO_B ${_SVCB_GUARD_0_ENABLED})', decls)
+    self.assertIn('set(ENABLE_TARGET_FOO_C ${_SVCB_GUARD_1_ENABLED})', decls)
+    # Dependency code is emitted for each target
+    self.assertIn('target_link_libraries(foo_a.any PRIVATE ${CMAKE_THREAD_LIBS_INIT})', decls)
+    self.assertIn('target_link_libraries(foo_b.any PRIVATE ${CMAKE_THREAD_LIBS_INIT})', decls)
+    self.assertIn('target_link_libraries(foo_c.any PRIVATE ${C_MATH_LIBRARY})', decls)
+    self.assertEqual(decls.count('list(APPEND _benchmark_targets'), 3)
+
+  def testGuardCodeNamingTheTarget(self):
+    def handler(depInfo):
+      guard = '{}message(STATUS "{}")\n'.format(depInfo.cmakeIndent, depInfo.targetName)
+      use = 'target_link_libraries({} PRIVATE bar)\n'.format(depInfo.targetName)
+      return (guard, use)
+    self.dispatcher.register('bar', handler)
+    benchmarkObjs = self.getBenchmarks({
+      'a': { 'dependencies': { 'bar': {} } },
+      'b': { 'dependencies': { 'bar': {} } },
+    })
+    decls = self.generate(benchmarkObjs)
+    # Guard code naming the target is not shared
+    self.assertIn('message(STATUS "foo_a.any")', decls)
+    self.assertIn('message(STATUS "foo_b.any")', decls)
+    self.assertIn('set(ENABLE_TARGET_FOO_A ${_SVCB_GUARD_0_ENABLED})', decls)
+    self.assertIn('set(ENABLE_TARGET_FOO_B ${_SVCB_GUARD_1_ENABLED})', decls)
+    self.assertIn('target_link_libraries(foo_a.any PRIVATE bar)', decls)
+    self.assertIn('target_link_libraries(foo_b.any PRIVATE bar)', decls)
+
+  def testDefines(self):
+    benchmarkObjs = self.getBenchmarks({
+      'a': { 'defines': { 'BUG': None, 'N': '2' } },
+      'b': { },
+    })
+    decls = self.generate(benchmarkObjs)
+    self.assertEqual(decls.count('target_compile_definitions('), 1)
+    self.assertIn('target_compile_definitions(foo_a.any PRIVATE\n', decls)
+    self.assertIn('  BUG\n', decls)
+    self.assertIn('  N=2\n', decls)
+
+  def testUnsupportedArchitecture(self):
+    benchmarkObjs = self.getBenchmarks({ 'a': {} }, architectures=['i686', 'x86_64'])
+    decls = self.generate(benchmarkObjs)
+    self.assertIn('Compiler cannot build target foo_a.i686.', decls)
+    self.assertNotIn('add_executable(foo_a.i686', decls)
+    self.assertIn('add_executable(foo_a.x86_64', decls)
+
+  def testSuite(self):
+    specA = os.path.join(self.sourceRootDir, 'a.yml')
+    specB = os.path.join(self.sourceRootDir, 'b.yml')
+    suite = [
+      (specA, self.getBenchmarks({
+        'x': { 'dependencies': { 'pthreads': {} } },
+        'y': { },
+      })),
+      (specB, self.getBenchmarks({
+        'z': { 'dependencies': { 'pthreads': {} } },
+      }, architectures=['i686', 'x86_64'])),
+    ]
+    decls = svcb.build.generateSuiteCMakeDecls(suite,
+                                               supportedArchitecture='x86_64',
+                                               dependencyDispatcher=self.dispatcher,
+                                               coverage=False)
+    # Guard blocks are shared across benchmark specification files
+    self.assertEqual(decls.count('if (NOT CMAKE_USE_PTHREADS_INIT)'), 1)
+    self.assertEqual(decls.count('if (_SVCB_GUARD_0_ENABLED)'), 1)
+    self.assertEqual(decls.count('if (_SVCB_GUARD_1_ENABLED)'), 1)
+    # Targets with the same guard block are declared together
+    self.assertLess(decls.index('add_executable(foo_z.x86_64'), decls.index('add_executable(foo_y.any'))
+    self.assertIn('Compiler cannot build target foo_z.i686.', decls)
+    self.assertIn('_svcb_warn_disabled_target(foo_y.any ${_SVCB_GUARD_1_DISABLED_REASONS})', decls)
+    # Both modes set the same variables
+    self.assertEqual(decls.count('set(ENABLE_TARGET_FOO_Y ${_SVCB_GUARD_1_ENABLED})'), 2)
+    self.assertEqual(decls.count('list(APPEND _benchmark_targets'), 3)
+    self.assertEqual(decls.count('list(APPEND _benchmark_spec_files "{}")'.format(specB)), 1)
+
+  def testFuzzRuntime(self):
+    benchmarkObjs = self.getBenchmarks({
+      'a': { 'dependencies': { 'klee_runtime': {} } },
+      'b': { 'dependencies': { 'svcomp_fuzz_runtime': {} } },
+      'c': { 'dependencies': { 'svcomp_klee_runtime': {} } },
+    })
+    decls = self.generate(benchmarkObjs)
+    # The KLEE runtime is not needed when the fuzzing runtime replaces it (the
+    # guard blocks of `klee_runtime` and `svcomp_klee_runtime` are identical)
+    self.assertEqual(decls.count('if (NOT KLEE_NATIVE_RUNTIME_FOUND AND NOT SVCB_FUZZ_RUNTIME)'), 1)
+    self.assertEqual(decls.count('if (NOT SVCB_FUZZ_RUNTIME)'), 1)
+    for targetName in ('foo_a.any', 'foo_b.any', 'foo_c.any'):
+      self.assertIn('target_link_libraries({} PRIVATE svcomp_fuzz_runtime)'.format(targetName), decls)
+    self.assertIn('${SVCOMP_KLEE_RUNTIME_OBJECTS}', decls)
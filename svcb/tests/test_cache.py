@@ -0,0 +1,136 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+from svcb import schema
+import svcb.cache
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+specTemplate = """
+architectures: any
+categories:
+  - {category}
+language: c99
+name: {name}
+schema_version: 0
+sources:
+  - main.c
+variants:
+  a:
+    verification_tasks:
+      no_assert_fail:
+        correct: true
+  b:
+    verification_tasks:
+      no_assert_fail:
+        correct: false
+"""
+
+class TestCache(unittest.TestCase):
+  # There is an API change between Python 3.1
+  # and prior versions. This declaration adds
+  # the new name of the method for older versions
+  # of Python.
+  if sys.version_info < (3,1):
+    def assertRaisesRegex(self, *pargs,**kargs):
+      return self.assertRaisesRegexp(*pargs,**kargs)
+
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.cacheDir = os.path.join(self.tempDir, 'cache')
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def writeSpec(self, name, category='foo', fileName=None):
+    if fileName is None:
+      fileName = name + '.yml'
+    path = os.path.join(self.tempDir, fileName)
+    with open(path, 'w') as f:
+      f.write(specTemplate.format(name=name, category=category))
+    return path
+
+  def numEntries(self):
+    return len([ f for f in os.listdir(self.cacheDir) if f.endswith('.pickle')])
+
+  def testHitAndMiss(self):
+    cache = svcb.cache.SpecCache(self.cacheDir)
+    path = self.writeSpec('foo')
+    first = cache.getBenchmarks(path)
+    self.assertEqual(cache.misses, 1)
+    self.assertEqual(cache.hits, 0)
+    second = cache.getBenchmarks(path)
+    self.assertEqual(cache.misses, 1)
+    self.assertEqual(cache.hits, 1)
+    self.assertEqual([ b.name for b in first ], [ b.name for b in second ])
+    self.assertEqual([ b.getInternalRepr() for b in first ],
+                     [ b.getInternalRepr() for b in second ])
+    # Entries are shared between caches using the same directory
+    otherCache = svcb.cache.SpecCache(self.cacheDir)
+    otherCache.loadBenchmarkSpecification(path)
+    self.assertEqual(otherCache.hits, 1)
+
+  def testChangedContentsMisses(self):
+    cache = svcb.cache.SpecCache(self.cacheDir)
+    path = self.writeSpec('foo', category='one')
+    self.assertEqual(cache.getBenchmarks(path)[0].categories, {'one'})
+    self.writeSpec('foo', category='two')
+    self.assertEqual(cache.getBenchmarks(path)[0].categories, {'two'})
+    self.assertEqual(cache.misses, 2)
+    self.assertEqual(self.numEntries(), 2)
+
+  def testInvalidNotCached(self):
+    cache = svcb.cache.SpecCache(self.cacheDir)
+    path = os.path.join(self.tempDir, 'bad.yml')
+    with open(path, 'w') as f:
+      f.write('name: foo\nschema_version: 0\n')
+    for _ in range(0, 2):
+      with self.assertRaisesRegex(schema.BenchmarkSpecificationValidationError, r"'architectures' is a required property"):
+        cache.getBenchmarks(path)
+    self.assertEqual(self.numEntries(), 0)
+
+  def testDisabled(self):
+    cache = svcb.cache.SpecCache(None)
+    self.assertFalse(cache.enabled)
+    path = self.writeSpec('foo')
+    benchmarkObjs = cache.getBenchmarks(path)
+    self.assertEqual(sorted([ b.name for b in benchmarkObjs ]), ['foo_a', 'foo_b'])
+    self.assertEqual(cache.hits + cache.misses, 0)
+
+  def testEmptyCacheDirDisables(self):
+    self.assertFalse(svcb.cache.SpecCache('').enabled)
+    oldValue = os.environ.get(svcb.cache.CacheDirEnvVar, None)
+    os.environ[svcb.cache.CacheDirEnvVar] = ''
+    try:
+      self.assertFalse(svcb.cache.SpecCache.fromEnvironment().enabled)
+    finally:
+      if oldValue is None:
+        del os.environ[svcb.cache.CacheDirEnvVar]
+      else:
+        os.environ[svcb.cache.CacheDirEnvVar] = oldValue
+
+  def testReturnsIndependentObjects(self):
+    cache = svcb.cache.SpecCache(self.cacheDir)
+    path = self.writeSpec('foo')
+    cache.getBenchmarks(path)
+    first = cache.getBenchmarks(path)
+    first[0].getInternalRepr()['misc']['exe_path'] = 'foo'
+    second = cache.getBenchmarks(path)
+    self.assertNotIn('exe_path', second[0].misc)
+
+  def testEviction(self):
+    path = self.writeSpec('foo0')
+    cache = svcb.cache.SpecCache(self.cacheDir)
+    cache.getBenchmarks(path)
+    entrySize = os.path.getsize(os.path.join(self.cacheDir, os.listdir(self.cacheDir)[0]))
+    # Only allow a few entries
+    cache = svcb.cache.SpecCache(self.cacheDir, maxSizeBytes=entrySize * 4)
+    for index in range(1, 10):
+      cache.getBenchmarks(self.writeSpec('foo{}'.format(index)))
+    self.assertLessEqual(self.numEntries(), 4)
+    # Most recently added entry must still be present
+    cache.getBenchmarks(self.writeSpec('foo9'))
+    self.assertEqual(cache.hits, 1)
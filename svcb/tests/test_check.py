@@ -0,0 +1,69 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+from svcb import schema
+import svcb.benchmark
+import svcb.check
+import unittest
+
+class TestCheck(unittest.TestCase):
+  def setUp(self):
+    s = {
+      'architectures': ['x86_64'],
+      'categories': ['xxx'],
+      'language': 'c99',
+      'name': 'foo',
+      'schema_version': schema.getSchema()['__version__'],
+      'sources': ['main.c'],
+      'verification_tasks': {
+        'no_assert_fail': {
+          'correct': False,
+          'counter_examples': [
+            { 'description': 'bug', 'locations': [ { 'file': 'src/main.c', 'line': 10, 'column': 3 } ] },
+          ],
+        },
+        'no_overshift': { 'correct': False },
+        'no_invalid_free': { 'correct': None },
+      },
+    }
+    schema.validateBenchmarkSpecification(s)
+    self.index = svcb.check.ExpectationIndex()
+    for benchmarkObj in svcb.benchmark.getBenchmarks(s):
+      self.index.add(benchmarkObj)
+
+  def classify(self, **record):
+    (classification, _) = svcb.check.classify(record, self.index)
+    return classification
+
+  def testIncorrect(self):
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='incorrect'), 'true_positive')
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='incorrect',
+      counter_examples=[ { 'file': '/home/x/src/main.c', 'line': 10 } ]), 'true_positive')
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='incorrect',
+      counter_examples=[ { 'file': 'src/main.c', 'line': 10, 'column': 4 } ]), 'unexpected_counter_example')
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='incorrect',
+      counter_examples=[ { 'file': 'other/main.c', 'line': 10 } ]), 'unexpected_counter_example')
+    # Counter examples are not exhaustive so any location is accepted
+    self.assertEqual(self.classify(benchmark='foo', task='no_overshift', result='incorrect',
+      counter_examples=[ { 'file': 'main.c', 'line': 1 } ]), 'true_positive')
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='correct'), 'false_negative')
+
+  def testCorrect(self):
+    # Implicit task
+    self.assertEqual(self.classify(target='foo.x86_64', task='no_reach_error_function', result='incorrect'),
+                     'false_positive')
+    self.assertEqual(self.classify(augmented_spec_file='/a/foo.x86_64.yml', task='no_reach_error_function',
+                                   result='correct'), 'true_negative')
+
+  def testOther(self):
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='timeout'), 'timeout')
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='unknown'), 'unknown')
+    self.assertEqual(self.classify(benchmark='foo', task='no_invalid_free', result='incorrect'), 'unknown')
+    self.assertEqual(self.classify(benchmark='bar', task='no_assert_fail', result='correct'), 'error')
+    self.assertEqual(self.classify(target='foo.i686', task='no_assert_fail', result='correct'), 'error')
+    self.assertEqual(self.classify(benchmark='foo', task='no_such_task', result='correct'), 'error')
+    self.assertEqual(self.classify(benchmark='foo', task='no_assert_fail', result='maybe'), 'error')
+    # Records of tools that gave up need not have a task
+    self.assertEqual(self.classify(benchmark='foo', result='unknown'), 'unknown')
+    self.assertEqual(self.classify(benchmark='foo', task=None, result='timeout'), 'timeout')
+    self.assertEqual(self.classify(benchmark='foo', result='incorrect'), 'error')
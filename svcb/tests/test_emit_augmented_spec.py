@@ -0,0 +1,61 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+import svcb.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+_repoRoot = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tool = os.path.join(_repoRoot, 'svcb', 'tools', 'svcb-emit-cmake-augmented-spec.py')
+_specFile = os.path.join(_repoRoot, 'benchmarks', 'c', 'examples', 'simple_branch', 'spec.yml')
+_target = 'simple_branch_klee_bug.x86_64'
+
+class TestEmitAugmentedSpec(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def runTool(self, args):
+    with open(os.devnull, 'w') as devNull:
+      return subprocess.call([ sys.executable, _tool, '--cache-dir', '' ] + args, stderr=devNull)
+
+  def loadOutput(self, fileName):
+    with open(os.path.join(self.tempDir, fileName), 'r') as f:
+      return svcb.util.loadYaml(f)
+
+  def testSingleTarget(self):
+    # Options can be given between the positional arguments
+    self.assertEqual(self.runTool([ _specFile, '--exe-path', '/x/foo', '-o',
+                                     os.path.join(self.tempDir, 'out.yml'), _target ]), 0)
+    augmentedSpec = self.loadOutput('out.yml')
+    self.assertEqual(augmentedSpec['misc']['exe_path'], 'foo')
+
+  def testSingleTargetRequiresTargetName(self):
+    self.assertNotEqual(self.runTool([ _specFile, '-o', os.path.join(self.tempDir, 'out.yml') ]), 0)
+
+  def testManifest(self):
+    manifest = os.path.join(self.tempDir, 'manifest.json')
+    with open(manifest, 'w') as f:
+      json.dump([ { 'target': _target, 'spec': _specFile, 'exe_path': '/x/foo',
+                    'output': os.path.join(self.tempDir, 'out.json') } ], f)
+    self.assertEqual(self.runTool([ '--format', 'json', '--manifest', manifest ]), 0)
+    self.assertEqual(self.loadOutput('out.json')['misc']['exe_path'], 'foo')
+    # Positional arguments are not accepted with a manifest
+    self.assertNotEqual(self.runTool([ _specFile, '--manifest', manifest ]), 0)
+
+  def testTargets(self):
+    # The benchmark specification file can be given after the options
+    self.assertEqual(self.runTool([ '--target', '{}=/x/foo:/x/foo.bc'.format(_target),
+                                    '--output-dir', self.tempDir, _specFile ]), 0)
+    augmentedSpec = self.loadOutput(_target + '.yml')
+    self.assertEqual(augmentedSpec['misc']['exe_path'], 'foo')
+    self.assertEqual(augmentedSpec['misc']['llvm_bc_path'], 'foo.bc')
+    # A target name cannot be given as well
+    self.assertNotEqual(self.runTool([ _specFile, '--target', '{}=/x/foo'.format(_target), _target ]), 0)
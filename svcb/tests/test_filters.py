@@ -0,0 +1,87 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+from svcb import schema
+import svcb.benchmark
+import svcb.filters
+import pickle
+import unittest
+
+class TestFilters(unittest.TestCase):
+  def setUp(self):
+    self.persistentSchema = schema.getSchema()
+    self.spec = {
+      'architectures': ['x86_64'],
+      'categories': ['global'],
+      'dependencies': { 'pthreads': {} },
+      'language': 'c99',
+      'name': 'basename',
+      'schema_version': self.persistentSchema['__version__'],
+      'sources': ['a.c'],
+      'variants': {
+        'foo': {
+          'categories': ['foo_category'],
+          'verification_tasks':{ 'no_assert_fail': {'correct': True} },
+        },
+        'bar': {
+          'dependencies': { 'openmp': {} },
+          'verification_tasks':{ 'no_assert_fail': {'correct': False} },
+        }
+      }
+    }
+    schema.validateBenchmarkSpecification(self.spec, schema=self.persistentSchema)
+
+  def getAccepted(self, benchmarkFilter):
+    benchmarkObjs = svcb.benchmark.getBenchmarks(self.spec, lazy=True)
+    (accepted, rejected) = benchmarkFilter.apply(self.spec, benchmarkObjs)
+    self.assertEqual(len(accepted) + len(rejected), 2)
+    return sorted([ b.name for b in accepted ])
+
+  def testAcceptsEverything(self):
+    benchmarkFilter = svcb.filters.BenchmarkFilter()
+    self.assertTrue(benchmarkFilter.acceptsEverything)
+    self.assertEqual(self.getAccepted(benchmarkFilter), ['basename_bar', 'basename_foo'])
+
+  def testSpecLevelRejection(self):
+    for benchmarkFilter in [
+        svcb.filters.BenchmarkFilter(languages=['c11']),
+        svcb.filters.BenchmarkFilter(architectures=['i686']),
+        svcb.filters.BenchmarkFilter(anyCategories=['other']),
+        svcb.filters.BenchmarkFilter(allCategories=['global', 'other']),
+        svcb.filters.BenchmarkFilter(dependencies=['klee_runtime']),
+      ]:
+      self.assertFalse(benchmarkFilter.acceptsSpec(self.spec))
+      self.assertEqual(self.getAccepted(benchmarkFilter), [])
+    self.assertTrue(svcb.filters.BenchmarkFilter(architectures=['x86_64', 'i686']).acceptsSpec(self.spec))
+
+  def testVariantLevelRejection(self):
+    self.assertEqual(
+      self.getAccepted(svcb.filters.BenchmarkFilter(anyCategories=['foo_category'])),
+      ['basename_foo'])
+    self.assertEqual(
+      self.getAccepted(svcb.filters.BenchmarkFilter(allCategories=['global'])),
+      ['basename_bar', 'basename_foo'])
+    self.assertEqual(
+      self.getAccepted(svcb.filters.BenchmarkFilter(dependencies=['pthreads', 'openmp'])),
+      ['basename_bar'])
+    self.assertEqual(
+      self.getAccepted(svcb.filters.BenchmarkFilter(taskCorrectness={'no_assert_fail': [False]})),
+      ['basename_bar'])
+    self.assertEqual(
+      self.getAccepted(svcb.filters.BenchmarkFilter(taskCorrectness={'no_overshift': [True, None]})),
+      ['basename_bar', 'basename_foo'])
+
+  def testOnlyNeededFieldsAreComputed(self):
+    benchmarkFilter = svcb.filters.BenchmarkFilter(anyCategories=['foo_category'])
+    benchmarkObjs = svcb.benchmark.getBenchmarks(self.spec, lazy=True)
+    (accepted, rejected) = benchmarkFilter.apply(self.spec, benchmarkObjs)
+    self.assertEqual(len(rejected), 1)
+    self.assertTrue(rejected[0].isLazy)
+    self.assertEqual(set(rejected[0]._data.keys()), {'categories'})
+
+  def testPickle(self):
+    benchmarkFilter = svcb.filters.BenchmarkFilter(anyCategories=['foo_category'], taskCorrectness={'no_assert_fail': [True]})
+    copied = pickle.loads(pickle.dumps(benchmarkFilter))
+    self.assertEqual(copied.anyCategories, benchmarkFilter.anyCategories)
+    self.assertEqual(copied.taskCorrectness, benchmarkFilter.taskCorrectness)
+    self.assertIsNone(copied.languages)
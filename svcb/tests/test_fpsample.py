@@ -0,0 +1,48 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+import svcb.fpsample
+import unittest
+
+class TestFPSample(unittest.TestCase):
+  def getJob(self, script):
+    return {
+      'program': '/bin/sh',
+      'command_line_arguments': ['-c', script],
+      'misc': { 'augmented_spec_file': '/a.yml' },
+    }
+
+  def testSampleJobs(self):
+    options = svcb.fpsample.SampleOptions(5, firstSeed=1, timeout=5)
+    jobs = [
+      self.getJob('test "$SVCOMP_FUZZ_SAMPLE_SEED" = 3 && kill -ABRT $$; exit 0'),
+      self.getJob('test "$SVCOMP_FUZZ_SAMPLE_SEED" = 2 && kill -SEGV $$; exit 0'),
+      self.getJob('exit 1'),
+    ]
+    records = list(svcb.fpsample.sampleJobs(jobs, options, workers=2))
+    self.assertEqual([ r['outcome'] for r in records ], [ 'counter_example', 'crash', 'none' ])
+    self.assertEqual([ r['seed'] for r in records ], [ 3, 2, 5 ])
+    self.assertEqual([ r['runs'] for r in records ], [ 3, 2, 5 ])
+    self.assertEqual([ r['signal'] for r in records ], [ 6, 11, None ])
+    self.assertEqual(records[2]['exit_code'], 1)
+    self.assertEqual(records[0]['augmented_spec_file'], '/a.yml')
+
+  def testTimeout(self):
+    options = svcb.fpsample.SampleOptions(2, timeout=0.2)
+    record = svcb.fpsample.sampleJob(self.getJob('sleep 10'), options)
+    self.assertEqual(record['outcome'], 'timeout')
+    self.assertEqual(record['runs'], 1)
+
+  def testError(self):
+    options = svcb.fpsample.SampleOptions(2)
+    record = svcb.fpsample.sampleJob({ 'program': '/does/not/exist' }, options)
+    self.assertEqual(record['outcome'], 'error')
+    self.assertEqual(record['runs'], 0)
+
+  def testExceptionRecordHasAllKeys(self):
+    # A job without a program makes `sampleJob()` raise
+    options = svcb.fpsample.SampleOptions(1)
+    records = list(svcb.fpsample.sampleJobs([ self.getJob('exit 0'), { 'misc': {} } ], options, workers=1))
+    self.assertEqual(records[1]['outcome'], 'error')
+    self.assertIn('KeyError', records[1]['error'])
+    self.assertEqual(sorted(records[1].keys()), sorted(records[0].keys()))
@@ -0,0 +1,157 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+from svcb import schema
+import svcb.benchmark
+import svcb.filters
+import svcb.index
+import os
+import shutil
+import tempfile
+import unittest
+
+class TestIndex(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.indexPath = os.path.join(self.tempDir, 'index.sqlite')
+    persistentSchema = schema.getSchema()
+    self.spec = {
+      'architectures': ['x86_64', 'i686'],
+      'categories': ['global'],
+      'dependencies': { 'pthreads': {} },
+      'language': 'c99',
+      'name': 'basename',
+      'schema_version': persistentSchema['__version__'],
+      'sources': ['a.c'],
+      'variants': {
+        'foo': {
+          'categories': ['foo_category'],
+          'verification_tasks':{ 'no_assert_fail': {'correct': True} },
+        },
+        'bar': {
+          'dependencies': { 'openmp': {} },
+          'verification_tasks':{
+            'no_assert_fail': {
+              'correct': False,
+              'counter_examples': [ { 'locations': [ { 'file': 'a.c', 'line': 1 } ] } ]
+            },
+            'no_overshift': {'correct': False},
+          },
+        }
+      }
+    }
+    schema.validateBenchmarkSpecification(self.spec, schema=persistentSchema)
+    self.otherSpec = {
+      'architectures': 'any',
+      'categories': ['other'],
+      'language': 'c11',
+      'name': 'other',
+      'schema_version': persistentSchema['__version__'],
+      'sources': ['a.c'],
+      'verification_tasks':{ 'no_assert_fail': {'correct': None} },
+    }
+    schema.validateBenchmarkSpecification(self.otherSpec, schema=persistentSchema)
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def createIndex(self):
+    entries = []
+    for (benchSpec, specPath) in [(self.spec, '/spec.yml'), (self.otherSpec, '/other/spec.yml')]:
+      for benchmarkObj in svcb.benchmark.getBenchmarks(benchSpec, lazy=True):
+        entries.extend(svcb.index.makeEntries(benchmarkObj, specPath))
+    for entry in entries:
+      entry.augmentedSpecPath = '/build/{}.yml'.format(entry.target)
+    return svcb.index.BenchmarkIndex.create(self.indexPath, entries)
+
+  def getTargets(self, **kwargs):
+    index = svcb.index.BenchmarkIndex(self.indexPath)
+    benchmarkFilter = svcb.filters.BenchmarkFilter(**kwargs)
+    entries = index.query(benchmarkFilter)
+    self.assertEqual(index.count(benchmarkFilter), len(entries))
+    index.close()
+    return [ e.target for e in entries ]
+
+  def testEntries(self):
+    index = self.createIndex()
+    entries = index.query()
+    index.close()
+    self.assertEqual([ e.target for e in entries ], [
+      'basename_bar.i686',
+      'basename_bar.x86_64',
+      'basename_foo.i686',
+      'basename_foo.x86_64',
+      'other.any'])
+    foo = entries[3]
+    self.assertEqual(foo.name, 'basename_foo')
+    self.assertEqual(foo.architecture, 'x86_64')
+    self.assertEqual(foo.language, 'c99')
+    self.assertEqual(foo.specPath, '/spec.yml')
+    self.assertIsNone(foo.exePath)
+    self.assertEqual(foo.augmentedSpecPath, '/build/basename_foo.x86_64.yml')
+    self.assertEqual(foo.categories, {'global', 'foo_category'})
+    self.assertEqual(foo.dependencies, {'pthreads'})
+    self.assertEqual(foo.tasks['no_assert_fail'], True)
+    self.assertEqual(foo.tasks['no_invalid_free'], True)
+    self.assertEqual(entries[0].dependencies, {'pthreads', 'openmp'})
+    self.assertEqual(entries[0].exhaustiveCounterExampleTasks, {'no_assert_fail'})
+    self.assertEqual(foo.exhaustiveCounterExampleTasks, set())
+    self.assertEqual(entries[0].toDict()['verification_tasks']['no_overshift'],
+                     {'correct': False, 'exhaustive_counter_examples': False})
+    self.assertEqual(entries[4].tasks['no_assert_fail'], None)
+
+  def testQuery(self):
+    self.createIndex().close()
+    self.assertEqual(self.getTargets(anyCategories=['foo_category', 'other']),
+                     ['basename_foo.i686', 'basename_foo.x86_64', 'other.any'])
+    self.assertEqual(self.getTargets(allCategories=['foo_category', 'global']),
+                     ['basename_foo.i686', 'basename_foo.x86_64'])
+    self.assertEqual(self.getTargets(languages=['c11']), ['other.any'])
+    self.assertEqual(self.getTargets(architectures=['x86_64']),
+                     ['basename_bar.x86_64', 'basename_foo.x86_64', 'other.any'])
+    self.assertEqual(self.getTargets(dependencies=['openmp', 'pthreads']),
+                     ['basename_bar.i686', 'basename_bar.x86_64'])
+    self.assertEqual(self.getTargets(taskCorrectness={'no_assert_fail': [False, None]}),
+                     ['basename_bar.i686', 'basename_bar.x86_64', 'other.any'])
+    self.assertEqual(self.getTargets(taskCorrectness={'no_assert_fail': [True]}, architectures=['i686']),
+                     ['basename_foo.i686'])
+    self.assertEqual(self.getTargets(exhaustiveCounterExampleTasks=['no_assert_fail'], architectures=['x86_64']),
+                     ['basename_bar.x86_64'])
+    self.assertEqual(self.getTargets(exhaustiveCounterExampleTasks=['no_overshift']), [])
+
+  def testQueryMatchesFilter(self):
+    self.createIndex().close()
+    benchmarkObjs = (svcb.benchmark.getBenchmarks(self.spec, lazy=True) +
+                     svcb.benchmark.getBenchmarks(self.otherSpec, lazy=True))
+    for kwargs in [
+        { 'anyCategories': ['global'] },
+        { 'taskCorrectness': {'no_assert_fail': [True, None]} },
+        { 'languages': ['c99'], 'dependencies': ['pthreads'] },
+        { 'exhaustiveCounterExampleTasks': ['no_assert_fail'] }]:
+      benchmarkFilter = svcb.filters.BenchmarkFilter(**kwargs)
+      expected = sorted(set([ b.name for b in benchmarkObjs if benchmarkFilter.accepts(b) ]))
+      index = svcb.index.BenchmarkIndex(self.indexPath)
+      self.assertEqual(sorted(set([ e.name for e in index.query(benchmarkFilter) ])), expected)
+      index.close()
+
+  def testAugmentedSpecPaths(self):
+    index = self.createIndex()
+    self.assertEqual(index.getAugmentedSpecPaths(svcb.filters.BenchmarkFilter(languages=['c11'])),
+                     {'/build/other.any.yml'})
+    self.assertEqual(len(index.getAugmentedSpecPaths()), 5)
+    index.close()
+
+  def testInvalidIndex(self):
+    with self.assertRaises(svcb.index.BenchmarkIndexException):
+      svcb.index.BenchmarkIndex(self.indexPath)
+    with open(self.indexPath, 'w') as f:
+      f.write('not a database')
+    with self.assertRaises(svcb.index.BenchmarkIndexException):
+      svcb.index.BenchmarkIndex(self.indexPath)
+
+  def testDuplicateTargets(self):
+    benchmarkObj = svcb.benchmark.getBenchmarks(self.otherSpec)[0]
+    entries = svcb.index.makeEntries(benchmarkObj, '/spec.yml') * 2
+    with self.assertRaises(svcb.index.BenchmarkIndexException):
+      svcb.index.BenchmarkIndex.create(self.indexPath, entries)
+    self.assertFalse(os.path.exists(self.indexPath))
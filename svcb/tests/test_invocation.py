@@ -0,0 +1,58 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+import svcb.invocation
+import os
+import tempfile
+import unittest
+
+class TestInvocation(unittest.TestCase):
+  def testShardJobs(self):
+    costs = [ 1.0, 7.0, 3.0, 3.0, 2.0, 4.0 ]
+    shards = svcb.invocation.shardJobs(costs, 2)
+    self.assertEqual(shards, [ [1, 3], [0, 2, 4, 5] ])
+    self.assertEqual([ sum(costs[i] for i in shard) for shard in shards ], [ 10.0, 10.0 ])
+
+  def testShardJobsMoreShardsThanJobs(self):
+    self.assertEqual(svcb.invocation.shardJobs([ 2.0 ], 3), [ [0], [], [] ])
+
+  def testFillMissingCosts(self):
+    self.assertEqual(svcb.invocation.fillMissingCosts([ 1.0, None, 3.0 ]), [ 1.0, 2.0, 3.0 ])
+    self.assertEqual(svcb.invocation.fillMissingCosts([ None ]), [ 1.0 ])
+
+  def testLoadRunTimes(self):
+    results = """
+    {
+      "results": [
+        { "invocation_info": { "misc": { "augmented_spec_file": "/a.yml" } }, "wallclock_time": 2.5 },
+        { "invocation_info": { "misc": { "augmented_spec_file": "/a.yml" } }, "wallclock_time": 4 },
+        { "invocation_info": { "misc": { "augmented_spec_file": "/b.yml" } }, "wallclock_time": null }
+      ]
+    }
+    """
+    runTimes = svcb.invocation.loadRunTimes(results)
+    self.assertEqual(runTimes, { os.path.abspath('/a.yml'): 4.0 })
+    runTimes = svcb.invocation.loadRunTimes('c.yml: 3\n')
+    self.assertEqual(runTimes, { os.path.abspath('c.yml'): 3.0 })
+    with self.assertRaises(svcb.invocation.CostException):
+      svcb.invocation.loadRunTimes('c.yml: fast\n')
+
+  def testOrderJobs(self):
+    self.assertEqual(svcb.invocation.orderJobs([ 1.0, 3.0, 2.0, 3.0 ]), [ 1, 3, 2, 0 ])
+
+  def testEstimateMissingCosts(self):
+    costs = [ 20.0, None, None, None ]
+    features = [ (10, 1), (10, 0), (5, 3), (None, 2) ]
+    # 20 seconds for 10 * (1 + 1) so the scale is 1.0
+    self.assertEqual(svcb.invocation.estimateMissingCosts(costs, features), [ 20.0, 10.0, 20.0, None ])
+    # Without known costs the estimates are relative
+    self.assertEqual(svcb.invocation.estimateMissingCosts([ None ], [ (4, 1) ]), [ 8.0 ])
+
+  def testCountSymbolicInputs(self):
+    (fd, sourceFile) = tempfile.mkstemp(suffix='.c')
+    with os.fdopen(fd, 'w') as f:
+      f.write('int a = __VERIFIER_nondet_int();\nklee_make_symbolic(&b, sizeof(b), "b");\nklee_assume(a);\n')
+    try:
+      self.assertEqual(svcb.invocation.countSymbolicInputs(sourceFile), 2)
+    finally:
+      os.remove(sourceFile)
@@ -0,0 +1,130 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+from svcb import schema
+import svcb.benchmark
+import svcb.check
+import svcb.replay
+import os
+import shutil
+import stat
+import struct
+import tempfile
+import unittest
+
+def writeKTest(path, args):
+  with open(path, 'wb') as f:
+    f.write(b'KTEST')
+    f.write(struct.pack('>II', 3, len(args)))
+    for arg in args:
+      arg = arg.encode('utf-8')
+      f.write(struct.pack('>I', len(arg)))
+      f.write(arg)
+    # Symbolic argv and no objects
+    f.write(struct.pack('>III', 0, 0, 0))
+
+class TestReplay(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    s = {
+      'architectures': ['x86_64'],
+      'categories': ['xxx'],
+      'language': 'c99',
+      'misc': { 'exe_path': 'foo.x86_64', 'llvm_bc_path': 'foo.x86_64.bc' },
+      'name': 'foo',
+      'schema_version': schema.getSchema()['__version__'],
+      'sources': ['main.c'],
+      'verification_tasks': {
+        'no_assert_fail': {
+          'correct': False,
+          'counter_examples': [
+            { 'description': 'bug', 'locations': [ { 'file': 'main.c', 'line': 10 } ] },
+          ],
+          'exhaustive_counter_examples': True,
+        },
+      },
+    }
+    schema.validateBenchmarkSpecification(s)
+    self.programIndex = svcb.replay.ProgramIndex()
+    expectationIndex = svcb.check.ExpectationIndex()
+    for benchmarkObj in svcb.benchmark.getBenchmarks(s):
+      self.programIndex.add(benchmarkObj, os.path.join(self.tempDir, 'foo.x86_64.yml'))
+      expectationIndex.add(benchmarkObj)
+    self.options = svcb.replay.ReplayOptions(self.programIndex, expectationIndex, timeout=5)
+    # Fake native binary that fails the assertion on the line given as
+    # its argument if KTEST_FILE is set (`pass` exits normally and `sleep`
+    # times out)
+    self.exePath = os.path.join(self.tempDir, 'foo.x86_64')
+    with open(self.exePath, 'w') as f:
+      f.write('#!/bin/sh\n')
+      f.write('test -f "$KTEST_FILE" || exit 0\n')
+      f.write('test "$1" = pass && exit 0\n')
+      f.write('test "$1" = sleep && sleep 10\n')
+      f.write('echo "foo.x86_64: /src/foo/main.c:$1: main: Assertion \\`0\' failed." >&2\n')
+      f.write('kill -ABRT $$\n')
+    os.chmod(self.exePath, stat.S_IRWXU)
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def testReadKTestArguments(self):
+    ktestFile = os.path.join(self.tempDir, 'test000001.ktest')
+    writeKTest(ktestFile, [ '/other/machine/foo.x86_64.bc', '10' ])
+    self.assertEqual(svcb.replay.readKTestArguments(ktestFile), [ '/other/machine/foo.x86_64.bc', '10' ])
+    with open(ktestFile, 'wb') as f:
+      f.write(b'KTEST\x00\x00')
+    with self.assertRaises(svcb.replay.ReplayException):
+      svcb.replay.readKTestArguments(ktestFile)
+
+  def testProgramIndex(self):
+    self.assertEqual(self.programIndex.get('/a/foo.x86_64.bc').exePath, self.exePath)
+    self.assertEqual(self.programIndex.get('foo.x86_64').exePath, self.exePath)
+    self.assertIsNone(self.programIndex.get('bar.x86_64.bc'))
+    self.assertEqual(len(self.programIndex), 1)
+
+  def testParseAssertionFailure(self):
+    self.assertEqual(svcb.replay.parseAssertionFailure("a is zero\nfoo: /a/main.c:16: main: Assertion `0' failed.\n"),
+                     { 'file': '/a/main.c', 'line': 16 })
+    self.assertEqual(svcb.replay.parseAssertionFailure(
+      'Assertion failed: (0), function main, file main.c, line 3.\n'), { 'file': 'main.c', 'line': 3 })
+    self.assertIsNone(svcb.replay.parseAssertionFailure('Segmentation fault\n'))
+
+  def testReplayKTests(self):
+    ktestDir = os.path.join(self.tempDir, 'klee-out-0')
+    os.makedirs(ktestDir)
+    for (name, args) in [ ('test000001.ktest', [ 'foo.x86_64.bc', '10' ]),
+                          ('test000002.ktest', [ 'foo.x86_64.bc', '11' ]),
+                          ('test000003.ktest', [ 'bar.x86_64.bc' ]) ]:
+      writeKTest(os.path.join(ktestDir, name), args)
+    ktestFiles = svcb.replay.findKTestFiles(self.tempDir)
+    self.assertEqual([ os.path.basename(f) for f in ktestFiles ],
+                     [ 'test000001.ktest', 'test000002.ktest', 'test000003.ktest' ])
+    records = list(svcb.replay.replayKTests(ktestFiles, self.options, workers=2))
+    self.assertEqual([ r['outcome'] for r in records ], [ 'reproduced', 'reproduced', 'error' ])
+    self.assertEqual([ r['classification'] for r in records ], [ 'true_positive', 'unexpected_counter_example', None ])
+    self.assertEqual(records[0]['task'], 'no_assert_fail')
+    self.assertEqual(records[0]['counter_examples'], [ { 'file': '/src/foo/main.c', 'line': 10 } ])
+    self.assertEqual(records[0]['signal'], 6)
+    self.assertIn('bar.x86_64.bc', records[2]['message'])
+
+  def testExceptionRecordHasAllKeys(self):
+    # A test case that is not a path makes `replayKTest()` raise
+    records = list(svcb.replay.replayKTests([ os.path.join(self.tempDir, 'a.ktest'), None ], self.options, workers=1))
+    self.assertEqual(records[1]['outcome'], 'error')
+    self.assertIn('TypeError', records[1]['message'])
+    self.assertEqual(sorted(records[1].keys()), sorted(records[0].keys()))
+
+  def testRecordsCanBeClassified(self):
+    ktestFiles = []
+    for (name, args) in [ ('test000001.ktest', [ 'foo.x86_64.bc', '10' ]),
+                          ('test000002.ktest', [ 'foo.x86_64.bc', 'pass' ]),
+                          ('test000003.ktest', [ 'foo.x86_64.bc', 'sleep' ]) ]:
+      ktestFiles.append(os.path.join(self.tempDir, name))
+      writeKTest(ktestFiles[-1], args)
+    self.options.timeout = 0.5
+    records = list(svcb.replay.replayKTests(ktestFiles, self.options, workers=1))
+    self.assertEqual([ r['outcome'] for r in records ], [ 'reproduced', 'not_reproduced', 'timeout' ])
+    self.assertEqual([ r['result'] for r in records ], [ 'incorrect', 'unknown', 'timeout' ])
+    # Replay records are result records
+    classifications = [ svcb.check.classify(r, self.options.expectationIndex) for r in records ]
+    self.assertEqual(classifications, [ ('true_positive', None), ('unknown', None), ('timeout', None) ])
@@ -0,0 +1,88 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+import svcb.runner
+import svcb.util
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+class TestRunner(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.options = svcb.runner.RunOptions(self.tempDir, timeout=5)
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def getJob(self, script, env=None):
+    return {
+      'program': '/bin/sh',
+      'command_line_arguments': ['-c', script],
+      'environment_variables': env or {},
+      'misc': {},
+    }
+
+  def testRunJobs(self):
+    jobs = [
+      self.getJob('exit 3'),
+      self.getJob('test "$FOO" = bar && pwd', env={'FOO': 'bar'}),
+      self.getJob('kill -ABRT $$'),
+    ]
+    results = list(svcb.runner.runJobs(jobs, self.options, workers=2))
+    self.assertEqual([ r['exit_code'] for r in results ], [ 3, 0, None ])
+    self.assertEqual([ r['signal'] for r in results ], [ None, None, 6 ])
+    self.assertTrue(all(r['error'] is None and not r['timeout'] for r in results))
+    # Jobs run in their own directory
+    with open(results[1]['stdout_file'], 'r') as f:
+      self.assertEqual(os.path.realpath(f.read().strip()), os.path.realpath(os.path.join(self.tempDir, 'job-1')))
+
+  def testTimeout(self):
+    self.options.timeout = 0.2
+    result = svcb.runner.runJob(self.getJob('sleep 10'), os.path.join(self.tempDir, 'job'), self.options)
+    self.assertTrue(result['timeout'])
+    self.assertLess(result['wallclock_time'], 5)
+
+  def testKleeNotFound(self):
+    job = { 'program': os.path.join(self.tempDir, 'a.bc') }
+    result = svcb.runner.runJob(job, os.path.join(self.tempDir, 'job'), self.options)
+    self.assertIn('KLEE', result['error'])
+
+  def testKleeOutputDirIsReplaced(self):
+    # A fake KLEE that, like KLEE, refuses an existing output directory
+    kleePath = os.path.join(self.tempDir, 'klee')
+    with open(kleePath, 'w') as f:
+      f.write('#!/bin/sh\nd="${1#--output-dir=}"\ntest ! -e "$d" && mkdir "$d"\n')
+    os.chmod(kleePath, 0o755)
+    self.options.kleePath = kleePath
+    job = { 'program': os.path.join(self.tempDir, 'a.bc') }
+    jobDir = os.path.join(self.tempDir, 'job')
+    for _ in range(2):
+      result = svcb.runner.runJob(job, jobDir, self.options)
+      self.assertEqual(result['exit_code'], 0)
+    self.assertTrue(os.path.isdir(os.path.join(jobDir, 'klee-out')))
+    # The runner sets the output directory
+    self.options.kleeArgs = ['-output-dir=foo']
+    result = svcb.runner.runJob(job, jobDir, self.options)
+    self.assertIn('output directory', result['error'])
+
+  def testExceptionResultHasAllKeys(self):
+    # A program that is not a string makes `runJob()` raise
+    jobs = [ self.getJob('exit 0'), { 'program': 1 } ]
+    results = list(svcb.runner.runJobs(jobs, self.options, workers=1))
+    self.assertIn('AttributeError', results[1]['error'])
+    self.assertEqual(sorted(results[1].keys()), sorted(results[0].keys()))
+    self.assertIsNone(results[1]['exit_code'])
+    self.assertFalse(results[1]['timeout'])
+
+  def testLoadJobs(self):
+    jobs = [ self.getJob('exit 0'), self.getJob('exit 1') ]
+    invocationInfo = { 'schema_version': 0, 'jobs': jobs }
+    self.assertEqual(svcb.runner.loadJobs(svcb.util.dumpYaml(invocationInfo)), jobs)
+    self.assertEqual(svcb.runner.loadJobs(svcb.util.dumpJson(invocationInfo)), jobs)
+    jsonLines = ''.join(json.dumps(j) + '\n' for j in jobs)
+    self.assertEqual(svcb.runner.loadJobs(jsonLines), jobs)
+    yamlStream = ''.join('---\n' + svcb.util.dumpYaml(j) for j in jobs)
+    self.assertEqual(svcb.runner.loadJobs(yamlStream), jobs)
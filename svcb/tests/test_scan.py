@@ -0,0 +1,96 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+import svcb.filters
+import svcb.scan
+import os
+import shutil
+import tempfile
+import unittest
+
+specTemplate = """
+architectures: any
+categories:
+  - foo
+language: c99
+name: {name}
+schema_version: 0
+sources:
+  - main.c
+verification_tasks:
+  no_assert_fail:
+    correct: true
+"""
+
+class TestScan(unittest.TestCase):
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def writeSpec(self, relativeDir, contents):
+    directory = os.path.join(self.tempDir, relativeDir)
+    if not os.path.isdir(directory):
+      os.makedirs(directory)
+    path = os.path.join(directory, 'spec.yml')
+    with open(path, 'w') as f:
+      f.write(contents)
+    return path
+
+  def makeTree(self):
+    expected = []
+    for relativeDir in ['b/y', 'a', 'b/x/z', 'b/x', 'c']:
+      name = relativeDir.replace('/', '_')
+      expected.append(self.writeSpec(relativeDir, specTemplate.format(name=name)))
+    # Not a benchmark specification file
+    with open(os.path.join(self.tempDir, 'a', 'other.yml'), 'w') as f:
+      f.write('foo: bar\n')
+    return expected
+
+  def testFindSpecFiles(self):
+    self.makeTree()
+    specFiles = svcb.scan.findSpecFiles(self.tempDir)
+    self.assertEqual(
+      [ os.path.relpath(f, self.tempDir) for f in specFiles ],
+      [ os.path.join(*p) for p in [
+        ('a', 'spec.yml'),
+        ('b', 'x', 'spec.yml'),
+        ('b', 'x', 'z', 'spec.yml'),
+        ('b', 'y', 'spec.yml'),
+        ('c', 'spec.yml')]])
+
+  def testErrorsAreReportedPerFile(self):
+    self.makeTree()
+    invalid = self.writeSpec('b/bad', 'name: foo\nschema_version: 0\n')
+    malformed = self.writeSpec('d', '{ not yaml')
+    for jobs in [1, 2]:
+      results = list(svcb.scan.scanBenchmarks(self.tempDir, jobs=jobs))
+      self.assertEqual(len(results), 7)
+      failed = [ r for r in results if not r.success ]
+      self.assertEqual([ r.fileName for r in failed ], [ invalid, malformed ])
+      self.assertTrue(failed[0].isValidationError)
+      self.assertIn("'architectures' is a required property", failed[0].error)
+      self.assertFalse(failed[1].isValidationError)
+      self.assertIsNone(failed[1].benchmarks)
+
+  def testParallelMatchesSerial(self):
+    self.makeTree()
+    def getNames(jobs):
+      names = []
+      for result in svcb.scan.scanBenchmarks(self.tempDir, jobs=jobs):
+        self.assertTrue(result.success)
+        names.extend([ b.name for b in result.benchmarks ])
+      return names
+    serialNames = getNames(1)
+    self.assertEqual(serialNames, ['a', 'b_x', 'b_x_z', 'b_y', 'c'])
+    self.assertEqual(getNames(3), serialNames)
+
+  def testFilter(self):
+    self.makeTree()
+    benchmarkFilter = svcb.filters.BenchmarkFilter(languages=['c11'])
+    for jobs in [1, 2]:
+      results = list(svcb.scan.scanBenchmarks(self.tempDir, jobs=jobs, benchmarkFilter=benchmarkFilter))
+      self.assertEqual(len(results), 5)
+      self.assertEqual(list(svcb.scan.iterBenchmarks(results)), [])
+      self.assertEqual([ r.filteredOutNames for r in results ], [['a'], ['b_x'], ['b_x_z'], ['b_y'], ['c']])
@@ -2,6 +2,7 @@
 # This file is covered by the license in LICENSE-SVCB.txt
 import svcb
 from svcb import schema
+import jsonschema
 import unittest
 import sys
 
@@ -1560,3 +1561,58 @@ class TestSchema(unittest.TestCase):
     with self.assertRaisesRegex(schema.BenchmarkSpecificationValidationError, msgRegex):
       schema.validateBenchmarkSpecification(s, schema=self.persistentSchema)
 
+
+  def testGetSchemaIsCached(self):
+    self.assertIs(schema.getSchema(), schema.getSchema())
+
+  def testGetValidatorIsCached(self):
+    v = schema.getValidator()
+    self.assertIs(v, schema.getValidator(self.persistentSchema))
+    self.assertIs(v.schema, self.persistentSchema)
+
+  def testErrorsMatchJsonSchema(self):
+    valid = {
+      'architectures': 'any',
+      'categories': ['a', 'b'],
+      'defines': { 'FOO': None, 'BAR': '1' },
+      'language': 'c99',
+      'misc': {'foo': 1},
+      'name': 'foo',
+      'sources': ['a.c', 'dir/b.c'],
+      'verification_tasks': {
+        'no_assert_fail': {
+          'correct': False,
+          'counter_examples': [ { 'locations': [ {'file': 'a.c', 'line': 1} ] } ],
+        },
+      },
+    }
+    self.appendSchemaVersion(valid)
+    invalidModifications = [
+      ('architectures', ['x86_64', 'x86_64']),
+      ('architectures', ['any']),
+      ('architectures', True),
+      ('categories', ['a', 'a']),
+      ('defines', {'lower': None}),
+      ('defines', {'FOO': '!'}),
+      ('language', 'c17'),
+      ('name', 'bad name'),
+      ('sources', []),
+      ('sources', ['../a.c']),
+      ('sources', ['a.h']),
+      ('unknown', 1),
+      ('verification_tasks', {'no_assert_fail': {}}),
+      ('verification_tasks', {'no_assert_fail': {'correct': 1}}),
+      ('verification_tasks', {'no_assert_fail': {'correct': False, 'counter_examples': []}}),
+      ('verification_tasks', {'no_assert_fail': {'correct': False,
+        'counter_examples': [ { 'locations': [ {'file': 'a.c', 'line': 0} ] } ]}}),
+    ]
+    schema.validateBenchmarkSpecification(valid)
+    for (key, value) in invalidModifications:
+      s = dict(valid)
+      s[key] = value
+      # The reported error is the one `jsonschema.validate()` would raise
+      with self.assertRaises(jsonschema.exceptions.ValidationError) as expected:
+        jsonschema.validate(s, self.persistentSchema)
+      with self.assertRaises(schema.BenchmarkSpecificationValidationError) as actual:
+        schema.validateBenchmarkSpecification(s)
+      self.assertEqual(actual.exception.message, str(expected.exception), msg='{}: {}'.format(key, value))
@@ -0,0 +1,47 @@
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+import svcb
+import svcb.util
+import io
+import unittest
+
+def _divide(item, options):
+  return options // item
+
+def _onDivideError(item, options, e):
+  return type(e).__name__
+
+class TestUtil(unittest.TestCase):
+  def setUp(self):
+    self.data = {
+      'name': 'foo',
+      'sources': ['main.c'],
+      'defines': { 'BUG': None },
+      'verification_tasks': { 'no_assert_fail': { 'correct': False } },
+    }
+
+  def testDumpYaml(self):
+    yamlStr = svcb.util.dumpYaml(self.data)
+    self.assertNotIn('{', yamlStr) # Block style
+    self.assertEqual(svcb.util.loadYaml(yamlStr), self.data)
+
+  def testDumpJson(self):
+    jsonStr = svcb.util.dumpJson(self.data)
+    self.assertEqual(svcb.util.loadYaml(jsonStr), self.data)
+    self.assertEqual(svcb.util.loadYaml(jsonStr.encode('utf-8')), self.data)
+    self.assertEqual(svcb.util.loadYaml(io.StringIO(u'  ' + jsonStr)), self.data)
+
+  def testLoadFlowMapping(self):
+    # Looks like JSON but is only valid YAML
+    self.assertEqual(svcb.util.loadYaml('{a: [1, b]}'), {'a': [1, 'b']})
+
+  def testMapInPool(self):
+    items = [ 1, 2, 0, 5 ] * 10
+    expected = [ 10, 5, 'ZeroDivisionError', 2 ] * 10
+    for workers in (1, 2):
+      for chunkSize in (1, None):
+        results = list(svcb.util.mapInPool(_divide, items, 10, workers, chunkSize, onError=_onDivideError))
+        self.assertEqual(results, expected)
+    # Without `onError` exceptions are raised
+    with self.assertRaises(ZeroDivisionError):
+      list(svcb.util.mapInPool(_divide, [ 0 ], 10, workers=1))
@@ -9,6 +9,10 @@ from load_svcb import add_svcb_to_module_search_path
 add_svcb_to_module_search_path()
 import svcb.schema
 import svcb.benchmark
+import svcb.cache
+import svcb.filters
+import svcb.scan
+import svcb.util
 import argparse
 import logging
 import os
@@ -31,6 +35,11 @@ def main(args):
   parser.add_argument("directory",
                       type=str,
                       help="Directory to traverse")
+  parser.add_argument("--cache-dir", dest='cache_dir', type=str, default=None,
+                      help='Directory to cache loaded benchmark specification files in (default: ${})'.format(
+                        svcb.cache.CacheDirEnvVar))
+  parser.add_argument("-j", "--jobs", dest='jobs', type=int, default=svcb.util.getDefaultJobs(),
+                      help='Number of processes to load benchmark specification files with (default: %(default)s)')
   pargs = parser.parse_args(args)
   logLevel = getattr(logging, pargs.log_level.upper(),None)
   logging.basicConfig(level=logLevel)
@@ -48,58 +57,57 @@ def main(args):
   benchmarksFilteredOut = set()
   benchmarkToFileMap = dict()
 
-  # Traverse directory
-  for dirpath, dirnames, filenames in os.walk(pargs.directory):
-    for fname in filenames:
-      if fname == 'spec.yml':
-        fullFileName = os.path.join(dirpath, fname)
-        _logger.debug('Found file "{}"'.format(fullFileName))
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
 
-        benchSpec = None
-        try:
-          with open(fullFileName, 'r') as f:
-            benchSpec = svcb.schema.loadBenchmarkSpecification(f)
-        except svcb.schema.BenchmarkSpecificationValidationError as e:
-          _logger.error('Failed to validate "{}"'.format(fullFileName))
-          benchmarkFileParseFailures.add(fullFileName)
-          continue
+  # Benchmarks not in all the specified categories are rejected
+  # before they are built.
+  benchmarkFilter = svcb.filters.BenchmarkFilter(allCategories=pargs.all_categories)
+
+  # Traverse directory
+  for scanResult in svcb.scan.scanBenchmarks(pargs.directory,
+                                             jobs=pargs.jobs,
+                                             cacheDir=pargs.cache_dir,
+                                             benchmarkFilter=benchmarkFilter):
+    fullFileName = scanResult.fileName
+    if not scanResult.success:
+      if scanResult.isValidationError:
+        _logger.error('Failed to validate "{}"'.format(fullFileName))
+      else:
+        _logger.error('Failed to load "{}": {}'.format(fullFileName, scanResult.error))
+      benchmarkFileParseFailures.add(fullFileName)
+      continue
 
-        _logger.debug('Successfuly parsed and validated "{}"'.format(fullFileName))
-        benchmarkFileParseSuccess.add(fullFileName)
-        sys.stdout.write("Loaded {} file(s)\r".format(len(benchmarkFileParseSuccess)))
+    _logger.debug('Successfuly parsed and validated "{}"'.format(fullFileName))
+    benchmarkFileParseSuccess.add(fullFileName)
+    sys.stdout.write("Loaded {} file(s)\r".format(len(benchmarkFileParseSuccess)))
 
-        # Convert to BenchmarkObjects. This also handles variants by giving
-        # back multiple BenchmarkObjects
-        benchmarkObjs = svcb.benchmark.getBenchmarks(benchSpec)
-        assert len(benchmarkObjs) > 0
-        for benchmarkObj in benchmarkObjs:
-          if benchmarkObj.name in benchmarkToFileMap:
-            _logger.error('Attempted to load benchmark "{}" ({}) but a benchmark with the same name was already loaded from "{}"'.format(
-              benchmarkObj.name,
-              fullFileName,
-              benchmarkToFileMap[benchmarkObj.name]))
-            return 1
-          benchmarkToFileMap[benchmarkObj.name] = fullFileName
-          if len(benchmarkObj.categories) == 0:
-            uncategorisedBenchmarks.add(benchmarkObj.name)
-            continue
-          if pargs.all_categories is not None:
-            # Filter out benchmarks not in all specified categories
-            filterOut = False
-            for category in pargs.all_categories:
-              if category not in benchmarkObj.categories:
-                benchmarksFilteredOut.add(benchmarkObj.name)
-                _logger.debug('Filtering out "{}" because "{}" is not in category'.format(benchmarkObj.name, category))
-                filterOut = True
-                break
-            if filterOut:
-              continue
+    # Variants are handled by giving back multiple BenchmarkObjects
+    benchmarkObjs = scanResult.benchmarks
+    assert len(benchmarkObjs) + len(scanResult.filteredOutNames) > 0
+    benchmarkNames = [ b.name for b in benchmarkObjs ] + scanResult.filteredOutNames
+    for benchmarkName in benchmarkNames:
+      if benchmarkName in benchmarkToFileMap:
+        _logger.error('Attempted to load benchmark "{}" ({}) but a benchmark with the same name was already loaded from "{}"'.format(
+          benchmarkName,
+          fullFileName,
+          benchmarkToFileMap[benchmarkName]))
+        return 1
+      benchmarkToFileMap[benchmarkName] = fullFileName
+    for benchmarkName in scanResult.filteredOutNames:
+      _logger.debug('Filtering out "{}" because it is not in all of the categories'.format(benchmarkName))
+      benchmarksFilteredOut.add(benchmarkName)
+    for benchmarkObj in benchmarkObjs:
+      if len(benchmarkObj.categories) == 0:
+        uncategorisedBenchmarks.add(benchmarkObj.name)
+        continue
 
-          # Handle categories
-          for category in benchmarkObj.categories:
-            if categoryToBenchmarkNames.get(category) == None:
-              categoryToBenchmarkNames[category] = set()
-            categoryToBenchmarkNames[category].add(benchmarkObj.name)
+      # Handle categories
+      for category in benchmarkObj.categories:
+        if categoryToBenchmarkNames.get(category) == None:
+          categoryToBenchmarkNames[category] = set()
+        categoryToBenchmarkNames[category].add(benchmarkObj.name)
 
   # Show statistics
   print("")
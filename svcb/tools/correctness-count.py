@@ -9,6 +9,10 @@ from load_svcb import add_svcb_to_module_search_path
 add_svcb_to_module_search_path()
 import svcb.schema
 import svcb.benchmark
+import svcb.cache
+import svcb.filters
+import svcb.scan
+import svcb.util
 import argparse
 import logging
 import os
@@ -25,6 +29,11 @@ def main(args):
   parser.add_argument("directory",
                       type=str,
                       help="Directory to traverse")
+  parser.add_argument("--cache-dir", dest='cache_dir', type=str, default=None,
+                      help='Directory to cache loaded benchmark specification files in (default: ${})'.format(
+                        svcb.cache.CacheDirEnvVar))
+  parser.add_argument("-j", "--jobs", dest='jobs', type=int, default=svcb.util.getDefaultJobs(),
+                      help='Number of processes to load benchmark specification files with (default: %(default)s)')
   parser.add_argument("--categories", type=str, nargs='+', default=None, help='Only gather process benchmarks belonging to the specified categories')
   parser.add_argument("--mode", choices=['tasks','benchmark'], default='tasks', help='Group by tasks or by benchmark')
   pargs = parser.parse_args(args)
@@ -44,63 +53,66 @@ def main(args):
   verificationTaskMap = { }
 
   # Prepare verificationTaskMap
+  # Only counts are kept so memory usage does not grow with the number of benchmarks
   if pargs.mode == 'tasks':
     # FIXME: Refactor to do preparation here
     pass
   elif pargs.mode == 'benchmark':
-    verificationTaskMap[0] = set() # All correct
-    verificationTaskMap[1] = set() # At least one incorrect task
-    verificationTaskMap[2] = set() # Mixture of correct and unknown verification tasks.
-    verificationTaskMap[3] = set() # All tasks are unknown
+    verificationTaskMap[0] = 0 # All correct
+    verificationTaskMap[1] = 0 # At least one incorrect task
+    verificationTaskMap[2] = 0 # Mixture of correct and unknown verification tasks.
+    verificationTaskMap[3] = 0 # All tasks are unknown
   else:
     raise Exception('Unreachable')
 
-  onlyProcessCategories = set(pargs.categories) if pargs.categories != None else set()
+  # Benchmarks not in the requested categories are rejected
+  # before they are built.
+  benchmarkFilter = svcb.filters.BenchmarkFilter(anyCategories=pargs.categories)
+
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
 
   # Traverse directory
-  for dirpath, dirnames, filenames in os.walk(pargs.directory):
-    for fname in filenames:
-      if fname == 'spec.yml':
-        fullFileName = os.path.join(dirpath, fname)
-        _logger.debug('Found file "{}"'.format(fullFileName))
-
-        benchSpec = None
-        try:
-          with open(fullFileName, 'r') as f:
-            benchSpec = svcb.schema.loadBenchmarkSpecification(f)
-        except svcb.schema.BenchmarkSpecificationValidationError as e:
-          _logger.error('Failed to validate "{}"'.format(fullFileName))
-          benchmarkFileParseFailures.add(fullFileName)
-          continue
-
-        _logger.debug('Successfuly parsed and validated "{}"'.format(fullFileName))
-        benchmarkFileParseSuccess.add(fullFileName)
-        sys.stdout.write("Loaded {} file(s)\r".format(len(benchmarkFileParseSuccess)))
-
-        # Convert to BenchmarkObjects. This also handles variants by giving
-        # back multiple BenchmarkObjects
-        benchmarkObjs = svcb.benchmark.getBenchmarks(benchSpec)
-        assert len(benchmarkObjs) > 0
-        for benchmarkObj in benchmarkObjs:
-          assert benchmarkObj.name not in benchmarkNames
-          benchmarkNames.add(benchmarkObj.name)
-          if pargs.categories != None:
-            if len(onlyProcessCategories.intersection(benchmarkObj.categories)) == 0:
-              # Skip
-              benchmarksSkipped.add(benchmarkObj)
-              continue
-
-          # Verification tasks
-          if pargs.mode == 'tasks':
-            for (task, taskProperties) in benchmarkObj.verificationTasks.items():
-                if task not in verificationTaskMap:
-                  verificationTaskMap[task] = { True: [], False: [], None: [] }
-                verificationTaskMap[task][taskProperties['correct']].append(benchmarkObj)
-          elif pargs.mode == 'benchmark':
-            group = determineGroup(benchmarkObj)
-            verificationTaskMap[group].add(benchmarkObj)
-          else:
-            raise Exception('Unreachable')
+  for scanResult in svcb.scan.scanBenchmarks(pargs.directory,
+                                             jobs=pargs.jobs,
+                                             cacheDir=pargs.cache_dir,
+                                             benchmarkFilter=benchmarkFilter):
+    fullFileName = scanResult.fileName
+    if not scanResult.success:
+      if scanResult.isValidationError:
+        _logger.error('Failed to validate "{}"'.format(fullFileName))
+      else:
+        _logger.error('Failed to load "{}": {}'.format(fullFileName, scanResult.error))
+      benchmarkFileParseFailures.add(fullFileName)
+      continue
+
+    _logger.debug('Successfuly parsed and validated "{}"'.format(fullFileName))
+    benchmarkFileParseSuccess.add(fullFileName)
+    sys.stdout.write("Loaded {} file(s)\r".format(len(benchmarkFileParseSuccess)))
+
+    # Variants are handled by giving back multiple BenchmarkObjects
+    benchmarkObjs = scanResult.benchmarks
+    assert len(benchmarkObjs) + len(scanResult.filteredOutNames) > 0
+    for benchmarkName in scanResult.filteredOutNames:
+      assert benchmarkName not in benchmarkNames
+      benchmarkNames.add(benchmarkName)
+      benchmarksSkipped.add(benchmarkName)
+    for benchmarkObj in benchmarkObjs:
+      assert benchmarkObj.name not in benchmarkNames
+      benchmarkNames.add(benchmarkObj.name)
+
+      # Verification tasks
+      if pargs.mode == 'tasks':
+        for (task, taskProperties) in benchmarkObj.verificationTasks.items():
+            if task not in verificationTaskMap:
+              verificationTaskMap[task] = { True: 0, False: 0, None: 0 }
+            verificationTaskMap[task][taskProperties['correct']] += 1
+      elif pargs.mode == 'benchmark':
+        group = determineGroup(benchmarkObj)
+        verificationTaskMap[group] += 1
+      else:
+        raise Exception('Unreachable')
 
   # Show statistics
   print("")
@@ -114,16 +126,16 @@ def main(args):
     print("Verification Tasks")
     for (task, expectedResult) in verificationTaskMap.items():
       print("Task {}:".format(task))
-      print("# of tasks expected to be correct: {}".format(len(expectedResult[True])))
-      print("# of tasks expected to be incorrect: {}".format(len(expectedResult[False])))
-      print("# of tasks with unknown correctness: {}".format(len(expectedResult[None])))
+      print("# of tasks expected to be correct: {}".format(expectedResult[True]))
+      print("# of tasks expected to be incorrect: {}".format(expectedResult[False]))
+      print("# of tasks with unknown correctness: {}".format(expectedResult[None]))
       print("")
   elif pargs.mode == 'benchmark':
     print("Grouped by benchmark")
-    print("# of benchmarks that expect all tasks to be correct: {}".format(len(verificationTaskMap[0])))
-    print("# of benchmarks that expect at least one task to be incorrect: {}".format(len(verificationTaskMap[1])))
-    print("# of benchmarks that expect tasks to be a mixture of correct and unknown: {}".format(len(verificationTaskMap[2])))
-    print("# of benchmarks that expect all tasks to be unknown: {}".format(len(verificationTaskMap[3])))
+    print("# of benchmarks that expect all tasks to be correct: {}".format(verificationTaskMap[0]))
+    print("# of benchmarks that expect at least one task to be incorrect: {}".format(verificationTaskMap[1]))
+    print("# of benchmarks that expect tasks to be a mixture of correct and unknown: {}".format(verificationTaskMap[2]))
+    print("# of benchmarks that expect all tasks to be unknown: {}".format(verificationTaskMap[3]))
     print("")
   else:
     raise Exception('Unreachable')
@@ -9,6 +9,8 @@ add_svcb_to_module_search_path()
 import svcb
 import svcb.schema
 import svcb.benchmark
+import svcb.filters
+import svcb.index
 import argparse
 import logging
 import os
@@ -26,11 +28,26 @@ def main(args):
                       type=argparse.FileType('r'))
   parser.add_argument("-o", "--output", type=argparse.FileType('w'), default=sys.stdout)
   parser.add_argument("--categories", type=str, nargs='+', default=None, help='Only gather process benchmarks belonging to the specified categories')
+  parser.add_argument("--index", type=str, default=None,
+                      help='Benchmark index built by the build system. Files recorded in the index are not parsed')
   pargs = parser.parse_args(args)
   logLevel = getattr(logging, pargs.log_level.upper(),None)
   logging.basicConfig(level=logLevel)
   _logger = logging.getLogger(__name__)
 
+  indexedFiles = set()
+  indexedFilesToKeep = set()
+  if pargs.index is not None:
+    try:
+      index = svcb.index.BenchmarkIndex(pargs.index)
+    except svcb.index.BenchmarkIndexException as e:
+      _logger.error(str(e))
+      return 1
+    indexedFiles = index.getAugmentedSpecPaths()
+    indexedFilesToKeep = index.getAugmentedSpecPaths(
+      svcb.filters.BenchmarkFilter(anyCategories=pargs.categories))
+    index.close()
+
   benchmarkFileParseFailures = set()
   benchmarkFilesToKeep = set()
   for line in pargs.augmented_spec_file_list.readlines():
@@ -38,6 +55,12 @@ def main(args):
     if not os.path.exists(filePath):
       _logger.error('File "{}" does not exist'.format(filePath))
       return 1
+    if filePath in indexedFiles:
+      if filePath in indexedFilesToKeep:
+        benchmarkFilesToKeep.add(filePath)
+      else:
+        _logger.info('Dropping "{}"'.format(filePath))
+      continue
     # Parse as spec file
     benchSpec = None
     try:
@@ -45,8 +68,8 @@ def main(args):
         _logger.debug('Parsing "{}"'.format(filePath))
         benchSpec = svcb.schema.loadBenchmarkSpecification(f)
     except svcb.schema.BenchmarkSpecificationValidationError as e:
-      _logger.error('Failed to validate "{}"'.format(fullFileName))
-      benchmarkFileParseFailures.add(fullFileName)
+      _logger.error('Failed to validate "{}"'.format(filePath))
+      benchmarkFileParseFailures.add(filePath)
       continue
     # Get benchmark object
     benchmarkObjs = svcb.benchmark.getBenchmarks(benchSpec)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Build an index (a SQLite database) of expanded benchmarks.
+
+The benchmarks to index are either read from a manifest written by the
+build system (``--manifest``) where each line is a CMake target name, the
+benchmark specification file that declares it, the path to the built
+executable, the path to the LLVM bitcode and the path to the augmented
+benchmark specification file separated by tabs (the last three may be
+empty) or found by traversing a directory (``--directory``).
+"""
+from load_svcb import add_svcb_to_module_search_path
+add_svcb_to_module_search_path()
+import svcb.cache
+import svcb.index
+import svcb.scan
+import svcb.util
+import argparse
+import logging
+import os
+import re
+import sys
+
+_logger = None
+
+def main(args):
+  global _logger
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument("-l","--log-level",type=str, default="info",
+                      dest="log_level",
+                      choices=['debug','info','warning','error'])
+  group = parser.add_mutually_exclusive_group(required=True)
+  group.add_argument("--manifest", type=argparse.FileType('r'), default=None,
+                     help='Manifest of targets written by the build system')
+  group.add_argument("--directory", type=str, default=None,
+                     help='Directory to traverse for benchmark specification files')
+  parser.add_argument("--architectures", type=str, nargs='+', default=None,
+                      help='Only index targets for these architectures (--directory only)')
+  parser.add_argument("-o", "--output", type=str, required=True,
+                      help='Path to write the index to')
+  parser.add_argument("--cache-dir", dest='cache_dir', type=str, default=None,
+                      help='Directory to cache loaded benchmark specification files in (default: ${})'.format(
+                        svcb.cache.CacheDirEnvVar))
+  parser.add_argument("-j", "--jobs", dest='jobs', type=int, default=svcb.util.getDefaultJobs(),
+                      help='Number of processes to load benchmark specification files with (default: %(default)s)')
+  pargs = parser.parse_args(args)
+  logLevel = getattr(logging, pargs.log_level.upper(),None)
+  logging.basicConfig(level=logLevel)
+  _logger = logging.getLogger(__name__)
+
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
+
+  if pargs.manifest is not None:
+    entries = getEntriesFromManifest(pargs.manifest, pargs)
+  else:
+    if not os.path.isdir(pargs.directory):
+      _logger.error('"{}" is not a directory'.format(pargs.directory))
+      return 1
+    entries = getEntriesFromDirectory(pargs.directory, pargs)
+  if entries is None:
+    return 1
+
+  try:
+    index = svcb.index.BenchmarkIndex.create(pargs.output, entries)
+  except svcb.index.BenchmarkIndexException as e:
+    _logger.error(str(e))
+    return 1
+  index.close()
+  _logger.info('Wrote {} target(s) to "{}"'.format(len(entries), pargs.output))
+  return 0
+
+def getEntriesFromManifest(manifestFile, pargs):
+  """
+    Returns a list of ``IndexEntry`` for the targets in ``manifestFile``
+    or None on failure.
+  """
+  targetsBySpec = {}
+  for line in manifestFile:
+    line = line.rstrip('\r\n')
+    if len(line) == 0:
+      continue
+    fields = line.split('\t')
+    if len(fields) != 5:
+      _logger.error('Malformed manifest line "{}"'.format(line))
+      return None
+    (targetName, specFile, exePath, llvmBcPath, augmentedSpecPath) = [
+      f if len(f) > 0 else None for f in fields ]
+    if specFile is None or targetName is None:
+      _logger.error('Malformed manifest line "{}"'.format(line))
+      return None
+    if specFile not in targetsBySpec:
+      targetsBySpec[specFile] = []
+    targetsBySpec[specFile].append((targetName, exePath, llvmBcPath, augmentedSpecPath))
+
+  entries = []
+  specFiles = sorted(targetsBySpec.keys())
+  for scanResult in svcb.scan.loadSpecFiles(specFiles, jobs=pargs.jobs, cacheDir=pargs.cache_dir):
+    if not scanResult.success:
+      _logger.error('Failed to load "{}": {}'.format(scanResult.fileName, scanResult.error))
+      return None
+    specPath = os.path.realpath(scanResult.fileName)
+    benchmarkByName = { b.name: b for b in scanResult.benchmarks }
+    for (targetName, exePath, llvmBcPath, augmentedSpecPath) in targetsBySpec[scanResult.fileName]:
+      matchResult = re.match(r'^(.+)\.(.+)$', targetName)
+      if matchResult is None or matchResult.group(1) not in benchmarkByName:
+        _logger.error('Target "{}" is not declared by "{}"'.format(targetName, specPath))
+        return None
+      targetEntries = svcb.index.makeEntries(benchmarkByName[matchResult.group(1)],
+                                             specPath,
+                                             architectures=[matchResult.group(2)])
+      if len(targetEntries) != 1:
+        _logger.error('Benchmark for target "{}" does not support the architecture'.format(targetName))
+        return None
+      entry = targetEntries[0]
+      entry.exePath = exePath
+      entry.llvmBcPath = llvmBcPath
+      entry.augmentedSpecPath = augmentedSpecPath
+      entries.append(entry)
+  return entries
+
+def getEntriesFromDirectory(directory, pargs):
+  """
+    Returns a list of ``IndexEntry`` for all the benchmarks
+    found in ``directory`` or None on failure.
+  """
+  entries = []
+  failureCount = 0
+  for scanResult in svcb.scan.scanBenchmarks(directory, jobs=pargs.jobs, cacheDir=pargs.cache_dir):
+    if not scanResult.success:
+      _logger.error('Failed to load "{}": {}'.format(scanResult.fileName, scanResult.error))
+      failureCount += 1
+      continue
+    specPath = os.path.realpath(scanResult.fileName)
+    for benchmarkObj in scanResult.benchmarks:
+      entries.extend(svcb.index.makeEntries(benchmarkObj, specPath, architectures=pargs.architectures))
+  if failureCount > 0:
+    return None
+  return entries
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Classify result records (see ``svcb/svcb/check.py``) found in a
+directory against the expected correctness and counter example
+locations of the verification tasks of the benchmarks in a directory
+of benchmark specification files.
+
+Each record is classified as a true positive, false positive,
+unexpected counter example, true negative, false negative, timeout,
+unknown or error. A summary of the counts (overall and per task) is
+written to the output.
+"""
+from load_svcb import add_svcb_to_module_search_path
+add_svcb_to_module_search_path()
+import svcb.cache
+import svcb.check
+import svcb.scan
+import svcb.util
+import argparse
+import json
+import logging
+import os
+import sys
+
+_logger = None
+
+def main(args):
+  global _logger
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("-l","--log-level",type=str, default="info",
+                      dest="log_level",
+                      choices=['debug','info','warning','error'])
+  parser.add_argument('results_directory',
+                      help='Directory to traverse for result record files')
+  parser.add_argument("--directory", type=str, required=True,
+                      help='Directory to traverse for benchmark specification files')
+  parser.add_argument("--cache-dir", dest='cache_dir', type=str, default=None,
+                      help='Directory to cache loaded benchmark specification files in (default: ${})'.format(
+                        svcb.cache.CacheDirEnvVar))
+  parser.add_argument("-j", "--jobs", dest='jobs', type=int, default=svcb.util.getDefaultJobs(),
+                      help='Number of processes to load files with (default: %(default)s)')
+  parser.add_argument("--records-output", dest='records_output', type=argparse.FileType('w'), default=None,
+                      help='Write each record with its classification as a line of JSON to this file')
+  parser.add_argument("--format", dest='output_format', choices=['text', 'json', 'yaml'], default='text',
+                      help='Format of the summary (default: %(default)s)')
+  parser.add_argument("-o", "--output", type=argparse.FileType('w'), default=sys.stdout)
+  pargs = parser.parse_args(args)
+  logLevel = getattr(logging, pargs.log_level.upper(),None)
+  logging.basicConfig(level=logLevel)
+  _logger = logging.getLogger(__name__)
+
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
+  for directory in (pargs.directory, pargs.results_directory):
+    if not os.path.isdir(directory):
+      _logger.error('"{}" is not a directory'.format(directory))
+      return 1
+
+  expectationIndex = buildExpectationIndex(pargs)
+  if expectationIndex is None:
+    return 1
+  _logger.info('Indexed {} benchmark(s)'.format(len(expectationIndex)))
+
+  recordFiles = svcb.check.findRecordFiles(pargs.results_directory)
+  _logger.info('Checking {} result record file(s)'.format(len(recordFiles)))
+  counts = { c: 0 for c in svcb.check.Classifications }
+  countsByTask = {}
+  for (recordFile, classifiedRecords) in checkRecordFiles(recordFiles, expectationIndex, pargs.jobs):
+    for (record, classification, message) in classifiedRecords:
+      if message is not None:
+        _logger.warning('"{}": {}'.format(recordFile, message))
+      counts[classification] += 1
+      task = record.get('task', None) if isinstance(record, dict) else None
+      if task is not None and classification != 'error':
+        if task not in countsByTask:
+          countsByTask[task] = { c: 0 for c in svcb.check.Classifications }
+        countsByTask[task][classification] += 1
+      if pargs.records_output is not None:
+        pargs.records_output.write(json.dumps({
+          'file': recordFile,
+          'record': record,
+          'classification': classification,
+          'message': message,
+        }, sort_keys=True))
+        pargs.records_output.write('\n')
+
+  writeSummary(counts, countsByTask, pargs)
+  return 0
+
+def buildExpectationIndex(pargs):
+  expectationIndex = svcb.check.ExpectationIndex()
+  failureCount = 0
+  for scanResult in svcb.scan.scanBenchmarks(pargs.directory, jobs=pargs.jobs, cacheDir=pargs.cache_dir):
+    if not scanResult.success:
+      _logger.error('Failed to load "{}": {}'.format(scanResult.fileName, scanResult.error))
+      failureCount += 1
+      continue
+    for benchmarkObj in scanResult.benchmarks:
+      try:
+        expectationIndex.add(benchmarkObj)
+      except svcb.check.CheckException as e:
+        _logger.error(str(e))
+        failureCount += 1
+  if failureCount > 0:
+    return None
+  return expectationIndex
+
+def _checkRecordFile(recordFile, expectationIndex):
+  records = svcb.check.loadRecords(recordFile)
+  classifiedRecords = []
+  for record in records:
+    (classification, message) = svcb.check.classify(record, expectationIndex)
+    classifiedRecords.append((record, classification, message))
+  return (recordFile, classifiedRecords)
+
+def _onCheckRecordFileError(recordFile, expectationIndex, e):
+  return (recordFile, [ (None, 'error', 'Failed to load: {}: {}'.format(type(e).__name__, e)) ])
+
+def checkRecordFiles(recordFiles, expectationIndex, jobs):
+  """
+    Generator that yields a tuple of each of ``recordFiles`` and a list
+    of (record, classification, message) tuples for the records in it.
+  """
+  return svcb.util.mapInPool(_checkRecordFile, recordFiles, expectationIndex, jobs, chunkSize=None,
+                             onError=_onCheckRecordFileError)
+
+def writeSummary(counts, countsByTask, pargs):
+  output = pargs.output
+  if pargs.output_format == 'json':
+    output.write(svcb.util.dumpJson({ 'total': counts, 'tasks': countsByTask }))
+  elif pargs.output_format == 'yaml':
+    output.write(svcb.util.dumpYaml({ 'total': counts, 'tasks': countsByTask }))
+  elif pargs.output_format == 'text':
+    def _writeCounts(taskCounts, indent):
+      for classification in svcb.check.Classifications:
+        output.write('{}{}: {}\n'.format(indent, classification, taskCounts[classification]))
+    output.write('Total: {}\n'.format(sum(counts.values())))
+    _writeCounts(counts, '  ')
+    for (task, taskCounts) in sorted(countsByTask.items()):
+      output.write('{}: {}\n'.format(task, sum(taskCounts.values())))
+      _writeCounts(taskCounts, '  ')
+  else:
+    raise Exception('Unreachable')
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -6,10 +6,17 @@ Reads a benchmark specification file and a CMake target name
 and emit the corresponding benchmark specification file
 (variants removed) optionally augmented with paths to
 files built by the CMake build system.
+
+The augmented benchmark specification files for many targets
+can be written by a single invocation that only loads each
+benchmark specification file once, either by giving
+``--target TARGET=EXE_PATH[:LLVM_BC_PATH]`` multiple times
+or by giving a manifest (``--manifest``).
 """
 from load_svcb import add_svcb_to_module_search_path
 add_svcb_to_module_search_path()
 import argparse
+import json
 import logging
 import os
 import pprint
@@ -17,21 +24,72 @@ import re
 import svcb
 import svcb.benchmark
 import svcb.build
+import svcb.cache
 import svcb.schema
+import svcb.util
 import sys
-import yaml
 
 _logger = None
 
-def main(args):
-  global _logger
-  parser = argparse.ArgumentParser(description=__doc__)
+def _getMode(args):
+  """
+    Returns the mode (``manifest``, ``targets`` or ``single``) requested
+    by the command line arguments ``args``. Each mode has its own parser
+    so that the positional arguments of the single target mode stay
+    required and can be given anywhere on the command line.
+  """
+  for arg in args:
+    optionName = arg.split('=', 1)[0]
+    if optionName == '--manifest':
+      return 'manifest'
+    if optionName == '--target':
+      return 'targets'
+  return 'single'
+
+def buildParser(mode):
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
   parser.add_argument("-l","--log-level",type=str, default="info",
                       dest="log_level",
                       choices=['debug','info','warning','error'])
+  parser.add_argument('--format',
+                      dest='output_format',
+                      choices=['yaml', 'json'],
+                      default='yaml',
+                      help='Format to write files in. JSON is also valid YAML but is much '
+                           'faster to write and read (default: %(default)s)')
+  parser.add_argument('--cache-dir',
+                      dest='cache_dir',
+                      default=None,
+                      help='Directory to cache loaded benchmark specification files in '
+                           '(default: ${})'.format(svcb.cache.CacheDirEnvVar))
+  if mode == 'manifest':
+    parser.add_argument('--manifest',
+                        type=argparse.FileType('r'),
+                        required=True,
+                        help='Manifest of augmented benchmark specification files to write')
+    return parser
+
   parser.add_argument('bench_spec_file',
                       help='Benchmark specification file',
-                      type=argparse.FileType('r'))
+                      type=str)
+  if mode == 'targets':
+    parser.add_argument('--target',
+                        dest='targets',
+                        action='append',
+                        required=True,
+                        metavar='TARGET=EXE_PATH[:LLVM_BC_PATH]',
+                        help='Write the augmented benchmark specification file for TARGET '
+                             '(declared by the benchmark specification file) to '
+                             '``<output-dir>/TARGET.yml``. May be given multiple times.')
+    parser.add_argument('--output-dir',
+                        dest='output_dir',
+                        type=str,
+                        default=os.getcwd(),
+                        help='Directory to write files to with --target (default: %(default)s)')
+    return parser
+
+  assert mode == 'single'
   parser.add_argument('--exe-path', dest='exe_path', type=str, default=None)
   parser.add_argument('--llvm-bc-path', dest='llvm_bc_path', type=str, default=None)
   parser.add_argument('-o', '--output',
@@ -39,72 +97,195 @@ def main(args):
                       default=sys.stdout,
                       help='Output location (default stdout)')
   parser.add_argument('cmake_target_name', type=str)
+  return parser
 
-  pArgs = parser.parse_args()
+def main(args):
+  global _logger
+  mode = _getMode(args[1:])
+  pArgs = buildParser(mode).parse_args(args[1:])
   logLevel = getattr(logging, pArgs.log_level.upper(),None)
   logging.basicConfig(level=logLevel)
   _logger = logging.getLogger(__name__)
 
+  if mode == 'manifest':
+    entries = readManifest(pArgs.manifest)
+  elif mode == 'targets':
+    entries = parseTargets(pArgs.targets, pArgs.bench_spec_file, pArgs.output_dir)
+  else:
+    entries = [ AugmentedSpecEntry(pArgs.cmake_target_name,
+                                   pArgs.bench_spec_file,
+                                   pArgs.exe_path,
+                                   pArgs.llvm_bc_path,
+                                   pArgs.output) ]
+  if entries is None:
+    return 1
+  return writeAugmentedSpecs(entries, svcb.cache.SpecCache.fromEnvironment(pArgs.cache_dir), pArgs.output_format)
+
+class AugmentedSpecEntry(object):
+  """
+    An augmented benchmark specification file to write for the CMake
+    target ``targetName`` declared by the benchmark specification file
+    ``specFileName``. ``output`` is a path or a file object.
+  """
+  __slots__ = ('targetName', 'specFileName', 'exePath', 'llvmBcPath', 'output')
+  def __init__(self, targetName, specFileName, exePath, llvmBcPath, output):
+    self.targetName = targetName
+    self.specFileName = specFileName
+    self.exePath = exePath
+    self.llvmBcPath = llvmBcPath
+    self.output = output
+
+def parseTargets(targetArgs, specFileName, outputDir):
+  """
+    Returns a list of ``AugmentedSpecEntry`` from ``--target`` arguments
+    or None if they are malformed.
+  """
+  entries = []
+  for targetArg in targetArgs:
+    (targetName, sep, paths) = targetArg.partition('=')
+    if len(sep) == 0 or len(targetName) == 0 or len(paths) == 0:
+      _logger.error('"{}" is not of the form TARGET=EXE_PATH[:LLVM_BC_PATH]'.format(targetArg))
+      return None
+    (exePath, _, llvmBcPath) = paths.partition(':')
+    entries.append(AugmentedSpecEntry(targetName,
+                                      specFileName,
+                                      exePath,
+                                      llvmBcPath if len(llvmBcPath) > 0 else None,
+                                      os.path.join(outputDir, targetName + '.yml')))
+  return entries
+
+_manifestFields = ('target', 'spec', 'exe_path', 'llvm_bc_path', 'output')
+
+def readManifest(manifestFile):
+  """
+    Returns a list of ``AugmentedSpecEntry`` from ``manifestFile``
+    or None if it is malformed.
+
+    The manifest is either a JSON list of objects with the keys
+    ``target``, ``spec``, ``output`` and optionally ``exe_path`` and
+    ``llvm_bc_path`` or a text file where each line is those fields
+    (in that order) separated by tabs (the executable and LLVM bitcode
+    paths may be empty).
+  """
+  contents = manifestFile.read()
+  if contents.lstrip().startswith('['):
+    try:
+      records = json.loads(contents)
+    except ValueError as e:
+      _logger.error('Failed to parse manifest: {}'.format(e))
+      return None
+  else:
+    records = []
+    for line in contents.splitlines():
+      if len(line) == 0:
+        continue
+      fields = line.split('\t')
+      if len(fields) != len(_manifestFields):
+        _logger.error('Malformed manifest line "{}"'.format(line))
+        return None
+      records.append(dict(zip(_manifestFields, [ f if len(f) > 0 else None for f in fields ])))
+
+  entries = []
+  for record in records:
+    if not isinstance(record, dict) or any(record.get(k, None) is None for k in ('target', 'spec', 'output')):
+      _logger.error('Malformed manifest entry {}'.format(record))
+      return None
+    entries.append(AugmentedSpecEntry(record['target'],
+                                      record['spec'],
+                                      record.get('exe_path', None),
+                                      record.get('llvm_bc_path', None),
+                                      record['output']))
+  return entries
+
+def writeAugmentedSpecs(entries, specCache, outputFormat='yaml'):
+  """
+    Write the augmented benchmark specification file for each of the
+    ``AugmentedSpecEntry`` in ``entries`` in ``outputFormat`` (``yaml``
+    or ``json``). Each benchmark specification file is only loaded once.
+    Returns 0 on success and 1 otherwise.
+  """
+  entriesBySpec = {}
+  specFileNames = []
+  for entry in entries:
+    if entry.specFileName not in entriesBySpec:
+      entriesBySpec[entry.specFileName] = []
+      specFileNames.append(entry.specFileName)
+    entriesBySpec[entry.specFileName].append(entry)
+
+  for specFileName in specFileNames:
+    try:
+      benchmarkObjs = specCache.getBenchmarks(specFileName)
+    except svcb.schema.BenchmarkSpecificationValidationError as e:
+      _logger.error('Failed to validate "{}" against schema'.format(specFileName))
+      _logger.error(e.message)
+      return 1
+    except Exception as e:
+      _logger.error('Exception raised whilst loading "{}"'.format(specFileName))
+      _logger.error(str(e))
+      return 1
+    _logger.debug('Found {} benchmark(s) in "{}"'.format(len(benchmarkObjs), specFileName))
+    benchmarkByName = { b.name: b for b in benchmarkObjs }
+    for entry in entriesBySpec[specFileName]:
+      augmentedSpec = getAugmentedSpec(benchmarkByName, specFileName, entry.targetName, entry.exePath, entry.llvmBcPath, outputFormat)
+      if augmentedSpec is None:
+        return 1
+      if isinstance(entry.output, svcb.util.stringTypes):
+        with open(entry.output, 'w') as f:
+          f.write(augmentedSpec)
+      else:
+        entry.output.write(augmentedSpec)
+  return 0
+
+def getAugmentedSpec(benchmarkByName, specFileName, cmakeTargetName, exePath, llvmBcPath, outputFormat):
+  """
+    Returns the augmented benchmark specification file (as a string) for
+    the CMake target ``cmakeTargetName`` declared by one of the benchmarks
+    in ``benchmarkByName`` (a dictionary mapping benchmark names to
+    ``Benchmark`` objects) loaded from ``specFileName`` in ``outputFormat``
+    or None on failure.
+  """
   # Extract the benchmark name and architecture.
-  matchResult = re.match(r'^(.+)\.(.+)$', pArgs.cmake_target_name)
+  matchResult = re.match(r'^(.+)\.(.+)$', cmakeTargetName)
   if matchResult == None:
     _logger.error('cmake_target_name not in valid format')
-    return 1
+    return None
   benchmarkName = matchResult.group(1)
-  assert isinstance(benchmarkName, str) and len(benchmarkName) > 0
+  assert len(benchmarkName) > 0
   benchmarkArchitecture = matchResult.group(2)
-  assert isinstance(benchmarkArchitecture, str) and len(benchmarkArchitecture) > 0
-
-  # Load benchmark specification file.
-  try:
-    benchSpec = svcb.schema.loadBenchmarkSpecification(pArgs.bench_spec_file)
-  except svcb.schema.BenchmarkSpecificationValidationError as e:
-    _logger.error('Failed to validate benchmark specification against schema')
-    _logger.error(e.message)
-    return 1
-  except Exception as e:
-    _logger.error('Exception raised whilst loading benchmark specification file')
-    _logger.error(str(e))
-    raise e
+  assert len(benchmarkArchitecture) > 0
 
   # Get absolute path to benchmark specification file
-  bSpecPath = os.path.realpath(pArgs.bench_spec_file.name)
-  sourceFileDirectory = os.path.dirname(bSpecPath)
-
-  # Extract the benchmark objects
-  benchmarkObjs = svcb.benchmark.getBenchmarks(benchSpec)
-  _logger.debug('Found {} benchmark(s)'.format(len(benchmarkObjs)))
+  bSpecPath = os.path.realpath(specFileName)
 
   # Find the relevant benchmark object
   _logger.debug('Looking for benchmark with name "{}"'.format(benchmarkName))
-  filteredBenchmarkObjs  = list(filter(lambda b: b.name == benchmarkName, benchmarkObjs))
-
-  if len(filteredBenchmarkObjs) != 1:
+  benchmarkObj = benchmarkByName.get(benchmarkName, None)
+  if benchmarkObj is None:
     _logger.error('Failed to find requested benchmark {} in file {}'.format(benchmarkName, bSpecPath))
-    return 1
+    return None
 
-  benchmarkObj = filteredBenchmarkObjs[0]
+  # Augment a copy of the benchmark with additional data so that other
+  # targets of the same benchmark are unaffected.
+  augmentedRepr = dict(benchmarkObj.getInternalRepr())
+  augmentedRepr['misc'] = dict(augmentedRepr['misc'])
+  if exePath:
+    augmentedRepr['misc']['exe_path'] = os.path.basename(exePath)
 
-  # Augment the benchmark with additional data
-  if pArgs.exe_path:
-    benchmarkObj.getInternalRepr()['misc']['exe_path'] = os.path.basename(pArgs.exe_path)
+  if llvmBcPath:
+    augmentedRepr['misc']['llvm_bc_path'] = os.path.basename(llvmBcPath)
 
-  if pArgs.llvm_bc_path:
-    benchmarkObj.getInternalRepr()['misc']['llvm_bc_path'] = os.path.basename(pArgs.llvm_bc_path)
-
-  benchmarkObj.getInternalRepr()['misc']['original_spec'] = bSpecPath
+  augmentedRepr['misc']['original_spec'] = bSpecPath
 
   # Do runtime environment substitutions
-  replacement_runtime_env = svcb.benchmark.do_runtime_env_substitutions(
+  augmentedRepr['runtime_environment'] = svcb.benchmark.do_runtime_env_substitutions(
     benchmarkObj.runtimeEnvironment,
-    os.path.abspath(pArgs.bench_spec_file.name))
-  benchmarkObj.getInternalRepr()['runtime_environment'] = replacement_runtime_env
-
+    os.path.abspath(specFileName))
 
+  if outputFormat == 'json':
+    # JSON has no comments
+    return svcb.util.dumpJson(augmentedRepr)
   # Output as YAML
-  pArgs.output.write('# Automatically generated from "{}"\n'.format(bSpecPath))
-  pArgs.output.write(yaml.dump(benchmarkObj.getInternalRepr(), default_flow_style=False))
-  return 0
+  return '# Automatically generated from "{}"\n'.format(bSpecPath) + svcb.util.dumpYaml(augmentedRepr)
 
 if __name__ == '__main__':
   sys.exit(main(sys.argv))
@@ -4,17 +4,35 @@
 """
 Reads a benchmark specification file and
 emits CMake declarations for building the
-bencmarks
+bencmarks.
+
+In batch mode (``--batch-manifest``) a manifest listing
+many benchmark specification files and their corresponding
+output files is read instead and all the output files
+are written by a single invocation.
+
+In suite mode (``--suite``) the CMake declarations for all the
+given benchmark specification files are written to a single
+output file.
+
+Next to each output file a manifest (``<output>.manifest``) of
+content hashes of the inputs (benchmark specification file,
+dependency handlers, schema version and generator) and of the
+output is written. Output files whose manifest matches are not
+regenerated and output files whose contents would not change are
+not rewritten so that their timestamps are preserved.
 """
 from load_svcb import add_svcb_to_module_search_path
 add_svcb_to_module_search_path()
 import argparse
+import hashlib
 import logging
 import os
 import pprint
 import svcb
 import svcb.benchmark
 import svcb.build
+import svcb.cache
 import svcb.schema
 import sys
 import yaml
@@ -29,19 +47,46 @@ def main(args):
                       choices=['debug','info','warning','error'])
   parser.add_argument('bench_spec_file',
                       help='Benchmark specification file',
+                      nargs='?',
+                      default=None,
                       type=argparse.FileType('r'))
   parser.add_argument('--architecture', type=str, required=True,
                       choices=['x86_64', 'i686', 'unknown'])
   parser.add_argument('-o', '--output',
-                      type=argparse.FileType('w'),
-                      default=sys.stdout,
+                      type=str,
+                      default=None,
                       help='Output location (default stdout)')
+  parser.add_argument('--batch-manifest',
+                      dest='batch_manifest',
+                      type=argparse.FileType('r'),
+                      default=None,
+                      help='File where each line is a benchmark specification file '
+                           'and the file to write its CMake declarations to, separated '
+                           'by a tab. Benchmark specification files that fail to '
+                           'be processed are skipped.')
+  parser.add_argument('--batch-results',
+                      dest='batch_results',
+                      type=argparse.FileType('w'),
+                      default=None,
+                      help='File to write the output files that are up to date after '
+                           'processing --batch-manifest to (one per line)')
+  parser.add_argument('--suite',
+                      dest='suite_spec_files',
+                      default=None,
+                      nargs='+',
+                      help='Benchmark specification files to write CMake declarations '
+                           'for to a single output file (requires --output)')
   parser.add_argument('--load-dependency-handlers',
                       dest='load_dependency_handlers',
                       default=[],
                       nargs='+',
                       help='Additional dependency handlers to load')
   parser.add_argument('--coverage', action="store_true")
+  parser.add_argument('--cache-dir',
+                      dest='cache_dir',
+                      default=None,
+                      help='Directory to cache loaded benchmark specification files in '
+                           '(default: ${})'.format(svcb.cache.CacheDirEnvVar))
 
 
   pArgs = parser.parse_args()
@@ -49,8 +94,46 @@ def main(args):
   logging.basicConfig(level=logLevel)
   _logger = logging.getLogger(__name__)
 
+  modes = [ m for m in (pArgs.bench_spec_file, pArgs.batch_manifest, pArgs.suite_spec_files) if m is not None ]
+  if len(modes) != 1:
+    _logger.error('Exactly one of a benchmark specification file, --batch-manifest or --suite must be given')
+    return 1
+  if pArgs.suite_spec_files is not None and pArgs.output is None:
+    _logger.error('--suite requires --output')
+    return 1
+
+  # Create a CMakeDependencyDispatcher using the default handlers
+  dispatcher = svcb.build.CMakeDependencyDispatcher.getDefaultDispatcher()
+
+  # Load additional handlers
+  for fileName in pArgs.load_dependency_handlers:
+    if not os.path.exists(fileName):
+      _logger.error('Dependency handler "{}" does not exist'.format(fileName))
+      return 1
+    dispatcher.loadHandlerFromFile(fileName)
+
+  specCache = svcb.cache.SpecCache.fromEnvironment(pArgs.cache_dir)
+
+  if pArgs.batch_manifest is not None:
+    return batchGenerate(pArgs.batch_manifest, dispatcher, specCache, pArgs)
+  if pArgs.suite_spec_files is not None:
+    return suiteGenerate(pArgs.suite_spec_files, dispatcher, specCache, pArgs)
+
+  targetsManifest = None
+  if pArgs.output is not None:
+    targetsManifest = computeTargetsManifest(pArgs.bench_spec_file.name, pArgs)
+    if isUpToDate(pArgs.output, targetsManifest):
+      _logger.debug('"{}" is up to date'.format(pArgs.output))
+      touchTargetsManifest(pArgs.output)
+      return 0
+
   try:
-    benchSpec = svcb.schema.loadBenchmarkSpecification(pArgs.bench_spec_file)
+    if specCache.enabled:
+      (benchSpec, benchmarkObjs) = specCache.loadBenchmarkSpecificationAndBenchmarks(
+        pArgs.bench_spec_file.name)
+    else:
+      benchSpec = svcb.schema.loadBenchmarkSpecification(pArgs.bench_spec_file)
+      benchmarkObjs = svcb.benchmark.getBenchmarks(benchSpec)
   except svcb.schema.BenchmarkSpecificationValidationError as e:
     _logger.error('Failed to validate benchmark specification against schema')
     _logger.error(e.message)
@@ -62,27 +145,245 @@ def main(args):
 
   # Get absolute path to benchmark specification file
   bSpecPath = os.path.realpath(pArgs.bench_spec_file.name)
-  sourceFileDirectory = os.path.dirname(bSpecPath)
 
-  # Create a CMakeDependencyDispatcher using the default handlers
-  dispatcher = svcb.build.CMakeDependencyDispatcher.getDefaultDispatcher()
-
-  # Load additional handlers
-  for fileName in pArgs.load_dependency_handlers:
-    if not os.path.exists(fileName):
-      _logger.error('Dependency handler "{}" does not exist'.format(fileName))
-      return 1
-    dispatcher.loadHandlerFromFile(fileName)
+  cmakeDeclStr = generateDecls(benchmarkObjs, bSpecPath, dispatcher, pArgs)
+  if pArgs.output is None:
+    sys.stdout.write(cmakeDeclStr)
+  else:
+    writeTargetsFile(pArgs.output, cmakeDeclStr, targetsManifest)
+  return 0
 
-  benchmarkObjs = svcb.benchmark.getBenchmarks(benchSpec)
+def generateDecls(benchmarkObjs, bSpecPath, dispatcher, pArgs):
+  sourceFileDirectory = os.path.dirname(bSpecPath)
   _logger.debug('Found {} benchmark(s)'.format(len(benchmarkObjs)))
   cmakeDeclStr = svcb.build.generateCMakeDecls(benchmarkObjs,
                                                sourceRootDir=sourceFileDirectory,
                                                supportedArchitecture=pArgs.architecture,
                                                dependencyDispatcher=dispatcher,
                                                coverage=pArgs.coverage)
-  pArgs.output.write(cmakeDeclStr)
+  return cmakeDeclStr
+
+def suiteGenerate(specFileNames, dispatcher, specCache, pArgs):
+  """
+    Write the CMake declarations for all the benchmark specification
+    files in ``specFileNames`` to ``--output``.
+
+    Returns 0 on success and 1 otherwise.
+  """
+  targetsManifest = computeSuiteTargetsManifest(specFileNames, pArgs)
+  if isUpToDate(pArgs.output, targetsManifest):
+    _logger.debug('"{}" is up to date'.format(pArgs.output))
+    touchTargetsManifest(pArgs.output)
+    return 0
+
+  suite = []
+  for specFileName in specFileNames:
+    try:
+      (_, benchmarkObjs) = specCache.loadBenchmarkSpecificationAndBenchmarks(specFileName)
+    except svcb.schema.BenchmarkSpecificationValidationError as e:
+      _logger.error('Failed to validate "{}" against schema'.format(specFileName))
+      _logger.error(e.message)
+      return 1
+    except Exception as e:
+      _logger.error('Exception raised whilst loading "{}"'.format(specFileName))
+      _logger.error(str(e))
+      return 1
+    suite.append((os.path.realpath(specFileName), benchmarkObjs))
+
+  _logger.debug('Found {} benchmark(s) in {} file(s)'.format(
+    sum([ len(benchmarkObjs) for (_, benchmarkObjs) in suite ]),
+    len(suite)))
+  cmakeDeclStr = svcb.build.generateSuiteCMakeDecls(suite,
+                                                    supportedArchitecture=pArgs.architecture,
+                                                    dependencyDispatcher=dispatcher,
+                                                    coverage=pArgs.coverage)
+  writeTargetsFile(pArgs.output, cmakeDeclStr, targetsManifest)
   return 0
 
+def batchGenerate(manifestFile, dispatcher, specCache, pArgs):
+  """
+    Generate the CMake declarations for every entry in ``manifestFile``.
+
+    Entries that cannot be processed (e.g. because they fail validation or
+    use a dependency without a registered handler) are skipped and left
+    for ``add_benchmark()`` to generate individually (and report any errors).
+    The output files of the other entries are written to ``--batch-results``.
+
+    Returns 0 if every entry was processed and 1 otherwise.
+  """
+  entries = []
+  for line in manifestFile:
+    line = line.rstrip('\r\n')
+    if len(line) == 0:
+      continue
+    fields = line.split('\t')
+    if len(fields) != 2:
+      _logger.error('Malformed manifest line "{}"'.format(line))
+      return 1
+    entries.append((fields[0], fields[1]))
+  _logger.debug('Found {} manifest entries'.format(len(entries)))
+
+  skippedCount = 0
+  upToDateCount = 0
+  handledOutputFiles = []
+  for (specFileName, outputFileName) in entries:
+    _logger.debug('Processing "{}"'.format(specFileName))
+    cmakeDeclStr = None
+    targetsManifest = None
+    try:
+      targetsManifest = computeTargetsManifest(specFileName, pArgs)
+      if isUpToDate(outputFileName, targetsManifest):
+        _logger.debug('"{}" is up to date'.format(outputFileName))
+        touchTargetsManifest(outputFileName)
+        upToDateCount += 1
+        handledOutputFiles.append(outputFileName)
+        continue
+      (benchSpec, benchmarkObjs) = specCache.loadBenchmarkSpecificationAndBenchmarks(specFileName)
+      bSpecPath = os.path.realpath(specFileName)
+      missingHandlers = findDependenciesWithoutHandlers(benchSpec, dispatcher)
+      if len(missingHandlers) > 0:
+        # Likely needs a handler that is registered by
+        # `add_cmake_dependency_handler()` so defer to `add_benchmark()`.
+        _logger.debug('Deferring "{}" because there are no handlers for {}'.format(
+          specFileName,
+          missingHandlers))
+      else:
+        cmakeDeclStr = generateDecls(benchmarkObjs, bSpecPath, dispatcher, pArgs)
+    except svcb.schema.BenchmarkSpecificationValidationError as e:
+      _logger.warning('Failed to validate "{}": {}'.format(specFileName, e.message))
+    except Exception as e:
+      _logger.warning('Exception raised whilst processing "{}": {}'.format(specFileName, str(e)))
+
+    if cmakeDeclStr is None:
+      skippedCount += 1
+      continue
+
+    writeTargetsFile(outputFileName, cmakeDeclStr, targetsManifest)
+    handledOutputFiles.append(outputFileName)
+
+  if pArgs.batch_results is not None:
+    for outputFileName in handledOutputFiles:
+      pArgs.batch_results.write('{}\n'.format(outputFileName))
+    pArgs.batch_results.close()
+
+  _logger.info('Generated {} of {} file(s) ({} already up to date)'.format(
+    len(entries) - skippedCount - upToDateCount,
+    len(entries),
+    upToDateCount))
+  if specCache.enabled:
+    _logger.debug('Cache hits: {} misses: {}'.format(specCache.hits, specCache.misses))
+  return 0 if skippedCount == 0 else 1
+
+_manifestSuffix = '.manifest'
+
+def _hashBytes(data):
+  return hashlib.sha1(data).hexdigest()
+
+def _hashFile(fileName):
+  with open(fileName, 'rb') as f:
+    return _hashBytes(f.read())
+
+_generatorDigest = None
+def getGeneratorDigest():
+  """
+    Returns a digest of everything used to generate the output files
+    other than the benchmark specification file and dependency handlers.
+  """
+  global _generatorDigest
+  if _generatorDigest is None:
+    h = hashlib.sha1()
+    h.update(svcb.cache.getSourceDigest().encode('utf-8'))
+    h.update(_hashFile(os.path.abspath(__file__)).encode('utf-8'))
+    _generatorDigest = h.hexdigest()
+  return _generatorDigest
+
+def computeTargetsManifest(specFileName, pArgs):
+  """
+    Returns a list of (key, value) tuples describing the inputs
+    used to generate the output file for ``specFileName``.
+  """
+  targetsManifest = [
+    ('spec', _hashFile(specFileName)),
+    ('schema_version', str(svcb.schema.getSchema()['__version__'])),
+    ('generator', getGeneratorDigest()),
+    ('architecture', pArgs.architecture),
+    ('coverage', str(pArgs.coverage)),
+  ]
+  for handlerFile in pArgs.load_dependency_handlers:
+    targetsManifest.append(('handler', '{} {}'.format(os.path.abspath(handlerFile), _hashFile(handlerFile))))
+  return targetsManifest
+
+def computeSuiteTargetsManifest(specFileNames, pArgs):
+  """
+    Returns a list of (key, value) tuples describing the inputs
+    used to generate the output file for the suite of benchmark
+    specification files ``specFileNames``.
+  """
+  # The paths are recorded too because the output depends on the
+  # benchmark specification files that make up the suite.
+  targetsManifest = [ ('spec', '{} {}'.format(os.path.realpath(specFileName), _hashFile(specFileName)))
+                      for specFileName in specFileNames ]
+  # Everything apart from the benchmark specification file
+  targetsManifest.extend(computeTargetsManifest(specFileNames[0], pArgs)[1:])
+  return targetsManifest
+
+def _serializeTargetsManifest(targetsManifest, outputHash):
+  lines = [ '# Autogenerated. DO NOT MODIFY!' ]
+  for (key, value) in targetsManifest + [ ('output', outputHash) ]:
+    lines.append('{} {}'.format(key, value))
+  return '\n'.join(lines) + '\n'
+
+def isUpToDate(outputFileName, targetsManifest):
+  """
+    Returns True if ``outputFileName`` was generated from the inputs
+    described by ``targetsManifest`` and has not been modified since.
+  """
+  try:
+    with open(outputFileName + _manifestSuffix, 'r') as f:
+      existing = f.read()
+    outputHash = _hashFile(outputFileName)
+  except (IOError, OSError):
+    return False
+  return existing == _serializeTargetsManifest(targetsManifest, outputHash)
+
+def touchTargetsManifest(outputFileName):
+  # The build system compares the timestamp of the manifest against
+  # the inputs to decide whether to invoke this tool.
+  os.utime(outputFileName + _manifestSuffix, None)
+
+def writeTargetsFile(outputFileName, cmakeDeclStr, targetsManifest):
+  """
+    Write ``cmakeDeclStr`` to ``outputFileName`` (only if its contents
+    differ) and write its manifest.
+  """
+  data = cmakeDeclStr.encode('utf-8')
+  outputDir = os.path.dirname(outputFileName)
+  if len(outputDir) > 0 and not os.path.isdir(outputDir):
+    os.makedirs(outputDir)
+  existing = None
+  if os.path.exists(outputFileName):
+    with open(outputFileName, 'rb') as f:
+      existing = f.read()
+  if existing == data:
+    _logger.debug('"{}" is unchanged'.format(outputFileName))
+  else:
+    with open(outputFileName, 'wb') as f:
+      f.write(data)
+  with open(outputFileName + _manifestSuffix, 'w') as f:
+    f.write(_serializeTargetsManifest(targetsManifest, _hashBytes(data)))
+
+def findDependenciesWithoutHandlers(benchSpec, dispatcher):
+  """
+    Returns a sorted list of the dependency names used in ``benchSpec``
+    that ``dispatcher`` has no handler for.
+  """
+  dependencyNames = set()
+  if 'dependencies' in benchSpec:
+    dependencyNames.update(benchSpec['dependencies'].keys())
+  for variantProperties in benchSpec.get('variants', {}).values():
+    if 'dependencies' in variantProperties:
+      dependencyNames.update(variantProperties['dependencies'].keys())
+  return sorted([ name for name in dependencyNames if name not in dispatcher.handlers ])
+
 if __name__ == '__main__':
   sys.exit(main(sys.argv))
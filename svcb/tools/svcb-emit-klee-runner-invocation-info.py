@@ -5,10 +5,14 @@
 Reads a file containing a list of augmented spec files
 and generate a corresponding invocation info file to
 give to the klee-runner infrastructure.
+
+Augmented spec files are loaded in parallel and jobs are written
+(in the same order as the list) as soon as they are loaded.
 """
 from load_svcb import add_svcb_to_module_search_path
 add_svcb_to_module_search_path()
 import argparse
+import json
 import logging
 import os
 import pprint
@@ -16,9 +20,12 @@ import re
 import svcb
 import svcb.benchmark
 import svcb.build
+import svcb.cache
+import svcb.invocation
+import svcb.scan
 import svcb.schema
+import svcb.util
 import sys
-import yaml
 
 _logger = None
 
@@ -35,63 +42,287 @@ def main(args):
   parser.add_argument('augmented_spec_file_list',
                       help='Benchmark specification file',
                       type=argparse.FileType('r'))
+  parser.add_argument('--format',
+                      dest='output_format',
+                      choices=['yaml', 'json', 'yaml-stream', 'jsonl'],
+                      default='yaml',
+                      help='Format to write the invocation info in. JSON is also valid YAML but is '
+                           'much faster to write and read. ``yaml-stream`` writes each job as a '
+                           'separate YAML document and ``jsonl`` writes each job as a JSON object '
+                           'on its own line (default: %(default)s)')
+  parser.add_argument('-j', '--jobs',
+                      dest='jobs',
+                      type=int,
+                      default=svcb.util.getDefaultJobs(),
+                      help='Number of processes to load augmented spec files with (default: %(default)s)')
+  parser.add_argument('--cache-dir',
+                      dest='cache_dir',
+                      default=None,
+                      help='Directory to cache loaded augmented spec files in '
+                           '(default: ${})'.format(svcb.cache.CacheDirEnvVar))
   parser.add_argument('-o', '--output',
                       type=argparse.FileType('w'),
-                      default=sys.stdout,
+                      default=None,
                       help='Output location (default stdout)')
+  costGroup = parser.add_argument_group('ordering and sharding')
+  costGroup.add_argument('--order',
+                         choices=['list', 'cost'],
+                         default='list',
+                         help='Order of the jobs. ``list`` keeps the order of the augmented spec file list. '
+                              '``cost`` orders jobs by decreasing cost (longest first) (default: %(default)s)')
+  costGroup.add_argument('--shards',
+                         type=int,
+                         default=1,
+                         help='Split the jobs into this many invocation info files that '
+                              'are balanced on the cost of their jobs (default: %(default)s)')
+  costGroup.add_argument('--shard-output',
+                         dest='shard_output',
+                         default=None,
+                         help='Path template for the invocation info file of each shard. '
+                              '"{shard}" is replaced by the shard index (e.g. "invocation_info_{shard}.yml")')
+  costGroup.add_argument('--cost',
+                         choices=svcb.invocation.CostSources,
+                         default='estimated_run_time',
+                         help='Cost hint to order jobs and balance shards on (default: %(default)s)')
+  costGroup.add_argument('--run-times',
+                         dest='run_times',
+                         type=argparse.FileType('r'),
+                         default=None,
+                         help='klee-runner result info file (or mapping from augmented spec file to '
+                              'seconds) to read previous run times from')
 
   pargs = parser.parse_args()
   logLevel = getattr(logging, pargs.log_level.upper(),None)
   logging.basicConfig(level=logLevel)
   _logger = logging.getLogger(__name__)
 
-  invocationInfos = { 'schema_version':0, 'jobs':[]}
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
+  if pargs.shards < 1:
+    _logger.error('--shards must be at least 1')
+    return 1
+  if pargs.shards > 1:
+    if pargs.shard_output is None or '{shard}' not in pargs.shard_output:
+      _logger.error('--shard-output containing "{shard}" must be given with --shards')
+      return 1
+    if pargs.output is not None:
+      _logger.error('--output cannot be used with --shards')
+      return 1
+  runTimes = None
+  if pargs.cost == 'run_time' and pargs.run_times is None:
+    _logger.error('--run-times must be given with --cost=run_time')
+    return 1
+  if pargs.run_times is not None:
+    try:
+      runTimes = svcb.invocation.loadRunTimes(pargs.run_times)
+    except svcb.invocation.CostException as e:
+      _logger.error('Failed to load run times: {}'.format(e))
+      return 1
 
+  augmentedSpecFiles = []
   for path in pargs.augmented_spec_file_list:
     strippedPath = path.strip() # Remove trailing whitespace and newlines
-    _logger.info('Loading "{}"'.format(strippedPath))
-    # Load benchmark specification file.
-    try:
-      with open(strippedPath, 'r') as f:
-        benchSpec = svcb.schema.loadBenchmarkSpecification(f)
-    except svcb.schema.BenchmarkSpecificationValidationError as e:
-      _logger.error('Failed to validate benchmark specification against schema')
-      _logger.error(e.message)
-      return 1
-    except Exception as e:
-      _logger.error('Exception raised whilst loading benchmark specification file')
-      _logger.error(str(e))
-      raise e
-    benchmarkObjs = svcb.benchmark.getBenchmarks(benchSpec)
+    if len(strippedPath) > 0:
+      augmentedSpecFiles.append(strippedPath)
+  _logger.info('Loading {} augmented spec file(s)'.format(len(augmentedSpecFiles)))
+
+  try:
+    if pargs.shards == 1 and pargs.order == 'list':
+      writer = _writers[pargs.output_format](pargs.output or sys.stdout)
+      for (job, _) in loadJobs(augmentedSpecFiles, pargs):
+        writer.writeJob(job)
+      writer.finish()
+    else:
+      (jobs, costs) = loadJobsWithCosts(augmentedSpecFiles, runTimes, pargs)
+      if pargs.shards == 1:
+        writeJobs(pargs.output or sys.stdout, jobs, costs, range(len(jobs)), pargs)
+      else:
+        writeShards(jobs, costs, pargs)
+  except _LoadJobsException:
+    return 1
+  except svcb.invocation.CostException as e:
+    _logger.error(str(e))
+    return 1
+  return 0
+
+class _LoadJobsException(Exception):
+  pass
+
+def loadJobs(augmentedSpecFiles, pargs):
+  """
+    Generator that yields the invocation info job and ``Benchmark`` object
+    of each of ``augmentedSpecFiles``. Results are yielded in the same
+    order as ``augmentedSpecFiles`` as soon as they are loaded.
+    ``_LoadJobsException`` is raised if a file cannot be loaded.
+  """
+  for scanResult in svcb.scan.loadSpecFiles(augmentedSpecFiles,
+                                           jobs=pargs.jobs,
+                                           cacheDir=pargs.cache_dir):
+    if not scanResult.success:
+      if scanResult.isValidationError:
+        _logger.error('Failed to validate benchmark specification "{}" against schema'.format(scanResult.fileName))
+      else:
+        _logger.error('Exception raised whilst loading benchmark specification file "{}"'.format(scanResult.fileName))
+      _logger.error(scanResult.error)
+      raise _LoadJobsException()
+    benchmarkObjs = scanResult.benchmarks
     assert len(benchmarkObjs) == 1 # Augmented spec files should contain no variants
+    yield (getJob(benchmarkObjs[0], scanResult.fileName, pargs.program), benchmarkObjs[0])
 
-    benchmarkObj = benchmarkObjs[0]
+def loadJobsWithCosts(augmentedSpecFiles, runTimes, pargs):
+  """
+    Returns a tuple of the list of jobs for ``augmentedSpecFiles`` and
+    the list of their costs. The ``misc`` property of each job is
+    annotated with its cost (``estimated_cost``) and where it came from
+    (``cost_source``).
+  """
+  jobs = []
+  costs = []
+  features = []
+  for (job, benchmarkObj) in loadJobs(augmentedSpecFiles, pargs):
+    jobs.append(job)
+    costs.append(svcb.invocation.getJobCost(job, benchmarkObj, pargs.cost, runTimes))
+    if pargs.cost == 'estimated_run_time':
+      features.append(svcb.invocation.getEstimateFeatures(job, benchmarkObj))
+  costSources = [ (pargs.cost if c is not None else None) for c in costs ]
+  if pargs.cost == 'estimated_run_time':
+    costSources = [ ('run_time' if c is not None else None) for c in costs ]
+    costs = svcb.invocation.estimateMissingCosts(costs, features)
+    costSources = [ (s or ('estimate' if c is not None else None)) for (s, c) in zip(costSources, costs) ]
+  costs = svcb.invocation.fillMissingCosts(costs)
+  for (job, cost, costSource) in zip(jobs, costs, costSources):
+    job['misc']['estimated_cost'] = cost
+    job['misc']['cost_source'] = costSource or 'mean'
+  return (jobs, costs)
 
-    programPath=None
-    if pargs.program == 'llvm_bc':
-      programPath = benchmarkObj.misc['llvm_bc_path']
-    elif pargs.program == 'exe':
-      programPath = benchmarkObj.misc['exe_path']
-    else:
-      raise Exception('Unreachable')
-
-    # Make program path absolute
-    programPath = os.path.join(os.path.dirname(strippedPath), programPath)
-
-    job = {
-      'command_line_arguments': benchmarkObj.runtimeEnvironment['command_line_arguments'],
-      'environment_variables': benchmarkObj.runtimeEnvironment['environment_variables'],
-      'program': programPath,
-      'misc': {
-        'augmented_spec_file': os.path.abspath(strippedPath),
-      }
+def writeJobs(output, jobs, costs, jobIndices, pargs):
+  """
+    Write the jobs with indices ``jobIndices`` as an invocation info file
+    to ``output`` in the order given by ``pargs.order``.
+  """
+  if pargs.order == 'cost':
+    jobIndices = [ jobIndices[i] for i in svcb.invocation.orderJobs([ costs[j] for j in jobIndices ]) ]
+  writer = _writers[pargs.output_format](output)
+  for jobIndex in jobIndices:
+    writer.writeJob(jobs[jobIndex])
+  writer.finish()
+
+def writeShards(jobs, costs, pargs):
+  """
+    Write the jobs into ``pargs.shards`` self-contained invocation info
+    files balanced on the cost of their jobs. Unlike a single invocation
+    info file in list order all the jobs have to be loaded before
+    anything is written.
+  """
+  for (shardIndex, jobIndices) in enumerate(svcb.invocation.shardJobs(costs, pargs.shards)):
+    shardPath = pargs.shard_output.replace('{shard}', str(shardIndex))
+    _logger.info('Writing {} job(s) with total cost {} to "{}"'.format(
+      len(jobIndices), sum(costs[i] for i in jobIndices), shardPath))
+    with open(shardPath, 'w') as f:
+      writeJobs(f, jobs, costs, jobIndices, pargs)
+
+def getJob(benchmarkObj, augmentedSpecFile, program):
+  """
+    Returns the invocation info job (a dictionary) that runs
+    ``benchmarkObj`` loaded from ``augmentedSpecFile``.
+  """
+  programPath=None
+  if program == 'llvm_bc':
+    programPath = benchmarkObj.misc['llvm_bc_path']
+  elif program == 'exe':
+    programPath = benchmarkObj.misc['exe_path']
+  else:
+    raise Exception('Unreachable')
+
+  # Make program path absolute
+  programPath = os.path.join(os.path.dirname(augmentedSpecFile), programPath)
+
+  return {
+    'command_line_arguments': benchmarkObj.runtimeEnvironment['command_line_arguments'],
+    'environment_variables': benchmarkObj.runtimeEnvironment['environment_variables'],
+    'program': programPath,
+    'misc': {
+      'augmented_spec_file': os.path.abspath(augmentedSpecFile),
     }
-    invocationInfos['jobs'].append(job)
+  }
 
-  # Output as YAML
-  pargs.output.write('# Automatically generated invocation info\n')
-  pargs.output.write(yaml.dump(invocationInfos, default_flow_style=False))
-  return 0
+# Writers write jobs to ``output`` as they are given so the whole
+# invocation info never needs to be held in memory. The ``yaml`` and
+# ``json`` writers write the same document as dumping
+# ``{ 'jobs': [...], 'schema_version': 0 }`` in one go.
+_schemaVersion = 0
+
+class _YamlWriter(object):
+  def __init__(self, output):
+    self.output = output
+    self.jobCount = 0
+    self.output.write('# Automatically generated invocation info\n')
+
+  def writeJob(self, job):
+    if self.jobCount == 0:
+      self.output.write('jobs:\n')
+    # A block sequence at the top level has the same indentation
+    # as one that is the value of a top level key.
+    self.output.write(svcb.util.dumpYaml([ job ]))
+    self.jobCount += 1
+
+  def finish(self):
+    if self.jobCount == 0:
+      self.output.write('jobs: []\n')
+    self.output.write(svcb.util.dumpYaml({ 'schema_version': _schemaVersion }))
+
+class _JsonWriter(object):
+  _indent = '    '
+  def __init__(self, output):
+    self.output = output
+    self.jobCount = 0
+
+  def writeJob(self, job):
+    if self.jobCount == 0:
+      self.output.write('{\n  "jobs": [\n')
+    else:
+      self.output.write(',\n')
+    jobStr = json.dumps(job, indent=2, sort_keys=True)
+    self.output.write(self._indent + jobStr.replace('\n', '\n' + self._indent))
+    self.jobCount += 1
+
+  def finish(self):
+    if self.jobCount == 0:
+      self.output.write('{\n  "jobs": [],\n')
+    else:
+      self.output.write('\n  ],\n')
+    self.output.write('  "schema_version": {}\n}}\n'.format(_schemaVersion))
+
+class _YamlStreamWriter(object):
+  def __init__(self, output):
+    self.output = output
+    self.output.write('# Automatically generated invocation info\n')
+
+  def writeJob(self, job):
+    self.output.write('---\n')
+    self.output.write(svcb.util.dumpYaml(job))
+
+  def finish(self):
+    pass
+
+class _JsonLinesWriter(object):
+  def __init__(self, output):
+    self.output = output
+
+  def writeJob(self, job):
+    self.output.write(json.dumps(job, sort_keys=True))
+    self.output.write('\n')
+
+  def finish(self):
+    pass
+
+_writers = {
+  'yaml': _YamlWriter,
+  'json': _JsonWriter,
+  'yaml-stream': _YamlStreamWriter,
+  'jsonl': _JsonLinesWriter,
+}
 
 if __name__ == '__main__':
   sys.exit(main(sys.argv))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Sample the floating point inputs of the native benchmarks in an
+invocation info file (as written by
+``svcb-emit-klee-runner-invocation-info.py --program exe``) built
+against the fuzzing runtime (``-DSVCB_FUZZ_RUNTIME=ON``).
+
+Each benchmark is run with successive seeds until a run aborts (e.g. an
+assertion fails), crashes or times out, or ``--runs`` runs have been
+done. Benchmarks are sampled in parallel by a pool of worker processes.
+
+A record is written for each benchmark as a JSON object on its own
+line. The run of a record can be reproduced by running the program with
+the ``SVCOMP_FUZZ_SAMPLE_SEED`` environment variable set to its
+``seed``.
+"""
+from load_svcb import add_svcb_to_module_search_path
+add_svcb_to_module_search_path()
+import svcb.fpsample
+import svcb.runner
+import svcb.util
+import argparse
+import json
+import logging
+import sys
+
+_logger = None
+
+def main(args):
+  global _logger
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("-l","--log-level",type=str, default="info",
+                      dest="log_level",
+                      choices=['debug','info','warning','error'])
+  parser.add_argument('invocation_info',
+                      help='Invocation info file',
+                      type=argparse.FileType('r'))
+  parser.add_argument('--runs',
+                      type=int,
+                      default=1000,
+                      help='Maximum number of runs of each benchmark (default: %(default)s)')
+  parser.add_argument('--seed',
+                      type=int,
+                      default=0,
+                      help='Seed of the first run of each benchmark (default: %(default)s)')
+  parser.add_argument('-j', '--jobs',
+                      dest='jobs',
+                      type=int,
+                      default=svcb.util.getDefaultJobs(),
+                      help='Number of benchmarks to sample at the same time (default: %(default)s)')
+  parser.add_argument('--timeout',
+                      type=float,
+                      default=10.0,
+                      help='Wallclock timeout in seconds for each run (default: %(default)s)')
+  parser.add_argument('--memory-limit',
+                      dest='memory_limit',
+                      type=int,
+                      default=None,
+                      help='Memory limit in MiB for each run')
+  parser.add_argument('-o', '--output',
+                      type=argparse.FileType('w'),
+                      default=sys.stdout,
+                      help='Output location for the records (default stdout)')
+
+  pargs = parser.parse_args(args)
+  logLevel = getattr(logging, pargs.log_level.upper(),None)
+  logging.basicConfig(level=logLevel)
+  _logger = logging.getLogger(__name__)
+
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
+  if pargs.runs < 1:
+    _logger.error('--runs must be at least 1')
+    return 1
+  if pargs.seed < 0:
+    _logger.error('--seed must not be negative')
+    return 1
+  if pargs.timeout <= 0:
+    _logger.error('--timeout must be positive')
+    return 1
+  if pargs.memory_limit is not None and pargs.memory_limit <= 0:
+    _logger.error('--memory-limit must be positive')
+    return 1
+
+  try:
+    jobs = svcb.runner.loadJobs(pargs.invocation_info)
+  except svcb.runner.RunnerException as e:
+    _logger.error('Failed to load invocation info: {}'.format(e))
+    return 1
+  for job in jobs:
+    if job['program'].endswith('.bc'):
+      _logger.error('"{}" is LLVM bitcode. Emit the invocation info with "--program exe"'.format(job['program']))
+      return 1
+
+  memoryLimit = None
+  if pargs.memory_limit is not None:
+    memoryLimit = pargs.memory_limit * 1024 * 1024
+  options = svcb.fpsample.SampleOptions(pargs.runs,
+                                        firstSeed=pargs.seed,
+                                        timeout=pargs.timeout,
+                                        memoryLimit=memoryLimit)
+
+  _logger.info('Sampling {} benchmark(s) using {} worker(s)'.format(len(jobs), min(pargs.jobs, len(jobs))))
+  outcomeCounts = { outcome: 0 for outcome in svcb.fpsample.Outcomes }
+  for record in svcb.fpsample.sampleJobs(jobs, options, workers=pargs.jobs):
+    outcome = record['outcome']
+    outcomeCounts[outcome] += 1
+    if outcome == 'error':
+      _logger.error('Failed to sample "{}": {}'.format(record['program'], record['error']))
+    elif outcome != 'none':
+      _logger.info('"{}": {} with seed {}'.format(record['program'], outcome, record['seed']))
+    pargs.output.write(json.dumps(record, sort_keys=True, separators=(',', ':')))
+    pargs.output.write('\n')
+    pargs.output.flush()
+
+  _logger.info('Sampled {} benchmark(s): {}'.format(len(jobs),
+    ', '.join('{} {}'.format(outcomeCounts[o], o) for o in svcb.fpsample.Outcomes)))
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Select benchmark targets matching some criteria and show them as a
+list, a count, JSON or YAML.
+
+Queries are answered from a benchmark index (``--index``) built by the
+build system or, if no index is available, by traversing a directory
+of benchmark specification files (``--directory``).
+
+Example: all x86_64 c99 benchmarks in category X where ``no_assert_fail``
+is expected to be incorrect with exhaustive counter examples.
+
+  svcb-query.py --index benchmark_index.sqlite --architectures x86_64 \\
+    --languages c99 --categories X --task no_assert_fail=false \\
+    --exhaustive-counter-examples no_assert_fail
+"""
+from load_svcb import add_svcb_to_module_search_path
+add_svcb_to_module_search_path()
+import svcb.cache
+import svcb.filters
+import svcb.index
+import svcb.scan
+import svcb.util
+import argparse
+import json
+import logging
+import os
+import sys
+
+_logger = None
+
+_correctnessValues = {
+  'true': True,
+  'false': False,
+  'unknown': None,
+}
+
+_listFields = {
+  'target': 'target',
+  'name': 'name',
+  'spec_path': 'specPath',
+  'exe_path': 'exePath',
+  'llvm_bc_path': 'llvmBcPath',
+  'augmented_spec_path': 'augmentedSpecPath',
+}
+
+def main(args):
+  global _logger
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("-l","--log-level",type=str, default="info",
+                      dest="log_level",
+                      choices=['debug','info','warning','error'])
+  sourceGroup = parser.add_mutually_exclusive_group(required=True)
+  sourceGroup.add_argument("--index", type=str, default=None,
+                           help='Benchmark index to query')
+  sourceGroup.add_argument("--directory", type=str, default=None,
+                           help='Directory to traverse for benchmark specification files')
+  parser.add_argument("--cache-dir", dest='cache_dir', type=str, default=None,
+                      help='Directory to cache loaded benchmark specification files in (--directory only) (default: ${})'.format(
+                        svcb.cache.CacheDirEnvVar))
+  parser.add_argument("-j", "--jobs", dest='jobs', type=int, default=svcb.util.getDefaultJobs(),
+                      help='Number of processes to load benchmark specification files with (--directory only) (default: %(default)s)')
+
+  selectGroup = parser.add_argument_group('selection')
+  selectGroup.add_argument("--categories", type=str, nargs='+', default=None,
+                           help='Select benchmarks in at least one of these categories')
+  selectGroup.add_argument("--all-categories", dest='all_categories', type=str, nargs='+', default=None,
+                           help='Select benchmarks in all of these categories')
+  selectGroup.add_argument("--languages", type=str, nargs='+', default=None,
+                           help='Select benchmarks using one of these languages')
+  selectGroup.add_argument("--architectures", type=str, nargs='+', default=None,
+                           help='Select targets built for one of these architectures (targets for "any" architecture are always selected)')
+  selectGroup.add_argument("--dependencies", type=str, nargs='+', default=None,
+                           help='Select benchmarks using all of these dependencies')
+  selectGroup.add_argument("--task", dest='tasks', type=str, action='append', default=[],
+                           metavar='TASK=VALUE[,VALUE...]',
+                           help='Select benchmarks where the expected correctness of TASK is one of the VALUEs ({})'.format(
+                             ', '.join(sorted(_correctnessValues.keys()))))
+  selectGroup.add_argument("--exhaustive-counter-examples", dest='exhaustive_tasks', type=str, nargs='+', default=None,
+                           metavar='TASK',
+                           help='Select benchmarks where TASK is expected to be incorrect with exhaustive counter examples')
+
+  outputGroup = parser.add_argument_group('output')
+  outputGroup.add_argument("--format", dest='output_format', choices=['list', 'count', 'json', 'yaml'], default='list')
+  outputGroup.add_argument("--field", choices=sorted(_listFields.keys()), default='target',
+                           help='Field to show for each target with --format=list (default: %(default)s)')
+  outputGroup.add_argument("--group-by", dest='group_by', choices=['category', 'task'], default=None,
+                           help='With --format=count show counts per category or per task and expected correctness')
+  outputGroup.add_argument("-o", "--output", type=argparse.FileType('w'), default=sys.stdout)
+  pargs = parser.parse_args(args)
+  logLevel = getattr(logging, pargs.log_level.upper(),None)
+  logging.basicConfig(level=logLevel)
+  _logger = logging.getLogger(__name__)
+
+  taskCorrectness = parseTaskCorrectness(pargs.tasks)
+  if taskCorrectness is None:
+    return 1
+  benchmarkFilter = svcb.filters.BenchmarkFilter(
+    anyCategories=pargs.categories,
+    allCategories=pargs.all_categories,
+    languages=pargs.languages,
+    architectures=pargs.architectures,
+    dependencies=pargs.dependencies,
+    taskCorrectness=taskCorrectness if len(taskCorrectness) > 0 else None,
+    exhaustiveCounterExampleTasks=pargs.exhaustive_tasks)
+
+  if pargs.index is not None:
+    try:
+      index = svcb.index.BenchmarkIndex(pargs.index)
+    except svcb.index.BenchmarkIndexException as e:
+      _logger.error(str(e))
+      return 1
+    if pargs.output_format == 'count' and pargs.group_by is None:
+      # No need to load the entries
+      pargs.output.write('{}\n'.format(index.count(benchmarkFilter)))
+      index.close()
+      return 0
+    entries = index.query(benchmarkFilter)
+    index.close()
+  else:
+    if not os.path.isdir(pargs.directory):
+      _logger.error('"{}" is not a directory'.format(pargs.directory))
+      return 1
+    if pargs.jobs < 1:
+      _logger.error('--jobs must be at least 1')
+      return 1
+    entries = queryDirectory(pargs.directory, benchmarkFilter, pargs)
+    if entries is None:
+      return 1
+
+  writeEntries(entries, pargs)
+  return 0
+
+def parseTaskCorrectness(taskArgs):
+  """
+    Returns a dictionary mapping task names to allowed correctness
+    values from the ``--task`` arguments or None if they are malformed.
+  """
+  taskCorrectness = {}
+  for taskArg in taskArgs:
+    if taskArg.count('=') != 1:
+      _logger.error('"{}" is not of the form TASK=VALUE[,VALUE...]'.format(taskArg))
+      return None
+    (task, values) = taskArg.split('=')
+    allowedValues = set(taskCorrectness.get(task, []))
+    for value in values.split(','):
+      if value.lower() not in _correctnessValues:
+        _logger.error('"{}" is not a valid correctness value'.format(value))
+        return None
+      allowedValues.add(_correctnessValues[value.lower()])
+    taskCorrectness[task] = allowedValues
+  return taskCorrectness
+
+def queryDirectory(directory, benchmarkFilter, pargs):
+  """
+    Returns a list of ``IndexEntry`` objects (sorted by target) for the
+    benchmarks in ``directory`` accepted by ``benchmarkFilter`` or None
+    on failure.
+  """
+  architectures = None
+  if benchmarkFilter.architectures is not None:
+    architectures = set(benchmarkFilter.architectures)
+    architectures.add('any')
+  entries = []
+  failureCount = 0
+  for scanResult in svcb.scan.scanBenchmarks(directory,
+                                             jobs=pargs.jobs,
+                                             cacheDir=pargs.cache_dir,
+                                             benchmarkFilter=benchmarkFilter):
+    if not scanResult.success:
+      _logger.error('Failed to load "{}": {}'.format(scanResult.fileName, scanResult.error))
+      failureCount += 1
+      continue
+    specPath = os.path.realpath(scanResult.fileName)
+    for benchmarkObj in scanResult.benchmarks:
+      entries.extend(svcb.index.makeEntries(benchmarkObj, specPath, architectures=architectures))
+  if failureCount > 0:
+    return None
+  entries.sort(key=lambda e: e.target)
+  return entries
+
+def writeEntries(entries, pargs):
+  output = pargs.output
+  if pargs.output_format == 'list':
+    attr = _listFields[pargs.field]
+    for entry in entries:
+      value = getattr(entry, attr)
+      if value is None:
+        _logger.warning('Target "{}" has no {}'.format(entry.target, pargs.field))
+        continue
+      output.write('{}\n'.format(value))
+  elif pargs.output_format == 'count':
+    if pargs.group_by is None:
+      output.write('{}\n'.format(len(entries)))
+    elif pargs.group_by == 'category':
+      categoryCounts = {}
+      for entry in entries:
+        for category in entry.categories:
+          categoryCounts[category] = categoryCounts.get(category, 0) + 1
+      for (category, count) in sorted(categoryCounts.items()):
+        output.write('{}: {}\n'.format(category, count))
+    elif pargs.group_by == 'task':
+      taskCounts = {}
+      for entry in entries:
+        for (task, correct) in entry.tasks.items():
+          if task not in taskCounts:
+            taskCounts[task] = { True: 0, False: 0, None: 0 }
+          taskCounts[task][correct] += 1
+      for (task, counts) in sorted(taskCounts.items()):
+        output.write('{}: correct: {} incorrect: {} unknown: {}\n'.format(
+          task, counts[True], counts[False], counts[None]))
+    else:
+      raise Exception('Unreachable')
+  elif pargs.output_format == 'json':
+    json.dump([ e.toDict() for e in entries ], output, indent=2, sort_keys=True)
+    output.write('\n')
+  elif pargs.output_format == 'yaml':
+    output.write(svcb.util.dumpYaml([ e.toDict() for e in entries ]))
+  else:
+    raise Exception('Unreachable')
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
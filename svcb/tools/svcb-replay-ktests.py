@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Replay the KLEE test cases (``.ktest`` files) found in a directory
+against the native binaries of their benchmarks to confirm the counter
+examples KLEE found.
+
+Each test case is mapped back to its benchmark through the augmented
+spec files using the program recorded in the test case. The native
+binaries must have been built against KLEE's native runtime. Test
+cases are replayed in parallel by a pool of worker processes.
+
+A record is written for each test case as a JSON object on its own
+line. A record of a reproduced failure has the verification task it
+shows is incorrect, the location of the assertion failure (if any) and
+the classification of the failure against the expected counter
+examples of the benchmark (e.g. ``true_positive``). Test cases that do
+not fail have the result ``unknown`` (or ``timeout``) and no task.
+Records are also result records that can be given to
+``svcb-check-results.py``.
+"""
+from load_svcb import add_svcb_to_module_search_path
+add_svcb_to_module_search_path()
+import svcb.cache
+import svcb.check
+import svcb.replay
+import svcb.scan
+import svcb.util
+import argparse
+import json
+import logging
+import os
+import sys
+
+_logger = None
+
+def main(args):
+  global _logger
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("-l","--log-level",type=str, default="info",
+                      dest="log_level",
+                      choices=['debug','info','warning','error'])
+  parser.add_argument('augmented_spec_file_list',
+                      help='File listing the augmented spec files of the benchmarks',
+                      type=argparse.FileType('r'))
+  parser.add_argument('ktest_directory',
+                      help='Directory to traverse for .ktest files')
+  parser.add_argument('-j', '--jobs',
+                      dest='jobs',
+                      type=int,
+                      default=svcb.util.getDefaultJobs(),
+                      help='Number of test cases to replay at the same time (default: %(default)s)')
+  parser.add_argument('--cache-dir',
+                      dest='cache_dir',
+                      default=None,
+                      help='Directory to cache loaded augmented spec files in '
+                           '(default: ${})'.format(svcb.cache.CacheDirEnvVar))
+  parser.add_argument('--timeout',
+                      type=float,
+                      default=10.0,
+                      help='Wallclock timeout in seconds for each test case (default: %(default)s)')
+  parser.add_argument('--memory-limit',
+                      dest='memory_limit',
+                      type=int,
+                      default=None,
+                      help='Memory limit in MiB for each test case')
+  parser.add_argument('-o', '--output',
+                      type=argparse.FileType('w'),
+                      default=sys.stdout,
+                      help='Output location for the records (default stdout)')
+
+  pargs = parser.parse_args(args)
+  logLevel = getattr(logging, pargs.log_level.upper(),None)
+  logging.basicConfig(level=logLevel)
+  _logger = logging.getLogger(__name__)
+
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
+  if pargs.timeout <= 0:
+    _logger.error('--timeout must be positive')
+    return 1
+  if pargs.memory_limit is not None and pargs.memory_limit <= 0:
+    _logger.error('--memory-limit must be positive')
+    return 1
+  if not os.path.isdir(pargs.ktest_directory):
+    _logger.error('"{}" is not a directory'.format(pargs.ktest_directory))
+    return 1
+
+  augmentedSpecFiles = []
+  for path in pargs.augmented_spec_file_list:
+    strippedPath = path.strip() # Remove trailing whitespace and newlines
+    if len(strippedPath) > 0:
+      augmentedSpecFiles.append(strippedPath)
+  _logger.info('Loading {} augmented spec file(s)'.format(len(augmentedSpecFiles)))
+  indices = buildIndices(augmentedSpecFiles, pargs)
+  if indices is None:
+    return 1
+  (programIndex, expectationIndex) = indices
+
+  ktestFiles = svcb.replay.findKTestFiles(pargs.ktest_directory)
+  memoryLimit = None
+  if pargs.memory_limit is not None:
+    memoryLimit = pargs.memory_limit * 1024 * 1024
+  options = svcb.replay.ReplayOptions(programIndex,
+                                      expectationIndex,
+                                      timeout=pargs.timeout,
+                                      memoryLimit=memoryLimit)
+
+  _logger.info('Replaying {} test case(s) using {} worker(s)'.format(
+    len(ktestFiles), min(pargs.jobs, len(ktestFiles))))
+  outcomeCounts = { o: 0 for o in svcb.replay.Outcomes }
+  classificationCounts = { c: 0 for c in svcb.check.Classifications }
+  for record in svcb.replay.replayKTests(ktestFiles, options, workers=pargs.jobs):
+    outcomeCounts[record['outcome']] += 1
+    if record['outcome'] == 'error':
+      _logger.warning('Failed to replay "{}": {}'.format(record['ktest_file'], record['message']))
+    elif record['outcome'] == 'reproduced':
+      classificationCounts[record['classification']] += 1
+      _logger.debug('"{}": {} ({})'.format(record['ktest_file'], record['task'], record['classification']))
+    pargs.output.write(json.dumps(record, sort_keys=True, separators=(',', ':')))
+    pargs.output.write('\n')
+
+  _logger.info('Replayed {} test case(s): {}'.format(len(ktestFiles),
+    ', '.join('{} {}'.format(outcomeCounts[o], o) for o in svcb.replay.Outcomes)))
+  _logger.info('Reproduced failures: {}'.format(
+    ', '.join('{} {}'.format(classificationCounts[c], c) for c in svcb.check.Classifications
+              if classificationCounts[c] > 0) or 'none'))
+  return 0
+
+def buildIndices(augmentedSpecFiles, pargs):
+  """
+    Returns a tuple of the ``svcb.replay.ProgramIndex`` and
+    ``svcb.check.ExpectationIndex`` of ``augmentedSpecFiles`` or None if
+    they could not be built.
+  """
+  programIndex = svcb.replay.ProgramIndex()
+  expectationIndex = svcb.check.ExpectationIndex()
+  failureCount = 0
+  for scanResult in svcb.scan.loadSpecFiles(augmentedSpecFiles,
+                                           jobs=pargs.jobs,
+                                           cacheDir=pargs.cache_dir):
+    if not scanResult.success:
+      _logger.error('Failed to load "{}": {}'.format(scanResult.fileName, scanResult.error))
+      failureCount += 1
+      continue
+    for benchmarkObj in scanResult.benchmarks:
+      try:
+        programIndex.add(benchmarkObj, scanResult.fileName)
+        expectationIndex.add(benchmarkObj)
+      except (svcb.replay.ReplayException, svcb.check.CheckException) as e:
+        _logger.error(str(e))
+        failureCount += 1
+  if failureCount > 0:
+    return None
+  return (programIndex, expectationIndex)
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# Copyright (c) 2016, Daniel Liew
+# This file is covered by the license in LICENSE-SVCB.txt
+"""
+Run the jobs of an invocation info file (as written by
+``svcb-emit-klee-runner-invocation-info.py``) on this machine using a
+pool of worker processes and write a result info file.
+
+Programs that are LLVM bitcode are run with KLEE (if it is in ``PATH``
+or given by ``--klee``) and other programs (e.g. built with
+``--program exe``) are run natively.
+"""
+from load_svcb import add_svcb_to_module_search_path
+add_svcb_to_module_search_path()
+import svcb.runner
+import svcb.util
+import argparse
+import logging
+import os
+import sys
+
+_logger = None
+
+def main(args):
+  global _logger
+  parser = argparse.ArgumentParser(description=__doc__,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("-l","--log-level",type=str, default="info",
+                      dest="log_level",
+                      choices=['debug','info','warning','error'])
+  parser.add_argument('invocation_info',
+                      help='Invocation info file',
+                      type=argparse.FileType('r'))
+  parser.add_argument('--output-dir',
+                      dest='output_dir',
+                      required=True,
+                      help='Directory to run each job in a sub-directory of')
+  parser.add_argument('-j', '--jobs',
+                      dest='jobs',
+                      type=int,
+                      default=svcb.util.getDefaultJobs(),
+                      help='Number of jobs to run at the same time (default: %(default)s)')
+  parser.add_argument('--tool',
+                      choices=svcb.runner.Tools,
+                      default='auto',
+                      help='How to run programs. ``auto`` runs LLVM bitcode with KLEE and '
+                           'other programs natively (default: %(default)s)')
+  parser.add_argument('--klee',
+                      default=None,
+                      help='Path to KLEE (default: search PATH)')
+  parser.add_argument('--klee-arg',
+                      dest='klee_args',
+                      action='append',
+                      default=[],
+                      help='Argument to pass to KLEE before the program. Can be given more than once')
+  parser.add_argument('--timeout',
+                      type=float,
+                      default=None,
+                      help='Wallclock timeout in seconds for each job')
+  parser.add_argument('--memory-limit',
+                      dest='memory_limit',
+                      type=int,
+                      default=None,
+                      help='Memory limit in MiB for each job')
+  parser.add_argument('--format',
+                      dest='output_format',
+                      choices=['yaml', 'json'],
+                      default='yaml',
+                      help='Format to write the result info in (default: %(default)s)')
+  parser.add_argument('-o', '--output',
+                      type=argparse.FileType('w'),
+                      default=sys.stdout,
+                      help='Result info output location (default stdout)')
+
+  pargs = parser.parse_args(args)
+  logLevel = getattr(logging, pargs.log_level.upper(),None)
+  logging.basicConfig(level=logLevel)
+  _logger = logging.getLogger(__name__)
+
+  if pargs.jobs < 1:
+    _logger.error('--jobs must be at least 1')
+    return 1
+  if pargs.timeout is not None and pargs.timeout <= 0:
+    _logger.error('--timeout must be positive')
+    return 1
+  if pargs.memory_limit is not None and pargs.memory_limit <= 0:
+    _logger.error('--memory-limit must be positive')
+    return 1
+
+  try:
+    jobs = svcb.runner.loadJobs(pargs.invocation_info)
+  except svcb.runner.RunnerException as e:
+    _logger.error('Failed to load invocation info: {}'.format(e))
+    return 1
+
+  kleePath = pargs.klee
+  if kleePath is None:
+    kleePath = svcb.runner.findExecutable('klee')
+  if kleePath is None:
+    if pargs.tool == 'klee':
+      _logger.error('KLEE was not found in PATH')
+      return 1
+    _logger.info('KLEE was not found in PATH. Only native programs can be run')
+
+  outputDir = os.path.abspath(pargs.output_dir)
+  if not os.path.isdir(outputDir):
+    os.makedirs(outputDir)
+  memoryLimit = None
+  if pargs.memory_limit is not None:
+    memoryLimit = pargs.memory_limit * 1024 * 1024
+  options = svcb.runner.RunOptions(outputDir,
+                                   tool=pargs.tool,
+                                   kleePath=kleePath,
+                                   kleeArgs=pargs.klee_args,
+                                   timeout=pargs.timeout,
+                                   memoryLimit=memoryLimit)
+
+  _logger.info('Running {} job(s) using {} worker(s)'.format(len(jobs), min(pargs.jobs, len(jobs))))
+  results = []
+  failureCount = 0
+  timeoutCount = 0
+  for result in svcb.runner.runJobs(jobs, options, workers=pargs.jobs):
+    if result['error'] is not None:
+      _logger.error('Failed to run "{}": {}'.format(result['invocation_info']['program'], result['error']))
+      failureCount += 1
+    elif result['timeout']:
+      _logger.info('"{}" timed out'.format(result['invocation_info']['program']))
+      timeoutCount += 1
+    else:
+      _logger.debug('"{}" exited with {}'.format(result['invocation_info']['program'], result['exit_code']))
+    results.append(result)
+  _logger.info('Ran {} job(s) ({} timed out, {} failed to run)'.format(
+    len(results), timeoutCount, failureCount))
+
+  resultInfo = { 'schema_version': 0, 'results': results }
+  if pargs.output_format == 'json':
+    pargs.output.write(svcb.util.dumpJson(resultInfo))
+  else:
+    pargs.output.write('# Automatically generated result info\n')
+    pargs.output.write(svcb.util.dumpYaml(resultInfo))
+  return 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))